@@ -0,0 +1,81 @@
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import Article
+from compression import content_hash, compress_text
+
+# Also keep the (compressed) article HTML; the clean text is all quiz generation needs
+STORE_ARTICLE_HTML = os.getenv("STORE_ARTICLE_HTML", "false").lower() in ("1", "true", "yes")
+
+
+def _new_article(digest: str, url: str, title: str, clean_text: str, raw_html: Optional[str],
+                 revision_id: Optional[int], store_html: bool) -> Article:
+    codec, compressed_text = compress_text(clean_text)
+    compressed_html = compress_text(raw_html)[1] if store_html and raw_html else None
+    return Article(
+        content_hash=digest,
+        url=url,
+        title=title[:255],
+        revision_id=revision_id,
+        codec=codec,
+        compressed_text=compressed_text,
+        compressed_html=compressed_html,
+    )
+
+
+def get_or_create_article(db: Session, url: str, title: str, clean_text: str,
+                          raw_html: Optional[str] = None, revision_id: Optional[int] = None,
+                          store_html: bool = STORE_ARTICLE_HTML) -> Article:
+    """
+    Returns the stored article with this clean text, compressing and inserting
+    it first if it is new. Identical content is stored only once, however many
+    quizzes reference it. The article is flushed, not committed.
+    """
+    digest = content_hash(clean_text)
+    article = db.query(Article).filter(Article.content_hash == digest).first()
+    if article is not None:
+        return article
+
+    article = _new_article(digest, url, title, clean_text, raw_html, revision_id, store_html)
+    try:
+        # Savepoint, so losing a race on the unique hash does not roll back the caller's work
+        with db.begin_nested():
+            db.add(article)
+    except IntegrityError:
+        # Another writer stored the same content first
+        article = db.query(Article).filter(Article.content_hash == digest).one()
+    return article
+
+
+def get_or_create_articles(db: Session, entries: List[Dict],
+                           store_html: bool = STORE_ARTICLE_HTML) -> List[Article]:
+    """
+    Bulk form of `get_or_create_article` for many scraped articles at once:
+    existing articles are found with one query and new ones are inserted in
+    one flush. Each entry is a dict of `get_or_create_article` keyword
+    arguments; the returned articles are in the same order.
+    """
+    digests = [content_hash(entry["clean_text"]) for entry in entries]
+    articles = {
+        article.content_hash: article
+        for article in db.query(Article).filter(Article.content_hash.in_(set(digests)))
+    }
+    new_articles = {}
+    for digest, entry in zip(digests, entries):
+        if digest not in articles and digest not in new_articles:
+            new_articles[digest] = _new_article(
+                digest, entry["url"], entry["title"], entry["clean_text"],
+                entry.get("raw_html"), entry.get("revision_id"), store_html,
+            )
+    if new_articles:
+        try:
+            with db.begin_nested():
+                db.add_all(new_articles.values())
+        except IntegrityError:
+            # Another writer stored some of the same content first; resolve them one at a time
+            return [get_or_create_article(db, store_html=store_html, **entry) for entry in entries]
+        articles.update(new_articles)
+    return [articles[digest] for digest in digests]
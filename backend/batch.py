@@ -0,0 +1,255 @@
+"""
+Batch quiz generation for pre-warming many articles at once.
+
+Every URL runs through the same steps as a single generation, pipelined:
+articles are scraped concurrently over the pooled HTTP client, LLM calls run
+with bounded parallelism and a requests-per-minute limit, and generated
+quizzes are written in bulk, several per transaction. A failing article is
+reported in its result and never aborts the rest of the batch.
+
+Used by POST /generate_quiz/batch, and from the command line (backend directory):
+    python batch.py urls.txt --output results.jsonl
+where urls.txt holds one article URL per line (blank lines and # comments are skipped).
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+
+from cache import quiz_cache, normalize_article_url, article_url_for_title
+from database import create_db_tables, run_in_db_executor
+from llm_router import AIMDLimiter
+from metrics import span
+from models import FullQuizResponse, QuizBatchItemResult, QuizBatchResponse, LLMFullQuizOutput as APILLMFullQuizOutput
+from quiz_service import lookup_cached_quiz, scrape_article, generate_llm_quiz, save_quizzes, generation_flight
+
+# --- Batch Configuration ---
+# Largest number of URLs accepted by one POST /generate_quiz/batch request (the CLI has no limit)
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "200"))
+# Articles fetched from Wikipedia at once
+BATCH_SCRAPE_CONCURRENCY = int(os.getenv("BATCH_SCRAPE_CONCURRENCY", "16"))
+# LLM generations in flight at once
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+# LLM generations started per minute (0 for no limit)
+BATCH_LLM_REQUESTS_PER_MINUTE = float(os.getenv("BATCH_LLM_REQUESTS_PER_MINUTE", "60"))
+# Generated quizzes written per database transaction
+BATCH_INSERT_SIZE = int(os.getenv("BATCH_INSERT_SIZE", "25"))
+# Longest a generated quiz waits for the rest of its transaction before it is written anyway
+BATCH_INSERT_MAX_WAIT_SECONDS = float(os.getenv("BATCH_INSERT_MAX_WAIT_SECONDS", "1.0"))
+
+
+class RateLimiter:
+    """
+    Spaces out acquisitions evenly so at most `per_minute` happen per minute.
+    Not bound to an event loop, like `llm_router.AIMDLimiter`.
+    """
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Shared by all batches, so concurrent batches together stay within the limits. Neither is
+# bound to an event loop, so batches also run from CLI scripts that call asyncio.run repeatedly.
+llm_rate_limiter = RateLimiter(BATCH_LLM_REQUESTS_PER_MINUTE)
+# A fixed limit: the adaptive limit of each LLM provider is applied by the router
+llm_slots = AIMDLimiter(initial=BATCH_LLM_CONCURRENCY, minimum=BATCH_LLM_CONCURRENCY, maximum=BATCH_LLM_CONCURRENCY)
+
+
+_HTTP_URL = TypeAdapter(HttpUrl)
+
+
+class _BulkWriter:
+    """
+    Buffers generated quizzes and stores them BATCH_INSERT_SIZE at a time, as
+    soon as no other item of the batch can still add one, or at the latest
+    `max_wait` seconds after a quiz was buffered. The deadline matters: an item
+    waiting on a generation shared with another batch may stay open until
+    that batch has stored its quizzes.
+    """
+
+    def __init__(self, items: int, batch_size: int, max_wait: float = BATCH_INSERT_MAX_WAIT_SECONDS):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        # Items of the batch that may still add a quiz
+        self._open_items = items
+        self._timer: Optional[asyncio.Task] = None
+        # (stored response future, cache keys, (url, llm_quiz_data, scraped_data))
+        self._pending: List[Tuple[asyncio.Future, Tuple[str, str], Tuple[str, APILLMFullQuizOutput, Dict]]] = []
+
+    async def add(self, cache_key: str, canonical_key: str,
+                  llm_quiz_data: APILLMFullQuizOutput, scraped_data: Dict) -> FullQuizResponse:
+        """Queues a quiz for storage and returns its response once it is stored."""
+        stored = asyncio.get_running_loop().create_future()
+        self._pending.append((stored, (cache_key, canonical_key), (cache_key, llm_quiz_data, scraped_data)))
+        await self.item_done()
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._pending and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_max_wait())
+        return await stored
+
+    async def _flush_after_max_wait(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        await self.flush()
+
+    async def item_done(self) -> None:
+        """Records that an item will add no (more) quizzes, storing the rest once none can."""
+        self._open_items -= 1
+        if self._open_items == 0:
+            await self.flush()
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            with span("db.write"):
+                responses = await run_in_db_executor(save_quizzes, [entry for _, _, entry in pending])
+        except Exception as e:
+            for stored, _, _ in pending:
+                stored.set_exception(RuntimeError(f"Could not store quiz: {e}"))
+            return
+        for (stored, (cache_key, canonical_key), _), response in zip(pending, responses):
+            quiz_cache.put(cache_key, response, response.date_generated)
+            if canonical_key != cache_key:
+                quiz_cache.put(canonical_key, response, response.date_generated)
+            stored.set_result(response)
+
+
+def _cache_key(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (cache key, None) for a valid article URL, or (None, error)."""
+    try:
+        return normalize_article_url(str(_HTTP_URL.validate_python(url))), None
+    except ValidationError as e:
+        return None, f"Invalid URL: {e.errors()[0]['msg']}"
+
+
+async def generate_quiz_batch(urls: List[str], force_refresh: bool = False) -> QuizBatchResponse:
+    """
+    Generates (or finds cached) quizzes for all URLs. Returns one result per
+    URL in the given order; repeated articles are generated only once, and
+    articles already being generated (by a single request or another batch)
+    are not generated again. Invalid URLs fail individually.
+    """
+    start = time.perf_counter()
+    keys_and_errors = [_cache_key(url) for url in urls]
+    unique_keys = list(dict.fromkeys(cache_key for cache_key, _ in keys_and_errors if cache_key is not None))
+    results: List[Optional[QuizBatchItemResult]] = [None] * len(unique_keys)
+
+    scrape_semaphore = asyncio.Semaphore(BATCH_SCRAPE_CONCURRENCY)
+    writer = _BulkWriter(len(unique_keys), BATCH_INSERT_SIZE)
+
+    async def process(index: int, cache_key: str) -> None:
+        status = "cached"  # "generated" once this item stores a new quiz
+        added = False
+
+        async def generate() -> FullQuizResponse:
+            nonlocal status, added
+            async with scrape_semaphore:
+                scraped_data = await scrape_article(cache_key)
+
+            canonical_key = article_url_for_title(cache_key, scraped_data["title"])
+            if canonical_key != cache_key and not force_refresh:
+                cached_quiz = await lookup_cached_quiz(canonical_key)
+                if cached_quiz is not None:
+                    quiz_cache.put(cache_key, cached_quiz, cached_quiz.date_generated)
+                    return cached_quiz
+
+            await llm_slots.acquire()
+            try:
+                await llm_rate_limiter.acquire()
+                llm_quiz_data = await generate_llm_quiz(scraped_data)
+            finally:
+                llm_slots.release()
+
+            added = True
+            response = await writer.add(cache_key, canonical_key, llm_quiz_data, scraped_data)
+            status = "generated"
+            return response
+
+        try:
+            response = None
+            if not force_refresh:
+                response = await lookup_cached_quiz(cache_key)
+            if response is None:
+                # Shares the generation with single requests (and batches) for the same article
+                response = await generation_flight.do(cache_key, generate)
+            results[index] = QuizBatchItemResult(url=cache_key, status=status, quiz_id=response.id, title=response.title)
+        except Exception as e:
+            results[index] = QuizBatchItemResult(url=cache_key, status="failed", error=str(e))
+        finally:
+            if not added:
+                await writer.item_done()
+
+    await asyncio.gather(*[process(index, cache_key) for index, cache_key in enumerate(unique_keys)])
+
+    by_key = dict(zip(unique_keys, results))
+    items = [
+        by_key[cache_key].model_copy(update={"url": url}) if cache_key is not None
+        else QuizBatchItemResult(url=url, status="failed", error=error)
+        for url, (cache_key, error) in zip(urls, keys_and_errors)
+    ]
+    return QuizBatchResponse(
+        results=items,
+        generated=sum(1 for result in results if result.status == "generated"),
+        cached=sum(1 for result in results if result.status == "cached"),
+        failed=sum(1 for result in results if result.status == "failed") + sum(1 for cache_key, _ in keys_and_errors if cache_key is None),
+        elapsed_seconds=round(time.perf_counter() - start, 3),
+    )
+
+
+def read_url_file(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as url_file:
+        lines = (line.strip() for line in url_file)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+async def _run_cli(urls: List[str], force_refresh: bool) -> QuizBatchResponse:
+    from scraper import close_async_client
+
+    try:
+        return await generate_quiz_batch(urls, force_refresh=force_refresh)
+    finally:
+        await close_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate quizzes for a list of Wikipedia article URLs.")
+    parser.add_argument("url_file", help="File with one Wikipedia article URL per line.")
+    parser.add_argument("--force-refresh", action="store_true", help="Generate new quizzes even for cached articles.")
+    parser.add_argument("--output", help="Write one JSON result per line to this file.")
+    args = parser.parse_args()
+
+    create_db_tables()
+    batch_urls = read_url_file(args.url_file)
+    print(f"Generating quizzes for {len(batch_urls)} articles...")
+    batch_result = asyncio.run(_run_cli(batch_urls, args.force_refresh))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            for item in batch_result.results:
+                output_file.write(item.model_dump_json() + "\n")
+    for item in batch_result.results:
+        if item.status == "failed":
+            print(f"Failed: {item.url}: {item.error}")
+    print(
+        f"Done in {batch_result.elapsed_seconds:.1f} s: {batch_result.generated} generated, "
+        f"{batch_result.cached} cached, {batch_result.failed} failed."
+    )
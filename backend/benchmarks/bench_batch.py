@@ -0,0 +1,84 @@
+"""
+Throughput benchmark for batch generation against one-at-a-time generation.
+
+Generates quizzes for N synthetic articles against a temporary SQLite
+database, with a fixed-latency stand-in for the Wikipedia fetch and
+`FakeQuizChatModel` for Gemini: once by calling the single-article pipeline
+for each URL in turn (what looping POST /generate_quiz does), and once with
+`generate_quiz_batch`. Reports articles per hour for both.
+
+Usage (from the backend directory):
+    python benchmarks/bench_batch.py --articles 40 --llm-latency 2 --time-scale 0.1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("BATCH_LLM_REQUESTS_PER_MINUTE", "0")
+
+import batch
+import database
+import llm_quiz_generator
+import quiz_service
+import scraper
+from fake_llm import FakeQuizChatModel
+from fixtures import build_article_html
+
+
+def install_stand_ins(scrape_latency: float) -> None:
+    pages = {}
+
+    async def fake_scrape(url: str) -> dict:
+        await asyncio.sleep(scrape_latency)
+        title = url.rsplit("/", 1)[-1]
+        if title not in pages:
+            pages[title] = scraper.parse_wikipedia_html(build_article_html(title, 8, seed=len(pages)))
+        return pages[title]
+
+    scraper.scrape_wikipedia_async = fake_scrape
+
+
+async def sequential(urls: list) -> float:
+    start = time.perf_counter()
+    for url in urls:
+        await quiz_service.generate_quiz_for_url(url, force_refresh=True)
+    return time.perf_counter() - start
+
+
+async def batched(urls: list) -> float:
+    result = await batch.generate_quiz_batch(urls, force_refresh=True)
+    if result.failed:
+        raise RuntimeError(f"{result.failed} batch items failed: {result.results[0].error}")
+    return result.elapsed_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--scrape-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--time-scale", type=float, default=0.1)
+    args = parser.parse_args()
+
+    install_stand_ins(args.scrape_latency * args.time_scale)
+    llm_quiz_generator.set_llm(FakeQuizChatModel(
+        base_latency=args.llm_latency * args.time_scale, input_token_latency=0, output_token_latency=0
+    ))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.set_engine(database.build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        database.create_db_tables()
+
+        for label, strategy in (("one at a time", sequential), ("batch", batched)):
+            urls = [f"https://en.wikipedia.org/wiki/{label.replace(' ', '_')}_{i}" for i in range(args.articles)]
+            elapsed = asyncio.run(strategy(urls)) / args.time_scale
+            print(f"{label:>13}: {elapsed:7.1f} s unscaled, {args.articles / elapsed * 3600:8.0f} articles/hour")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Concurrent-request benchmark for POST /generate_quiz.
+
+Runs the real FastAPI app in-process against a temporary SQLite database with
+the Wikipedia fetch and the LLM call replaced by fixed-latency stand-ins, once
+with the stand-ins blocking the event loop (the old synchronous pipeline) and
+once awaiting them (the async pipeline). While the generations are in flight
+it also times GET /history to show whether other requests are stalled.
+
+Usage (from the backend directory):
+    python benchmarks/bench_concurrency.py --requests 20 --scrape-latency 0.3 --llm-latency 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import database
+import quiz_service
+import scraper
+from main import app
+
+SAMPLE_TEXT = "Alan Turing was a British mathematician and computer scientist. " * 20
+
+
+def _fake_quiz(title: str) -> dict:
+    return {
+        "title": title,
+        "summary": "A benchmark summary.",
+        "key_entities": {"people": ["Alan Turing"], "organizations": [], "locations": []},
+        "sections": ["Early life", "Career"],
+        "quiz": [
+            {
+                "question": f"Question {i}?",
+                "options": ["A", "B", "C", "D"],
+                "answer": "A",
+                "difficulty": "easy",
+                "explanation": "Because.",
+            }
+            for i in range(5)
+        ],
+        "related_topics": ["Computer science"],
+    }
+
+
+def install_stand_ins(blocking: bool, scrape_latency: float, llm_latency: float) -> None:
+    """Replaces the network-bound pipeline steps with fixed-latency stand-ins."""
+
+    async def fake_scrape(url: str) -> dict:
+        if blocking:
+            time.sleep(scrape_latency)
+        else:
+            await asyncio.sleep(scrape_latency)
+        title = url.rsplit("/", 1)[-1].replace("_", " ")
+        return {"title": title, "clean_text": SAMPLE_TEXT, "raw_html": "<html></html>"}
+
+    async def fake_llm(title: str, text_content: str) -> dict:
+        if blocking:
+            time.sleep(llm_latency)
+        else:
+            await asyncio.sleep(llm_latency)
+        return _fake_quiz(title)
+
+    scraper.scrape_wikipedia_async = fake_scrape
+    quiz_service.agenerate_quiz_from_text = fake_llm
+
+
+async def run_load(num_requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        history_latencies = []
+
+        async def probe_history():
+            # Keeps timing /history while generations are in flight
+            await asyncio.sleep(0.05)
+            while not generations.done():
+                start = time.perf_counter()
+                await client.get("/history")
+                history_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        generations = asyncio.gather(*[
+            client.post("/generate_quiz", json={"url": f"https://en.wikipedia.org/wiki/Article_{i}", "force_refresh": True})
+            for i in range(num_requests)
+        ])
+        probe = asyncio.create_task(probe_history())
+        responses = await generations
+        elapsed = time.perf_counter() - start
+        await probe
+
+    failures = sum(1 for r in responses if r.status_code != 201)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(num_requests / elapsed, 2),
+        "failures": failures,
+        "history_probes": len(history_latencies),
+        "history_max_latency_s": round(max(history_latencies), 3) if history_latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--scrape-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.set_engine(database.build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        database.create_db_tables()
+
+        for label, blocking in (("blocking (before)", True), ("async (after)", False)):
+            install_stand_ins(blocking, args.scrape_latency, args.llm_latency)
+            result = asyncio.run(run_load(args.requests))
+            print(f"{label:>18}: {result}")
+
+
+if __name__ == "__main__":
+    main()
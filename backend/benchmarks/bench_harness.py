@@ -0,0 +1,395 @@
+"""
+Offline end-to-end benchmark of the generation pipeline, for comparing commits.
+
+Runs the real scraper, LLM chain and FastAPI app without network access: the
+Wikipedia fetch is answered from HTML fixture pages (the synthetic small,
+medium and large pages of `fixtures.py`, or pages saved from Wikipedia with
+--pages) and `FakeQuizChatModel` stands in for Gemini. Three phases:
+
+  - stages: for each page, `scrape_wikipedia`, condensation,
+    `generate_quiz_from_text` and storing the quiz, run one at a time; reports
+    the wall and CPU (thread) time of every timed stage (`metrics.span`) and
+    of each step, and the peak traced memory (tracemalloc) of each step
+  - load: concurrent POST /generate_quiz requests against the app in-process,
+    cycling through the pages; reports throughput, latency percentiles, CPU
+    time per request and wall time per stage
+  - reads: concurrent GET /quiz/{id} and /history requests for the stored quizzes
+
+Results are written as JSON together with the commit they were measured on;
+--compare prints the change of every figure against an earlier results file.
+
+Usage (from the backend directory):
+    python benchmarks/bench_harness.py --repeat 5 --requests 60 --concurrency 8
+    python benchmarks/bench_harness.py --pages ~/wiki_pages --output /tmp/after.json --compare /tmp/before.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "harness.json")
+
+import httpx
+import requests
+
+import database
+import llm_quiz_generator
+import metrics
+import scraper
+from condenser import condense_text
+from fake_llm import FakeQuizChatModel
+from fixtures import fixture_pages
+from http_cache import response_cache
+from main import app
+from models import LLMFullQuizOutput
+from quiz_service import save_quizzes
+
+# Modules whose stages are timed with `metrics.span`
+SPAN_MODULES = ("scraper", "quiz_service", "llm_quiz_generator", "llm_router", "batch")
+ARTICLE_URL = "https://en.wikipedia.org/wiki/Bench_{page}_{index}"
+
+
+# --- Fixture transport ---
+
+def _page_for_url(url: str, pages: dict) -> str:
+    """Maps ARTICLE_URL back to its page: /wiki/Bench_<page>_<index>."""
+    name = url.rsplit("/", 1)[-1][len("Bench_"):].rsplit("_", 1)[0]
+    return pages[name]
+
+
+class FixtureAdapter(requests.adapters.BaseAdapter):
+    """Answers the synchronous scraper's requests with fixture pages."""
+
+    def __init__(self, pages: dict):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response._content = _page_for_url(request.url, self.pages).encode("utf-8")
+        response.headers["Content-Type"] = "text/html; charset=UTF-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def install_fixture_transport(pages: dict) -> None:
+    """Routes both scraper fetch paths to the fixture pages, scraping the rendered page every time."""
+    scraper.WIKI_FETCH_BACKEND = "html"
+    session = requests.Session()
+    session.mount("https://", FixtureAdapter(pages))
+    scraper._session = session
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=_page_for_url(str(request.url), pages),
+                              headers={"Content-Type": "text/html; charset=UTF-8"})
+
+    scraper._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def load_pages(pages_dir: str) -> dict:
+    """Returns {name: html}: every *.html file in `pages_dir`, or the synthetic fixture pages."""
+    if not pages_dir:
+        return fixture_pages()
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(os.path.expanduser(pages_dir), "*.html"))):
+        name = os.path.splitext(os.path.basename(path))[0].replace("_", "-")
+        with open(path, encoding="utf-8") as page_file:
+            pages[name] = page_file.read()
+    if not pages:
+        raise SystemExit(f"No .html pages found in {pages_dir}")
+    return pages
+
+
+# --- Stage profiling ---
+
+class StageProfiler:
+    """Wraps `metrics.span` to also record the wall and CPU time of every stage."""
+
+    def __init__(self):
+        self.wall = defaultdict(list)
+        self.cpu = defaultdict(list)
+
+    @contextmanager
+    def span(self, stage: str):
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        with metrics.span(stage):
+            yield
+        # CPU time is only meaningful for stages that run start to end on one thread
+        self.cpu[stage].append(time.thread_time() - cpu_start)
+        self.wall[stage].append(time.perf_counter() - wall_start)
+
+    def install(self) -> None:
+        for name in SPAN_MODULES:
+            module = sys.modules.get(name) or __import__(name)
+            module.span = self.span
+
+    def reset(self) -> None:
+        self.wall.clear()
+        self.cpu.clear()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return _ms(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))])
+
+    return {"p50_ms": _ms(statistics.median(ordered)), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+# --- Phases ---
+
+def run_steps(url: str) -> dict:
+    """One generation, step by step, as the pipeline runs it (short-document path)."""
+    steps = {}
+
+    def step(name, call):
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        result = call()
+        steps[name] = (time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+        return result
+
+    scraped = step("scrape_wikipedia", lambda: scraper.scrape_wikipedia(url))
+    llm_text = step("condense", lambda: condense_text(scraped["clean_text"], scraped.get("sections")))
+    quiz = step("generate_quiz_from_text", lambda: llm_quiz_generator.generate_quiz_from_text(scraped["title"], llm_text))
+    step("store", lambda: save_quizzes([(url, LLMFullQuizOutput(**quiz), scraped)]))
+    return steps
+
+
+def peak_memory(url: str) -> dict:
+    """Peak traced allocations (KiB) of each step of one generation."""
+    peaks = {}
+
+    def step(name, call):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = call()
+        peaks[name] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1024, 1)
+        return result
+
+    tracemalloc.start()
+    try:
+        scraped = step("scrape_wikipedia", lambda: scraper.scrape_wikipedia(url))
+        llm_text = step("condense", lambda: condense_text(scraped["clean_text"], scraped.get("sections")))
+        quiz = step("generate_quiz_from_text", lambda: llm_quiz_generator.generate_quiz_from_text(scraped["title"], llm_text))
+        step("store", lambda: save_quizzes([(url, LLMFullQuizOutput(**quiz), scraped)]))
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def stage_phase(pages: dict, profiler: StageProfiler, repeat: int) -> dict:
+    results = {}
+    for name, html in pages.items():
+        profiler.reset()
+        step_samples = defaultdict(list)
+        # The first run warms up imports, chains and caches and is not counted
+        for index in range(repeat + 1):
+            steps = run_steps(ARTICLE_URL.format(page=name, index=index))
+            if index == 0:
+                profiler.reset()
+                continue
+            for step, sample in steps.items():
+                step_samples[step].append(sample)
+        peaks = peak_memory(ARTICLE_URL.format(page=name, index="mem"))
+
+        scraped = scraper.parse_wikipedia_html(html)
+        results[name] = {
+            "html_kib": round(len(html) / 1024, 1),
+            "text_kib": round(len(scraped["clean_text"]) / 1024, 1),
+            "steps": {
+                step: {
+                    "wall_ms": _ms(statistics.median(wall for wall, _ in samples)),
+                    "cpu_ms": _ms(statistics.median(cpu for _, cpu in samples)),
+                    "peak_kib": peaks[step],
+                }
+                for step, samples in step_samples.items()
+            },
+            "stages": {
+                stage: {"wall_ms": _ms(statistics.median(profiler.wall[stage])), "cpu_ms": _ms(statistics.median(profiler.cpu[stage]))}
+                for stage in sorted(profiler.wall)
+            },
+        }
+    return results
+
+
+async def _drive(requests_to_send: list, concurrency: int) -> tuple:
+    """Sends (method, path, body) requests from `concurrency` clients; returns latencies, failures and elapsed time."""
+    latencies, failures = [], 0
+    queue = iter(requests_to_send)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def client_loop():
+            nonlocal failures
+            for method, path, body in queue:
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return latencies, failures, elapsed
+
+
+def load_phase(requests_to_send: list, concurrency: int, profiler: StageProfiler = None) -> dict:
+    if profiler is not None:
+        profiler.reset()
+    cpu_start = time.process_time()
+    latencies, failures, elapsed = asyncio.run(_drive(requests_to_send, concurrency))
+    cpu = time.process_time() - cpu_start
+    result = {
+        "requests": len(requests_to_send),
+        "concurrency": concurrency,
+        "throughput_rps": round(len(requests_to_send) / elapsed, 2),
+        **percentiles(latencies),
+        "cpu_ms_per_request": _ms(cpu / len(requests_to_send)),
+        "failures": failures,
+    }
+    if profiler is not None:
+        result["stages_wall_ms"] = {stage: percentiles(samples) for stage, samples in sorted(profiler.wall.items())}
+    return result
+
+
+# --- Results ---
+
+def git_commit() -> dict:
+    def git(*args) -> str:
+        completed = subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return completed.stdout.strip() if completed.returncode == 0 else ""
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def _flatten(data, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(previous: dict, current: dict) -> None:
+    before, after = _flatten(previous), _flatten(current)
+    print(f"\nChange since {previous.get('commit')} (now {current.get('commit')}):")
+    for path in sorted(before.keys() & after.keys()):
+        if path.startswith("settings.") or path.endswith((".requests", ".concurrency")) or not before[path]:
+            continue
+        change = (after[path] - before[path]) / before[path] * 100
+        print(f"  {path:<72} {before[path]:>12} -> {after[path]:>12} ({change:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory of saved Wikipedia pages (*.html) to use instead of the synthetic fixtures.")
+    parser.add_argument("--repeat", type=int, default=5, help="Generations per page in the stages phase.")
+    parser.add_argument("--requests", type=int, default=60, help="Generations in the load phase.")
+    parser.add_argument("--reads", type=int, default=2000, help="Read requests in the reads phase.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-base-latency", type=float, default=0.1, help="Simulated seconds per LLM call.")
+    parser.add_argument("--llm-token-latency", type=float, default=0.001, help="Simulated seconds per output token.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    install_fixture_transport(pages)
+    llm_quiz_generator.set_llm(FakeQuizChatModel(
+        base_latency=args.llm_base_latency, output_token_latency=args.llm_token_latency
+    ))
+    profiler = StageProfiler()
+    profiler.install()
+
+    results = {
+        **git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            # Synthetic pages are Wikipedia-shaped, not real articles; label which were measured
+            "pages": os.path.expanduser(args.pages) if args.pages else "synthetic (fixtures.py)",
+            "html_parser": scraper.HTML_PARSER,
+            "repeat": args.repeat,
+            "concurrency": args.concurrency,
+            "llm_base_latency": args.llm_base_latency,
+            "llm_token_latency": args.llm_token_latency,
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.set_engine(database.build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        database.create_db_tables()
+
+        results["stages"] = stage_phase(pages, profiler, args.repeat)
+        for name, page in results["stages"].items():
+            print(f"{name:>8}: {page['html_kib']} KiB html -> {page['text_kib']} KiB text")
+            for step, figures in page["steps"].items():
+                print(f"{'':>10}{step:<24} {json.dumps(figures)}")
+
+        names = list(pages)
+        generations = [
+            ("POST", "/generate_quiz", {"url": ARTICLE_URL.format(page=names[i % len(names)], index=f"load{i}"), "force_refresh": True})
+            for i in range(args.requests)
+        ]
+        results["load"] = load_phase(generations, args.concurrency, profiler)
+        print(f"    load: {json.dumps({key: value for key, value in results['load'].items() if key != 'stages_wall_ms'})}")
+
+        with database.session_scope() as db:
+            quiz_ids = [quiz_id for (quiz_id,) in db.query(database.Quiz.id)]
+        rng = random.Random(0)
+        reads = [
+            ("GET", f"/quiz/{rng.choice(quiz_ids)}" if i % 4 else "/history?limit=20", None)
+            for i in range(args.reads)
+        ]
+        response_cache.clear()
+        results["reads"] = load_phase(reads, args.concurrency)
+        print(f"   reads: {json.dumps(results['reads'])}")
+        database.get_engine().dispose()
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["max_rss_mib"] = round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+        output_file.write("\n")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            compare(json.load(previous_file), results)
+
+
+if __name__ == "__main__":
+    main()
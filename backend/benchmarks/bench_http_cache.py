@@ -0,0 +1,140 @@
+"""
+Bandwidth and database load of history browsing, with and without HTTP caching.
+
+Seeds a temporary SQLite database, then replays a browsing session against
+the real FastAPI app in-process: each visit to the History tab loads the first
+page and opens a few quiz details. The "before" client ignores caching (no
+compression, no conditional requests) and the server-side response cache is
+disabled; the "after" client behaves like a browser, keeping responses with
+their ETags, reusing immutable quizzes without asking, and revalidating the
+rest with If-None-Match. Reports bytes received, SQL statements executed and
+mean request latency.
+
+Usage (from the backend directory):
+    python benchmarks/bench_http_cache.py --visits 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import event
+
+import database
+from http_cache import response_cache
+from main import app
+from models import LLMFullQuizOutput
+from quiz_service import save_quizzes
+
+
+def _entry(index: int):
+    quiz = LLMFullQuizOutput.model_validate({
+        "title": f"Article {index}",
+        "summary": f"A benchmark summary of article {index}, a few sentences long. " * 5,
+        "key_entities": {"people": ["Alan Turing", "Ada Lovelace"], "organizations": ["Bletchley Park"], "locations": ["London"]},
+        "sections": ["Early life", "Career", "Legacy", "Honours"],
+        "quiz": [
+            {
+                "question": f"Question {i} about article {index}, with a realistic amount of text?",
+                "options": [f"Option {letter} for question {i}" for letter in "ABCD"],
+                "answer": f"Option A for question {i}",
+                "difficulty": ("easy", "medium", "hard")[i % 3],
+                "explanation": "Because the article says so, in a sentence or two of explanation.",
+            }
+            for i in range(5)
+        ],
+        "related_topics": ["Computer science", "Mathematics", "Cryptography"],
+    })
+    return f"https://en.wikipedia.org/wiki/Article_{index}", quiz, {"title": quiz.title, "clean_text": f"Article {index}. " * 50}
+
+
+class BrowserCache:
+    """Keeps responses by URL like a browser: immutable ones are reused, the rest revalidated."""
+
+    def __init__(self):
+        self.entries = {}
+
+    async def get(self, client: httpx.AsyncClient, path: str) -> dict:
+        cached = self.entries.get(path)
+        if cached is not None and "immutable" in cached["cache_control"]:
+            return cached["data"]
+        headers = {"Accept-Encoding": "br, gzip"}
+        if cached is not None:
+            headers["If-None-Match"] = cached["etag"]
+        response = await client.get(path, headers=headers)
+        if response.status_code == 304:
+            return cached["data"]
+        data = response.json()
+        self.entries[path] = {"etag": response.headers["etag"], "cache_control": response.headers["cache-control"], "data": data}
+        return data
+
+
+async def browse(visits: int, quizzes_per_visit: int, caching: bool) -> dict:
+    stats = {"bytes": 0, "requests": 0, "latency": 0.0}
+
+    async def count_bytes(response: httpx.Response) -> None:
+        await response.aread()
+        stats["bytes"] += sum(len(name) + len(value) for name, value in response.headers.raw)
+        stats["bytes"] += response.num_bytes_downloaded # Body as sent, before decompression
+
+    browser = BrowserCache()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", event_hooks={"response": [count_bytes]}) as client:
+        async def get(path: str) -> dict:
+            start = time.perf_counter()
+            if caching:
+                data = await browser.get(client, path)
+            else:
+                data = (await client.get(path, headers={"Accept-Encoding": "identity"})).json()
+            stats["latency"] += time.perf_counter() - start
+            stats["requests"] += 1
+            return data
+
+        rng = random.Random(0)
+        for _ in range(visits):
+            page = await get("/history?limit=20&include_total=true")
+            for item in rng.sample(page["items"], quizzes_per_visit):
+                await get(f"/quiz/{item['id']}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, default=200)
+    parser.add_argument("--visits", type=int, default=200)
+    parser.add_argument("--quizzes-per-visit", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.set_engine(database.build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        database.create_db_tables()
+        save_quizzes([_entry(i) for i in range(args.quizzes)])
+
+        statements = {"count": 0}
+        event.listen(database.get_engine(), "before_cursor_execute", lambda *_: statements.__setitem__("count", statements["count"] + 1))
+
+        results = {}
+        max_bytes = response_cache.max_bytes
+        for label, caching in (("before", False), ("after", True)):
+            response_cache.clear()
+            response_cache.max_bytes = max_bytes if caching else 0
+            statements["count"] = 0
+            stats = asyncio.run(browse(args.visits, args.quizzes_per_visit, caching))
+            results[label] = {
+                "fetches": stats["requests"],
+                "kib_received": round(stats["bytes"] / 1024, 1),
+                "sql_statements": statements["count"],
+                "mean_latency_ms": round(stats["latency"] / stats["requests"] * 1000, 3),
+            }
+            print(f"{label:>6}: {json.dumps(results[label])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark for the API process.
+
+Starts fresh interpreters that import `main` under `python -X importtime`
+and send one health-check request (GET /) straight to the ASGI app, without
+credentials or a reachable database. Reports the median time to import
+`main`, the median wall time from process start to the first health-check
+response, and the slowest modules imported directly by the application.
+Results are written as JSON (tracked in the repo, so changes show up in review).
+
+Usage (from the backend directory):
+    python benchmarks/bench_import_time.py --runs 7
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "import_time.json")
+
+# Imports the app and answers one GET / without running the lifespan (no database needed)
+_CHILD_SCRIPT = """
+import asyncio
+import main
+
+async def health_check():
+    messages = []
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "",
+             "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80)}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await main.app(scope, receive, send)
+    assert messages[0]["status"] == 200, messages
+
+asyncio.run(health_check())
+"""
+
+_IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_once() -> dict:
+    # No credentials: the app must still import and answer the health check
+    env = {key: value for key, value in os.environ.items() if key not in ("GEMINI_API_KEY", "DATABASE_URL")}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-2000:])
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            indent = len(match.group(3)) // 2
+            modules.setdefault(match.group(4), (int(match.group(2)), indent))
+    return {"wall_ms": wall * 1000, "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    app_modules = {
+        name.split(".")[0] for name in os.listdir(BACKEND_DIR) if name.endswith(".py")
+    } | {"fastapi", "sqlalchemy", "langchain_core", "langchain_google_genai", "bs4", "httpx", "requests"}
+
+    def median_ms(name: str) -> float:
+        values = [run["modules"][name][0] / 1000 for run in runs if name in run["modules"]]
+        return round(statistics.median(values), 1) if values else None
+
+    seen = set().union(*(run["modules"] for run in runs))
+    top_level = sorted(
+        ((name, median_ms(name)) for name in seen if name in app_modules),
+        key=lambda item: item[1], reverse=True,
+    )
+    result = {
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "import_main_ms": median_ms("main"),
+        "first_health_check_ms": round(statistics.median(run["wall_ms"] for run in runs), 1),
+        "modules_ms": dict(top_level),
+        "loaded_at_startup": {
+            name: name in seen for name in ("langchain_core", "langchain_google_genai", "bs4", "httpx", "requests")
+        },
+    }
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(result, output_file, indent=2)
+        output_file.write("\n")
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Success rate and tail latency of quiz generations against a faulty LLM provider.
+
+Sends concurrent `agenerate_quiz_from_text` calls through `llm_router` with
+fake providers: the primary is slow on a fraction of calls, rate-limits some
+calls at random, truncates some outputs, and rejects calls over its
+concurrency quota with a 429; the fallback is a faster, reliable model.
+Compares:
+  - direct: one attempt per prompt and no limit on concurrent calls (as before the router)
+  - retries + AIMD: jittered retries of 429s and malformed outputs, with the adaptive limiter
+  - retries + AIMD + hedging: as above, also hedging slow calls to the fallback
+
+Usage (from the backend directory):
+    python benchmarks/bench_llm_router.py --generations 200 --concurrency 32 --quota 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import llm_quiz_generator
+from fake_llm import FakeQuizChatModel
+from llm_router import AIMDLimiter, LLMProvider, LLMRouter
+
+ARTICLE_TEXT = (
+    "Alan Turing was an English mathematician, computer scientist, logician, cryptanalyst and philosopher. "
+    "He worked at Bletchley Park during the Second World War and designed the Automatic Computing Engine. "
+) * 20
+
+
+def primary_model(args) -> FakeQuizChatModel:
+    return FakeQuizChatModel(
+        base_latency=args.latency, output_token_latency=0.0005,
+        slow_rate=args.slow_rate, slow_factor=10.0, rate_limit_rate=args.rate_limit_rate,
+        malformed_rate=args.malformed_rate, max_concurrency=args.quota, fault_seed=1,
+    )
+
+
+def build_router(args, strategy: str):
+    primary = primary_model(args)
+    fallback = FakeQuizChatModel(base_latency=args.latency / 2, output_token_latency=0.0002)
+    llm_quiz_generator.set_llm(primary)
+    if strategy == "direct":
+        # No concurrency limit: every caller goes straight to the provider
+        limiter = AIMDLimiter(initial=args.concurrency, minimum=args.concurrency, maximum=args.concurrency)
+        router = LLMRouter(LLMProvider("primary", lambda: primary, limiter), max_attempts=1, timeout=args.timeout)
+    else:
+        hedge = LLMProvider("fallback", lambda: fallback) if strategy.endswith("hedging") else None
+        router = LLMRouter(LLMProvider("primary", lambda: primary), hedge, timeout=args.timeout,
+                           max_attempts=args.attempts, hedge_after=args.hedge_after, retry_base_delay=args.retry_delay)
+    llm_quiz_generator.set_router(router)
+    return router, primary, fallback
+
+
+async def run(count: int, concurrency: int) -> dict:
+    latencies, failures = [], 0
+    queue = iter(range(count))
+
+    async def worker():
+        nonlocal failures
+        for index in queue:
+            start = time.perf_counter()
+            try:
+                await llm_quiz_generator.agenerate_quiz_from_text(f"Article {index}", f"{index}. {ARTICLE_TEXT}")
+                latencies.append(time.perf_counter() - start)
+            except RuntimeError:
+                failures += 1
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    latencies.sort()
+
+    def percentile(fraction: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000) if latencies else None
+
+    return {
+        "success_rate": round(len(latencies) / count, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000) if latencies else None,
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--quota", type=int, default=12, help="Concurrent calls the fake primary provider accepts.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Base latency of the primary provider.")
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--attempts", type=int, default=4)
+    parser.add_argument("--retry-delay", type=float, default=0.2)
+    parser.add_argument("--hedge-after", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=20.0)
+    args = parser.parse_args()
+
+    for strategy in ("direct", "retries + AIMD", "retries + AIMD + hedging"):
+        router, primary, fallback = build_router(args, strategy)
+        start = time.perf_counter()
+        result = asyncio.run(run(args.generations, args.concurrency))
+        result.update({
+            "seconds": round(time.perf_counter() - start, 1),
+            "primary_calls": primary.calls,
+            "primary_429s": primary.rate_limited,
+            "fallback_calls": fallback.calls,
+            "final_limit": router.primary.limiter.stats()["limit"],
+        })
+        print(f"{strategy:>24}: {json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark for long-article quiz generation: one prompt vs. condensed text vs.
+section chunks.
+
+Builds synthetic articles of increasing length, extracts their text and
+sections with the real scraper, and generates a quiz for each with the whole
+text in one prompt, with the text condensed to CONDENSE_TOKEN_BUDGET, and
+chunk by chunk, with `FakeQuizChatModel` standing in for Gemini. Reports LLM calls, prompt and
+output tokens, and wall-clock latency per strategy.
+
+The fake model's latency (base + per prompt token + per output token) defaults
+to rough Gemini 2.5 Pro figures; --time-scale shrinks every delay
+proportionally for quick runs.
+
+Usage (from the backend directory):
+    python benchmarks/bench_long_document.py --time-scale 0.1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import condenser
+import llm_quiz_generator
+import long_document
+import scraper
+from fake_llm import FakeQuizChatModel
+from fixtures import build_article_html
+
+ARTICLE_SECTIONS = {
+    "medium": 20,
+    "long": 80,
+    "very long": 200,
+}
+
+
+async def measure(model: FakeQuizChatModel, generate) -> dict:
+    model.reset_usage()
+    start = time.perf_counter()
+    quiz = await generate()
+    return {
+        "seconds": time.perf_counter() - start,
+        "calls": model.calls,
+        "input_tokens": model.input_tokens,
+        "output_tokens": model.output_tokens,
+        "questions": len(quiz["quiz"]),
+    }
+
+
+def report(label: str, result: dict) -> None:
+    print(
+        f"    {label:<9} {result['calls']:>3} calls, {result['input_tokens']:>7} prompt tokens, "
+        f"{result['output_tokens']:>5} output tokens, {result['seconds']:6.2f} s, {result['questions']} questions"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-latency", type=float, default=1.0)
+    parser.add_argument("--input-token-latency", type=float, default=0.00005)
+    parser.add_argument("--output-token-latency", type=float, default=0.012)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    model = FakeQuizChatModel(
+        base_latency=args.base_latency * args.time_scale,
+        input_token_latency=args.input_token_latency * args.time_scale,
+        output_token_latency=args.output_token_latency * args.time_scale,
+    )
+    llm_quiz_generator.set_llm(model)
+
+    for name, section_count in ARTICLE_SECTIONS.items():
+        article = scraper.parse_wikipedia_html(build_article_html(f"Benchmark {name.title()}", section_count, seed=section_count))
+        tokens = long_document.estimate_tokens(article["clean_text"])
+        chunks = long_document.pick_chunks(long_document.split_into_chunks(article["sections"]))
+        mode = "chunked" if long_document.is_long_document(article["clean_text"]) else "condensed"
+        print(f"{name} article: {tokens} tokens, {len(article['sections'])} sections -> {len(chunks)} chunks (service uses {mode})")
+
+        single = await measure(model, lambda: llm_quiz_generator.agenerate_quiz_from_text(article["title"], article["clean_text"]))
+        report("single", single)
+        condensed_text = condenser.condense_text(article["clean_text"], article["sections"])
+        condensed = await measure(model, lambda: llm_quiz_generator.agenerate_quiz_from_text(article["title"], condensed_text))
+        report("condensed", condensed)
+        chunked = await measure(model, lambda: long_document.agenerate_quiz_from_sections(article["title"], article["sections"]))
+        report("chunked", chunked)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
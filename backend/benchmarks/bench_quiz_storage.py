@@ -0,0 +1,135 @@
+"""
+Per-quiz cost of storing and reading quizzes, without HTTP overhead.
+
+Compares, against a temporary SQLite database:
+  - create: building the response of a stored quiz by re-parsing its stored
+    JSON (before) vs. from the in-memory LLM output (after)
+  - read: loading the quiz row and validating its JSON into the response
+    model, then serializing it (before) vs. selecting the pre-serialized
+    response (after)
+  - filter: counting, and listing the newest 50, hard questions by parsing
+    the quizzes' JSON (before) vs. querying the normalized question rows (after)
+
+Usage (from the backend directory):
+    python benchmarks/bench_quiz_storage.py --quizzes 500
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+import database
+from database import Quiz, QuizQuestionRow, session_scope
+from models import LLMFullQuizOutput
+from quiz_service import build_quiz_response, load_quiz_response_json, quiz_to_response, save_quizzes
+
+
+def _llm_output(index: int) -> LLMFullQuizOutput:
+    rng = random.Random(index)
+    return LLMFullQuizOutput.model_validate({
+        "title": f"Article {index}",
+        "summary": f"A benchmark summary of article {index}. " * 6,
+        "key_entities": {"people": ["Alan Turing", "Ada Lovelace"], "organizations": ["Bletchley Park"], "locations": ["London"]},
+        "sections": ["Early life", "Career", "Legacy", "Honours"],
+        "quiz": [
+            {
+                "question": f"Question {i} about article {index}, with a realistic amount of text?",
+                "options": [f"Option {letter} for question {i}" for letter in "ABCD"],
+                "answer": f"Option A for question {i}",
+                "difficulty": rng.choice(["easy", "medium", "hard"]),
+                "explanation": "Because the article says so, in a sentence or two of explanation.",
+            }
+            for i in range(5)
+        ],
+        "related_topics": ["Computer science", "Mathematics", "Cryptography"],
+    })
+
+
+def timed(call, repeat: int) -> float:
+    """Median microseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.set_engine(database.build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        database.create_db_tables()
+        outputs = [_llm_output(i) for i in range(args.quizzes)]
+        responses = save_quizzes([
+            (f"https://en.wikipedia.org/wiki/Article_{i}", output, {"title": output.title, "clean_text": f"Article {i}. " * 50})
+            for i, output in enumerate(outputs)
+        ])
+        rng = random.Random(0)
+
+        with session_scope() as db:
+            db_quiz = db.get(Quiz, responses[0].id)
+            old_stored_json = outputs[0].model_dump_json(indent=2)
+            results = {
+                "create (build response)": (
+                    timed(lambda: quiz_to_response(db_quiz), args.repeat),
+                    timed(lambda: build_quiz_response(db_quiz, outputs[0]), args.repeat),
+                ),
+                "create (serialize for storage)": (
+                    timed(lambda: outputs[0].model_dump_json(indent=2), args.repeat),
+                    timed(lambda: (outputs[0].model_dump_json(), responses[0].model_dump_json()), args.repeat),
+                ),
+            }
+
+        def old_read():
+            with session_scope() as db:
+                quiz_id = rng.choice(responses).id
+                return quiz_to_response(db.query(Quiz).filter(Quiz.id == quiz_id).first()).model_dump_json()
+
+        def new_read():
+            with session_scope() as db:
+                return load_quiz_response_json(db, rng.choice(responses).id)
+
+        results["read /quiz/{id}"] = (timed(old_read, args.repeat), timed(new_read, args.repeat))
+
+        def old_hard_questions():
+            return (
+                question
+                for (full_quiz_data,) in db.query(Quiz.full_quiz_data).order_by(Quiz.id.desc())
+                for question in json.loads(full_quiz_data)["quiz"]
+                if question["difficulty"] == "hard"
+            )
+
+        filter_repeat = max(1, args.repeat // 20)
+        with session_scope() as db:
+            results["count hard questions"] = (
+                timed(lambda: sum(1 for _ in old_hard_questions()), filter_repeat),
+                timed(lambda: db.query(func.count(QuizQuestionRow.id)).filter(QuizQuestionRow.difficulty == "hard").scalar(), filter_repeat),
+            )
+            results["first 50 hard questions"] = (
+                timed(lambda: list(itertools.islice(old_hard_questions(), 50)), filter_repeat),
+                timed(lambda: db.query(QuizQuestionRow).filter(QuizQuestionRow.difficulty == "hard")
+                      .order_by(QuizQuestionRow.id.desc()).limit(50).all(), filter_repeat),
+            )
+
+    print(f"Stored JSON per quiz: {len(old_stored_json)} bytes before (indented), "
+          f"{len(outputs[0].model_dump_json())} + {len(responses[0].model_dump_json())} bytes after (compact output + response)")
+    for label, (before, after) in results.items():
+        print(f"{label:>36}: {before:9.1f} us -> {after:9.1f} us ({before / after:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark for the Wikipedia HTML cleaning engine in `scraper.py`.
+
+Reports the best-of-N and median time to parse and clean each synthetic
+article page, for every available parser backend.
+
+Usage (from the backend directory):
+    python benchmarks/bench_scraper.py --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scraper
+from fixtures import fixture_pages
+
+
+def available_parsers() -> list:
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        pass
+    return parsers
+
+
+def time_parse(html: str, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scraper.parse_wikipedia_html(html)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = fixture_pages()
+    for html_parser in available_parsers():
+        scraper.HTML_PARSER = html_parser
+        for size, html in pages.items():
+            timings = time_parse(html, args.repeat)
+            text_length = len(scraper.parse_wikipedia_html(html)["clean_text"])
+            print(
+                f"{html_parser:>11} {size:>6}: {len(html) // 1024:>4} KB html -> {text_length // 1024:>3} KB text, "
+                f"best {min(timings) * 1000:7.1f} ms, median {statistics.median(timings) * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Time-to-first-content benchmark: blocking generation vs. streamed generation.
+
+Generates quizzes through the real service pipeline against a temporary
+SQLite database, with a synthetic article standing in for the Wikipedia fetch
+and `FakeQuizChatModel` (streaming its output token by token) standing in for
+Gemini. Reports when the client first sees the title/summary and the first
+question with `stream_quiz_for_url` (what /generate_quiz/stream sends),
+against the single response of `generate_quiz_for_url`.
+
+Usage (from the backend directory):
+    python benchmarks/bench_streaming.py --runs 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import llm_quiz_generator
+import quiz_service
+import scraper
+from fake_llm import FakeQuizChatModel
+from fixtures import build_article_html
+
+ARTICLE = scraper.parse_wikipedia_html(build_article_html("Streaming Benchmark", 12, seed=12))
+
+
+async def fake_scrape(url: str) -> dict:
+    return dict(ARTICLE, title=url.rsplit("/", 1)[-1].replace("_", " "))
+
+
+async def blocking_run(url: str) -> dict:
+    start = time.perf_counter()
+    await quiz_service.generate_quiz_for_url(url, force_refresh=True)
+    elapsed = time.perf_counter() - start
+    return {"meta": elapsed, "first_question": elapsed, "complete": elapsed}
+
+
+async def streaming_run(url: str) -> dict:
+    start = time.perf_counter()
+    timings = {}
+    async for event, data in quiz_service.stream_quiz_for_url(url, force_refresh=True):
+        if event == "error":
+            raise data
+        if event == "meta":
+            timings["meta"] = time.perf_counter() - start
+        elif event == "question":
+            timings.setdefault("first_question", time.perf_counter() - start)
+        elif event == "quiz":
+            timings["complete"] = time.perf_counter() - start
+    return timings
+
+
+async def run(runs: int) -> None:
+    for label, strategy in (("blocking", blocking_run), ("streaming", streaming_run)):
+        results = [await strategy(f"https://en.wikipedia.org/wiki/{label}_{i}") for i in range(runs)]
+        summary = ", ".join(
+            f"{key} {statistics.median(result[key] for result in results):5.2f} s"
+            for key in ("meta", "first_question", "complete")
+        )
+        print(f"{label:>9}: {summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--base-latency", type=float, default=1.0)
+    parser.add_argument("--output-token-latency", type=float, default=0.012)
+    args = parser.parse_args()
+
+    llm_quiz_generator.set_llm(FakeQuizChatModel(
+        base_latency=args.base_latency,
+        output_token_latency=args.output_token_latency,
+    ))
+    scraper.scrape_wikipedia_async = fake_scrape
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.set_engine(database.build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        database.create_db_tables()
+        asyncio.run(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Deterministic stand-in for the Gemini chat model, for offline benchmarks.
+
+`FakeQuizChatModel` answers every quiz prompt in this repo with valid JSON
+(a full quiz, an article overview, or a list of candidate questions, depending
+on the prompt) built from the article text it was given. Latency is simulated
+as a fixed base plus a per-token cost for the prompt (time to first token) and
+for the output, which is streamed in small pieces when requested, and
+every call is counted, so benchmarks can compare how many tokens and how much
+wall time each generation strategy costs.
+
+Faults can be injected, drawn from a seeded generator: a fraction of calls can
+be slow (a latency tail), fail with a 429 like a provider over its quota, or
+answer with truncated JSON, and calls beyond `max_concurrency` in flight are
+rejected with a 429.
+
+Install it with `llm_quiz_generator.set_llm(FakeQuizChatModel(...))`, or as a
+provider of an `llm_router.LLMRouter` installed with `set_router`.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+CHARS_PER_TOKEN = 4
+# Output tokens per streamed chunk
+STREAM_CHUNK_TOKENS = 8
+
+_DIFFICULTIES = ("easy", "medium", "hard")
+_QUESTION_COUNT = re.compile(r'Generate exactly (\d+)')
+_TITLE = re.compile(r'Article Title: (.*)')
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]{3,}")
+
+
+def _tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class FakeRateLimitError(Exception):
+    """Raised like a provider's quota error (HTTP 429)."""
+    status_code = 429
+
+
+class FakeQuizChatModel(BaseChatModel):
+    # Simulated latency: base_latency + prompt tokens * input_token_latency + output tokens * output_token_latency
+    base_latency: float = 0.5
+    input_token_latency: float = 0.00002
+    output_token_latency: float = 0.01
+    # Injected faults: the fraction of calls that are `slow_factor` times slower,
+    # that fail with a 429, and that answer with truncated JSON
+    slow_rate: float = 0.0
+    slow_factor: float = 10.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    # Calls beyond this many in flight are rejected with a 429 (0 for no quota)
+    max_concurrency: int = 0
+    fault_seed: int = 0
+    # Call accounting, reset with `reset_usage`
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    rate_limited: int = 0
+    malformed: int = 0
+    in_flight: int = 0
+
+    _faults: random.Random = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-quiz"
+
+    def reset_usage(self) -> None:
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.rate_limited = 0
+        self.malformed = 0
+
+    def _fault(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        if self._faults is None:
+            self._faults = random.Random(self.fault_seed)
+        return self._faults.random() < rate
+
+    @contextmanager
+    def _call_slot(self) -> Iterator[None]:
+        """Counts the call as in flight, rejecting it with a 429 when over quota or by chance."""
+        if (self.max_concurrency and self.in_flight >= self.max_concurrency) or self._fault(self.rate_limit_rate):
+            self.rate_limited += 1
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED: quota exceeded (fake)")
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def _respond(self, messages: List[BaseMessage]) -> Tuple[str, float, float]:
+        """Returns the response, the delay before its first token and the delay per output token."""
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = self._build_response(prompt)
+        if self._fault(self.malformed_rate):
+            self.malformed += 1
+            content = content[:len(content) // 2]
+        input_tokens, output_tokens = _tokens(prompt), _tokens(content)
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        slowdown = self.slow_factor if self._fault(self.slow_rate) else 1.0
+        return (content, (self.base_latency + input_tokens * self.input_token_latency) * slowdown,
+                self.output_token_latency * slowdown)
+
+    @staticmethod
+    def _pieces(content: str) -> List[str]:
+        size = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+        return [content[i:i + size] for i in range(0, len(content), size)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        with self._call_slot():
+            content, delay, token_latency = self._respond(messages)
+            time.sleep(delay + _tokens(content) * token_latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        with self._call_slot():
+            content, delay, token_latency = self._respond(messages)
+            await asyncio.sleep(delay + _tokens(content) * token_latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        with self._call_slot():
+            content, delay, token_latency = self._respond(messages)
+            time.sleep(delay)
+            for piece in self._pieces(content):
+                time.sleep(_tokens(piece) * token_latency)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        with self._call_slot():
+            content, delay, token_latency = self._respond(messages)
+            await asyncio.sleep(delay)
+            for piece in self._pieces(content):
+                await asyncio.sleep(_tokens(piece) * token_latency)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    # --- Response construction ---
+
+    @staticmethod
+    def _section(prompt: str, start: str, end: str) -> str:
+        begin = prompt.find(start)
+        if begin < 0:
+            return ""
+        begin = prompt.find("\n", begin) + 1
+        finish = prompt.find(end, begin)
+        return prompt[begin:finish if finish >= 0 else None].strip()
+
+    @staticmethod
+    def _questions(article_text: str, count: int, rng: random.Random) -> list:
+        words = _WORD.findall(article_text) or ["article", "topic", "history", "science"]
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', article_text) if len(s) > 20] or [article_text[:80]]
+        questions = []
+        for index in range(count):
+            sentence = rng.choice(sentences)[:120]
+            options = []
+            while len(options) < 4:
+                word = rng.choice(words) if len(set(words)) >= 4 else f"{rng.choice(words)}{len(options)}"
+                if word not in options:
+                    options.append(word)
+            questions.append({
+                "question": f"({rng.randrange(10 ** 6)}) Which term best relates to: \"{sentence}\"?",
+                "options": options,
+                "answer": options[rng.randrange(4)],
+                "explanation": f"The article states: {sentence}",
+                "difficulty": _DIFFICULTIES[(index + rng.randrange(3)) % 3],
+            })
+        return questions
+
+    def _overview(self, title: str, article_text: str, rng: random.Random) -> dict:
+        words = sorted(set(_WORD.findall(article_text))) or ["Topic"]
+        return {
+            "title": title,
+            "summary": " ".join(re.split(r'(?<=[.!?])\s+', article_text)[:3])[:400],
+            "key_entities": {
+                "people": rng.sample(words, min(2, len(words))),
+                "organizations": rng.sample(words, min(2, len(words))),
+                "locations": rng.sample(words, min(2, len(words))),
+            },
+            "sections": rng.sample(words, min(4, len(words))),
+            "related_topics": rng.sample(words, min(4, len(words))),
+        }
+
+    def _build_response(self, prompt: str) -> str:
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+        title_match = _TITLE.search(prompt)
+        title = title_match.group(1).strip() if title_match else "Article"
+        count_match = _QUESTION_COUNT.search(prompt)
+        count = int(count_match.group(1)) if count_match else 5
+
+        if "Article Part (" in prompt:
+            text = self._section(prompt, "Article Part (", "---")
+            return json.dumps({"questions": self._questions(text, count, rng)})
+        if "Article Introduction:" in prompt:
+            text = self._section(prompt, "Article Introduction:", "---")
+            return json.dumps(self._overview(title, text, rng))
+        text = self._section(prompt, "Article Content:", "---")
+        overview = self._overview(title, text, rng)
+        related_topics = overview.pop("related_topics")
+        # Same field order as the quiz schema, as the real model produces it
+        return json.dumps({**overview, "quiz": self._questions(text, count, rng), "related_topics": related_topics})
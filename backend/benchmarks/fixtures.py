@@ -0,0 +1,133 @@
+"""
+Synthetic Wikipedia article pages for offline benchmarks.
+
+The generated HTML follows the structure of a rendered Wikipedia page (skin,
+navigation, `#mw-content-text > .mw-parser-output`, infoboxes, hatnotes,
+reference markers, pronunciation guides and trailing "See also"/"References"
+sections), so it exercises every cleaning rule in `scraper.py`.
+"""
+import random
+
+ARTICLE_SIZES = {
+    "small": 4,
+    "medium": 20,
+    "large": 80,
+}
+
+_WORDS = (
+    "the mathematician worked on computation theory during war at Bletchley Park "
+    "where machines were designed to break ciphers and later proposed tests of "
+    "machine intelligence that influenced computer science philosophy biology "
+    "British government university Cambridge Manchester Princeton logic algorithm"
+).split()
+
+_SKIN_HEADER = """<!DOCTYPE html>
+<html class="client-nojs" lang="en" dir="ltr">
+<head>
+<meta charset="UTF-8">
+<title>{title} - Wikipedia</title>
+<script>document.documentElement.className="client-js";</script>
+<style>.mw-body{{margin:0}}</style>
+</head>
+<body class="skin-vector mediawiki ltr">
+<a class="mw-jump-link" href="#bodyContent">Jump to content</a>
+<div class="vector-header-container"><header class="vector-header">
+<nav id="p-navigation"><ul>{nav_items}</ul></nav>
+<div id="p-search"><form action="/w/index.php"><input name="search" placeholder="Search Wikipedia"></form></div>
+</header></div>
+<div class="mw-page-container"><div class="vector-sidebar"><ul>{nav_items}</ul></div>
+<main id="content" class="mw-body">
+<div class="mw-indicators"><div class="mw-indicator">Protected</div></div>
+<h1 id="firstHeading" class="firstHeading mw-first-heading"><span class="mw-page-title-main">{title}</span></h1>
+<div id="bodyContent" class="vector-body">
+<div id="siteSub" class="noprint">From Wikipedia, the free encyclopedia</div>
+<div id="mw-content-text" class="mw-body-content"><div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">
+"""
+
+_SKIN_FOOTER = """
+<div class="printfooter">Retrieved from "https://en.wikipedia.org/wiki/{slug}"</div>
+</div></div></div>
+<div id="catlinks" class="catlinks"><ul>{nav_items}</ul></div>
+</main></div>
+<footer id="footer"><ul>{nav_items}</ul></footer>
+<script>(RLQ=window.RLQ||[]).push(function(){{mw.config.set({{"wgTitle":"{title}"}});}});</script>
+</body>
+</html>
+"""
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, ref_counter: list) -> str:
+    parts = []
+    for _ in range(rng.randint(3, 6)):
+        parts.append(_sentence(rng, rng.randint(8, 20)))
+        if rng.random() < 0.5:
+            ref_counter[0] += 1
+            parts.append(f'<sup id="cite_ref-{ref_counter[0]}" class="reference"><a href="#cite_note-{ref_counter[0]}">[{ref_counter[0]}]</a></sup>')
+        if rng.random() < 0.1:
+            parts.append('<span class="nowrap">23 June 1912</span>')
+        if rng.random() < 0.1:
+            parts.append('<a href="/wiki/Cipher" title="Cipher"><b>cipher</b></a> systems')
+    return "<p>" + " ".join(parts) + "</p>\n"
+
+
+def build_article_html(title: str = "Alan Turing", sections: int = 20, seed: int = 0) -> str:
+    """Builds a full rendered-page HTML document with the given number of body sections."""
+    rng = random.Random(seed)
+    slug = title.replace(" ", "_")
+    nav_items = "".join(f'<li><a href="/wiki/Page_{i}">Navigation link {i}</a></li>' for i in range(60))
+    ref_counter = [0]
+
+    body = [_SKIN_HEADER.format(title=title, nav_items=nav_items)]
+    body.append('<div role="note" class="hatnote navigation-not-searchable">This article is about the British mathematician. For other uses, see <a href="/wiki/Disambiguation">Disambiguation</a>.</div>\n')
+    body.append('<table class="infobox biography vcard"><tbody><tr><th>Born</th><td>23 June 1912<br>Maida Vale, London</td></tr><tr><th>Known for</th><td>Cryptanalysis</td></tr></tbody></table>\n')
+    body.append('<div class="ambox box-Multiple_issues"><p>This article has multiple issues.</p></div>\n')
+    body.append(
+        f'<p><b>{title}</b> <span class="rt-commentedText nowrap"><span class="IPA nopopups noexcerpt">'
+        '<a href="/wiki/Help:IPA">/ˈtjʊərɪŋ/</a></span></span> (<small>listen</small>) '
+        '(23 June 1912 – 7 June 1954) was an English mathematician ( /ˈtjʊərɪŋ/ ) and computer scientist '
+        '[ˈtjʊə] whose work <span class="respell">TURE-ing</span> founded theoretical computer science.'
+        '<sup class="reference"><a href="#cite_note-0">[0]</a></sup></p>\n'
+    )
+    body.append("<!-- NewPP limit report: cached time -->\n")
+
+    for index in range(sections):
+        heading = f"Section {index + 1}"
+        body.append(f'<div class="mw-heading mw-heading2"><h2 id="Section_{index + 1}"><span class="mw-headline">{heading}</span></h2></div>\n')
+        if index % 3 == 0:
+            body.append('<div class="thumb tright"><div class="thumbinner"><img src="x.jpg"><div class="thumbcaption">A caption</div></div></div>\n')
+        for _ in range(rng.randint(2, 5)):
+            body.append(_paragraph(rng, ref_counter))
+        if index % 4 == 1:
+            body.append(f'<h3><span class="mw-headline">Subsection {index + 1}.1</span></h3>\n')
+            body.append(_paragraph(rng, ref_counter))
+            body.append("<ul>" + "".join(f"<li>{_sentence(rng, 6)}</li>" for _ in range(4)) + "</ul>\n")
+        if index % 5 == 2:
+            body.append('<dl><dt>Term</dt><dd>Definition list content</dd></dl>\n')
+            body.append('<table class="wikitable"><tr><td>Data</td><td>42</td></tr></table>\n')
+        if index % 7 == 3:
+            body.append('<div class="navbox"><div>Navbox links <a href="/wiki/X">X</a></div></div>\n')
+
+    # Legacy-style trailing sections, removed by the heading rule
+    for trailing in ("See also", "References", "External links"):
+        body.append(f'<h2><span class="mw-headline" id="{trailing.replace(" ", "_")}">{trailing}</span></h2>\n')
+        body.append('<ul><li><a href="/wiki/Related">Related article</a></li></ul>\n')
+        if trailing == "References":
+            body.append('<div class="reflist"><ol class="references">' + "".join(
+                f'<li id="cite_note-{i}"><span class="reference-text">Reference {i} text.</span></li>'
+                for i in range(ref_counter[0] + 1)
+            ) + "</ol></div>\n")
+
+    body.append('<div class="navbox vertical-navbox"><table><tr><td>Footer navbox</td></tr></table></div>\n')
+    body.append(_SKIN_FOOTER.format(title=title, slug=slug, nav_items=nav_items))
+    return "".join(body)
+
+
+def fixture_pages() -> dict:
+    """Returns {size_name: html} for every entry in ARTICLE_SIZES."""
+    return {size: build_article_html(f"Benchmark Article {size.title()}", sections, seed=sections)
+            for size, sections in ARTICLE_SIZES.items()}
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Any
+from urllib.parse import urlparse, unquote, quote
+
+from sqlalchemy.orm import Session
+
+from database import Quiz
+
+# --- Cache Configuration ---
+# How long a generated quiz is served for its article before a new one is generated
+QUIZ_CACHE_TTL_SECONDS = int(os.getenv("QUIZ_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Upper bound on the number of quizzes held in the in-process LRU tier
+QUIZ_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", "512"))
+
+
+def normalize_article_url(url: str) -> str:
+    """
+    Normalizes a Wikipedia article URL to a canonical form so that different
+    spellings of the same article (mobile host, spaces vs underscores, lowercase
+    first letter, fragments, query strings) share one cache key.
+    """
+    parsed_url = urlparse(url)
+    host = parsed_url.netloc.lower().replace(".m.wikipedia.org", ".wikipedia.org")
+
+    if not parsed_url.path.startswith("/wiki/"):
+        # Not a standard article path; only strip the fragment
+        return parsed_url._replace(netloc=host, fragment="").geturl()
+
+    title = unquote(parsed_url.path[len("/wiki/"):]).replace(" ", "_").strip("_")
+    if title:
+        # MediaWiki treats the first letter of a title as case-insensitive
+        title = title[0].upper() + title[1:]
+    return f"https://{host}/wiki/{quote(title, safe=':/_(),!$&*+;=@~.-')}"
+
+
+def article_url_for_title(url: str, title: str) -> str:
+    """Builds the canonical article URL for a page title on the same wiki as `url`."""
+    host = urlparse(url).netloc
+    return normalize_article_url(f"https://{host}/wiki/{title}")
+
+
+class QuizCache:
+    """
+    Bounded, thread-safe LRU cache of generated quiz responses keyed on the
+    normalized article URL. Entries expire QUIZ_CACHE_TTL_SECONDS after the
+    quiz was generated.
+    """
+
+    def __init__(self, max_entries: int = QUIZ_CACHE_MAX_ENTRIES, ttl_seconds: int = QUIZ_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any, generated_at: Optional[datetime] = None) -> None:
+        generated_ts = generated_at.timestamp() if generated_at else time.time()
+        expires_at = generated_ts + self.ttl_seconds
+        if expires_at <= time.time() or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def find_cached_quiz(db: Session, cache_key: str, *options, ttl_seconds: int = QUIZ_CACHE_TTL_SECONDS) -> Optional[Quiz]:
+    """
+    Database tier of the cache: returns the most recent quiz stored for the
+    normalized article URL, if it was generated within the TTL. `options` are
+    loader options for the query, e.g. `load_only(...)` of the needed columns.
+    """
+    cutoff = datetime.now() - timedelta(seconds=ttl_seconds)
+    return (
+        db.query(Quiz)
+        .options(*options)
+        .filter(Quiz.url == cache_key, Quiz.date_generated >= cutoff)
+        .order_by(Quiz.date_generated.desc())
+        .first()
+    )
+
+
+# Process-wide cache instance shared by the API endpoints
+quiz_cache = QuizCache()
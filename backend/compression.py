@@ -0,0 +1,39 @@
+import hashlib
+import zlib
+from typing import Optional, Tuple
+
+# zstandard is optional: it compresses article text faster and smaller than zlib,
+# but every row records its codec so either can always be read back.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+
+def content_hash(text: str) -> str:
+    """Returns the SHA-256 hex digest used to deduplicate stored article content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    """Compresses text with the best available codec, returning (codec, data)."""
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_text(codec: str, data: Optional[bytes]) -> Optional[str]:
+    """Decompresses data written by `compress_text` with the given codec."""
+    if data is None:
+        return None
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Article content is zstd-compressed but the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown compression codec: {codec}")
@@ -0,0 +1,177 @@
+"""
+Local extractive condensation of article text before it is sent to the LLM.
+
+A 5-question quiz needs far less than a whole Wikipedia article. Sentences
+are scored with TF-IDF (each sentence is a "document"; a term weighs more the
+more often it occurs in the article and the fewer sentences it occurs in),
+boosted by their density of named entities, numbers and dates and by their
+position at the start of a section. The best sentences are kept, in article
+order under their section headings, until the token budget is reached. Every
+section that fits keeps at least its best sentence so the quiz can still
+cover the whole article.
+"""
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Article text above this many estimated tokens is condensed before the LLM call (0 disables)
+CONDENSE_TOKEN_BUDGET = int(os.getenv("CONDENSE_TOKEN_BUDGET", "4000"))
+# How strongly entity-dense sentences (names, numbers, dates) are preferred
+ENTITY_WEIGHT = float(os.getenv("CONDENSE_ENTITY_WEIGHT", "1.0"))
+
+# Rough characters-per-token ratio for English text, used for all token budgets
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"(])')
+_WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9'’-]*")
+_STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been before being below
+    between both but by can could did do does doing down during each few for from further had has have having
+    he her here hers herself him himself his how i if in into is it its itself just may me might more most must
+    my myself no nor not now of off on once only or other our ours ourselves out over own same she should so
+    some such than that the their theirs them themselves then there these they this those through to too
+    under until up upon very was we were what when where which while who whom why will with within without
+    would you your yours yourself yourselves one two many much however although though since became become
+""".split())
+
+LEAD_SENTENCE_BOOST = 1.5
+SECTION_START_BOOST = 1.2
+# "Sentences" longer than this (text without Latin sentence punctuation, e.g. Chinese or
+# Japanese articles) are split into pieces so they can still be selected
+MAX_SENTENCE_TOKENS = 250
+_PIECE_BREAK = re.compile(r"[。！？；.!?;]\s*|\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in a text without calling a tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _entity_density(words: List[str]) -> float:
+    """Share of words (after the first) that are capitalized or contain digits."""
+    if len(words) < 2:
+        return 0.0
+    entity_words = sum(1 for word in words[1:] if word[0].isupper() or any(ch.isdigit() for ch in word))
+    return entity_words / (len(words) - 1)
+
+
+def _split_sentences(text: str, max_chars: int) -> List[str]:
+    """
+    Splits a section into sentences, cutting any longer than `max_chars` at
+    the last CJK/Latin punctuation or whitespace that fits (or hard, when
+    there is none).
+    """
+    pieces = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        while len(sentence) > max_chars:
+            breaks = [match.end() for match in _PIECE_BREAK.finditer(sentence, 0, max_chars + 1)]
+            cut = breaks[-1] if breaks and breaks[-1] > max_chars // 2 else max_chars
+            pieces.append(sentence[:cut].rstrip())
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def _score_sentences(sentences: List[Dict]) -> None:
+    """Sets a TF-IDF + entity-density score on every sentence entry in place."""
+    document_frequency = Counter()
+    article_frequency = Counter()
+    for sentence in sentences:
+        article_frequency.update(sentence["terms"])
+        document_frequency.update(set(sentence["terms"]))
+
+    count = len(sentences)
+    weights = {
+        term: frequency * (math.log((1 + count) / (1 + document_frequency[term])) + 1)
+        for term, frequency in article_frequency.items()
+    }
+    for sentence in sentences:
+        terms = set(sentence["terms"])
+        if not terms:
+            sentence["score"] = 0.0
+            continue
+        score = sum(weights[term] for term in terms) / math.sqrt(len(terms))
+        score *= 1 + ENTITY_WEIGHT * _entity_density(sentence["words"])
+        if sentence["position"] == 0:
+            score *= LEAD_SENTENCE_BOOST if sentence["section"] == 0 else SECTION_START_BOOST
+        sentence["score"] = score
+
+
+def condense_sections(sections: List[Dict], token_budget: int) -> str:
+    """
+    Condenses [{"heading", "text"}] sections to at most `token_budget`
+    estimated tokens, returning the kept sentences under "## heading" lines.
+    """
+    max_chars = max(1, min(MAX_SENTENCE_TOKENS, token_budget // 2)) * CHARS_PER_TOKEN
+    sentences = []
+    for section_index, section in enumerate(sections):
+        for position, text in enumerate(_split_sentences(section["text"], max_chars)):
+            words = _WORD.findall(text)
+            sentences.append({
+                "section": section_index,
+                "position": position,
+                "text": text,
+                "words": words,
+                "terms": [word.lower() for word in words if word.lower() not in _STOPWORDS and len(word) > 2],
+                "tokens": estimate_tokens(text) + 1,
+            })
+    if not sentences:
+        return ""
+    _score_sentences(sentences)
+
+    heading_tokens = [estimate_tokens(f"## {section['heading']}\n") if section["heading"] else 0 for section in sections]
+    used_sections = set()
+    selected = set()
+    selected_texts = set()
+    remaining = token_budget
+
+    def take(index: int) -> None:
+        nonlocal remaining
+        sentence = sentences[index]
+        if sentence["text"] in selected_texts:
+            return
+        cost = sentence["tokens"] + (0 if sentence["section"] in used_sections else heading_tokens[sentence["section"]] + 1)
+        if cost <= remaining:
+            remaining -= cost
+            selected.add(index)
+            selected_texts.add(sentence["text"])
+            used_sections.add(sentence["section"])
+
+    by_score = sorted(range(len(sentences)), key=lambda i: sentences[i]["score"], reverse=True)
+    # First pass: the best sentence of every section, best sections first, for coverage
+    best_per_section = {}
+    for index in by_score:
+        best_per_section.setdefault(sentences[index]["section"], index)
+    for index in sorted(best_per_section.values(), key=lambda i: sentences[i]["score"], reverse=True):
+        take(index)
+    # Second pass: fill the remaining budget with the best sentences overall
+    for index in by_score:
+        if index not in selected:
+            take(index)
+
+    blocks: Dict[int, List[str]] = {}
+    for index in sorted(selected):
+        blocks.setdefault(sentences[index]["section"], []).append(sentences[index]["text"])
+    parts = []
+    for section_index, texts in blocks.items():
+        heading = sections[section_index]["heading"]
+        body = " ".join(texts)
+        parts.append(f"## {heading}\n{body}" if heading else body)
+    return "\n\n".join(parts)
+
+
+def condense_text(clean_text: str, sections: Optional[List[Dict]] = None,
+                  token_budget: int = CONDENSE_TOKEN_BUDGET) -> str:
+    """
+    Returns the text to send to the LLM: `clean_text` unchanged when it fits
+    the budget (or condensation is disabled), otherwise its condensed form.
+    Never empty for a non-empty article: if no sentence could be selected,
+    the start of `clean_text` is sent instead.
+    """
+    if token_budget <= 0 or estimate_tokens(clean_text) <= token_budget:
+        return clean_text
+    condensed = condense_sections(sections or [{"heading": "", "text": clean_text}], token_budget)
+    return condensed or clean_text[:token_budget * CHARS_PER_TOKEN]
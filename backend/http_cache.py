@@ -0,0 +1,152 @@
+"""
+HTTP caching for the read endpoints (/quiz/{id} and /history).
+
+Serialized responses are kept in a bounded in-process cache together with
+their ETag and pre-compressed variants, so a repeated request costs no
+database query, serialization or compression, and a request whose
+If-None-Match still matches is answered with an empty 304.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# brotli is optional: it compresses JSON smaller than gzip, and clients that
+# do not accept it (or servers without it) get gzip instead.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- HTTP Cache Configuration ---
+# Upper bound on the serialized (and compressed) responses held in memory
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1000"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Quizzes never change once stored
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Browsers keep the response but revalidate it (If-None-Match) before every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class CachedBody:
+    """A serialized JSON response with its ETag and compressed variants."""
+
+    def __init__(self, body: str):
+        self.body = body.encode("utf-8")
+        self.etag_value = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.encoded: Dict[str, bytes] = {}
+        if len(self.body) >= COMPRESS_MIN_BYTES:
+            self.encoded["gzip"] = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Each encoding is its own representation, so it gets its own strong ETag
+        return f'"{self.etag_value}-{encoding}"' if encoding else f'"{self.etag_value}"'
+
+
+def etag_matches(if_none_match: Optional[str], cached: CachedBody) -> bool:
+    """Whether an If-None-Match header matches any representation of the cached body."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        # If-None-Match uses the weak comparison
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag.strip('"').split("-", 1)[0] == cached.etag_value:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: str, cached: CachedBody) -> Optional[str]:
+    """Picks the best available compressed variant the client accepts."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip())
+    for encoding in ("br", "gzip"):
+        if encoding in cached.encoded and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+class ResponseCache:
+    """Bounded, thread-safe LRU cache of serialized responses, limited by total bytes."""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def put(self, key: str, body: str) -> CachedBody:
+        """Caches a serialized response and returns it, ready to send."""
+        cached = CachedBody(body)
+        if cached.size > self.max_bytes:
+            return cached
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = cached
+            self._bytes += cached.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+def cached_response(request: Request, cached: CachedBody, cache_control: str) -> Response:
+    """
+    Sends a cached body: an empty 304 if the client's copy is current, otherwise
+    the best compressed variant the client accepts.
+    """
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), cached)
+    headers = {"ETag": cached.etag(encoding), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), cached):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=cached.encoded[encoding], media_type="application/json", headers=headers)
+
+
+# Process-wide cache instance shared by the read endpoints
+response_cache = ResponseCache()
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+from quiz_service import generate_quiz_for_url
+from metrics import request_id_var, request_scope, log_spans, new_request_id
+
+# --- Job Queue Configuration ---
+# Number of quiz generations processed concurrently by the background workers
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Maximum number of queued (not yet running) jobs before new submissions are rejected
+JOB_QUEUE_MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", "100"))
+# Number of finished jobs kept around so clients can still poll their results
+JOB_HISTORY_MAX = int(os.getenv("JOB_HISTORY_MAX", "1000"))
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has reached JOB_QUEUE_MAX_PENDING queued jobs."""
+
+
+class Job:
+    """A single background quiz generation and its progress."""
+
+    def __init__(self, url: str, force_refresh: bool, priority: int):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.force_refresh = force_refresh
+        self.priority = priority
+        # Id of the request that submitted the job, so its log lines can be correlated
+        self.request_id = request_id_var.get() or new_request_id()
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.stage: Optional[str] = None  # scraping, generating, persisting while running
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+class JobQueue:
+    """
+    In-process priority queue of quiz generation jobs served by a fixed pool of
+    asyncio workers. Higher priority jobs run first; jobs with equal priority run
+    in submission order. Submissions beyond JOB_QUEUE_MAX_PENDING are rejected so
+    bursts apply back-pressure instead of growing memory without bound.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_MAX_PENDING,
+                 history_max: int = JOB_HISTORY_MAX):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history_max = history_max
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._sequence = itertools.count()
+
+    async def start(self) -> None:
+        """Starts the worker tasks on the running event loop."""
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_pending)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancels the worker tasks; queued jobs that have not started are dropped."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, url: str, force_refresh: bool = False, priority: int = 0) -> Job:
+        """Enqueues a generation job and returns it immediately."""
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running.")
+
+        job = Job(url, force_refresh, priority)
+        try:
+            self._queue.put_nowait((-priority, next(self._sequence), job))
+        except asyncio.QueueFull:
+            raise QueueFullError("Too many quiz generations are queued. Please retry later.")
+
+        self._jobs[job.id] = job
+        self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    def _evict_finished(self) -> None:
+        """Drops the oldest finished jobs once more than history_max jobs are tracked."""
+        excess = len(self._jobs) - self.history_max
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = datetime.now()
+
+        def report_progress(stage: str) -> None:
+            job.stage = stage
+
+        with request_scope(job.request_id) as spans:
+            try:
+                job.result = await generate_quiz_for_url(job.url, force_refresh=job.force_refresh, progress=report_progress)
+                job.status = "completed"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Job was cancelled."
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.stage = None
+                job.finished_at = datetime.now()
+                if spans:
+                    log_spans(job.request_id, spans, job_id=job.id, status=job.status,
+                              seconds=round((job.finished_at - job.started_at).total_seconds(), 4))
+
+
+# Process-wide job queue, started and stopped by the application lifespan
+job_queue = JobQueue()
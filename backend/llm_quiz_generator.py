@@ -1,19 +1,20 @@
+import json
 import os
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
-from langchain_core.runnables import RunnableSequence
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
+
+from condenser import estimate_tokens
+from metrics import span, record_tokens
+from llm_router import LLMProvider, LLMRouter, LLM_MODEL, LLM_HEDGE_MODEL, LLM_HEDGE_AFTER_SECONDS, record_usage
+
+# LangChain and the Gemini client are slow to import, so they are only loaded
+# (and the model and chains built) on the first generation, not at startup.
 
 # Load environment variables from .env file
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in environment variables. Please set it in your .env file.")
-
 # Pydantic schema for the quiz output, mirroring the *exact* sample API structure
 # This schema is used by LangChain's JsonOutputParser
 class LLMQuizQuestion(BaseModel):
@@ -31,17 +32,9 @@ class LLMFullQuizOutput(BaseModel):
     quiz: List[LLMQuizQuestion] = Field(description="A list of exactly 5 multiple-choice quiz questions.")
     related_topics: List[str] = Field(description="A list of 3-5 suggested related Wikipedia topics for further reading.")
 
-# Initialize the Gemini LLM
-# Using gemini-pro for text generation tasks
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-pro", google_api_key=GEMINI_API_KEY, temperature=0.7)
-
-# Define the output parser based on our Pydantic schema
-parser = JsonOutputParser(pydantic_object=LLMFullQuizOutput)
-
-# Define the prompt template
+# Prompt for the full quiz
 # This prompt provides detailed instructions to the LLM on content and strict JSON formatting.
-prompt_template = PromptTemplate(
-    template="""
+QUIZ_PROMPT = """
     You are an expert quiz generator. Your task is to analyze the provided Wikipedia article content
     and generate a structured JSON output strictly following the specified schema.
 
@@ -61,13 +54,119 @@ prompt_template = PromptTemplate(
     5.  **Related Topics:** Suggest 3-5 relevant Wikipedia topics for further reading.
 
     Ensure your output is valid JSON and strictly adheres to the schema.
-    """,
-    input_variables=["article_title", "article_content"],
-    partial_variables={"format_instructions": parser.get_format_instructions()},
-)
+    """
+
+_llm = None
+_hedge_llm = None
+# Prompt -> LLM -> Parser chains by name, built on first use for the current LLM
+_chains: Dict[str, object] = {}
+_router = None
+
+
+def _gemini(model_name: str):
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in environment variables. Please set it in your .env file.")
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # Retries are left to the router: the client's own retries of 429s sleep without yielding the event loop
+    return ChatGoogleGenerativeAI(model=model_name, google_api_key=GEMINI_API_KEY, temperature=0.7, max_retries=1)
+
+
+def get_llm():
+    """Returns the chat model used by every quiz chain, creating the Gemini client on first use."""
+    global _llm
+    if _llm is None:
+        # Initialize the Gemini LLM
+        _llm = _gemini(LLM_MODEL)
+    return _llm
+
+
+def get_hedge_llm():
+    """Returns the faster Gemini model that slow calls are hedged to, creating it on first use."""
+    global _hedge_llm
+    if _hedge_llm is None:
+        _hedge_llm = _gemini(LLM_HEDGE_MODEL)
+    return _hedge_llm
 
-# Create the LangChain sequence (chain): Prompt -> LLM -> Parser
-quiz_generation_chain: RunnableSequence = prompt_template | llm | parser
+
+def get_router() -> LLMRouter:
+    """Returns the router every prompt is sent through, hedging to LLM_HEDGE_MODEL if enabled."""
+    global _router
+    if _router is None:
+        hedge = LLMProvider(LLM_HEDGE_MODEL, get_hedge_llm) if LLM_HEDGE_AFTER_SECONDS > 0 else None
+        _router = LLMRouter(LLMProvider(LLM_MODEL, get_llm), hedge)
+    return _router
+
+
+def set_llm(chat_model) -> None:
+    """
+    Replaces the chat model used by every quiz chain, e.g. with a local fake
+    model for benchmarks. Calls are no longer hedged.
+    """
+    global _llm, _router
+    _llm = chat_model
+    _chains.clear()
+    _router = LLMRouter(LLMProvider(getattr(chat_model, "_llm_type", "custom"), get_llm))
+
+
+def set_router(router: LLMRouter) -> None:
+    """
+    Replaces the router, e.g. with one whose providers are local fakes that
+    inject latency and errors. Streamed quizzes use the chains' model (`set_llm`).
+    """
+    global _router
+    _router = router
+
+
+def get_chain(name: str, template: str, schema: type):
+    """
+    Returns the cached LangChain sequence (chain) Prompt -> LLM -> JSON parser
+    for a prompt template whose output follows `schema`, building it on first use.
+    The template receives the parser's {format_instructions}.
+    """
+    chain = _chains.get(name)
+    if chain is None:
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.prompts import PromptTemplate
+
+        # Define the output parser based on the Pydantic schema
+        parser = JsonOutputParser(pydantic_object=schema)
+        prompt_template = PromptTemplate.from_template(
+            template, partial_variables={"format_instructions": parser.get_format_instructions()}
+        )
+        chain = _chains[name] = prompt_template | get_llm() | parser
+    return chain
+
+
+def get_quiz_chain():
+    """Returns the chain that generates a full quiz from an article."""
+    return get_chain("quiz", QUIZ_PROMPT, LLMFullQuizOutput)
+
+
+def invoke_chain(prompt_name: str, chain, inputs: Dict) -> Dict:
+    """
+    Runs a chain from `get_chain` step by step, so the LLM call and the parsing
+    of its JSON output are timed separately, and counts its tokens. Calls the
+    chain's model directly, without the router's deadline, retries and hedging.
+    """
+    prompt, llm, parser = chain.steps
+    prompt_value = prompt.invoke(inputs)
+    with span("llm.call"):
+        message = llm.invoke(prompt_value)
+    record_usage(prompt_name, prompt_value, message)
+    with span("llm.parse"):
+        return parser.invoke(message)
+
+
+async def ainvoke_chain(prompt_name: str, chain, inputs: Dict) -> Dict:
+    """
+    Async counterpart of `invoke_chain`. The formatted prompt is sent through
+    the router (`get_router`), which applies the deadline, retries, hedging and
+    concurrency limit.
+    """
+    prompt, _, parser = chain.steps
+    prompt_value = await prompt.ainvoke(inputs)
+    return await get_router().ainvoke(prompt_name, prompt_value, parser)
 
 def generate_quiz_from_text(title: str, text_content: str) -> Dict:
     """
@@ -75,13 +174,49 @@ def generate_quiz_from_text(title: str, text_content: str) -> Dict:
     """
     try:
         # Invoke the chain to get the structured quiz output
-        quiz_data = quiz_generation_chain.invoke(
-            {"article_title": title, "article_content": text_content}
+        quiz_data = invoke_chain(
+            "quiz", get_quiz_chain(), {"article_title": title, "article_content": text_content}
+        )
+        return quiz_data
+    except Exception as e:
+        raise RuntimeError(f"Error generating quiz with LLM: {e}")
+
+async def agenerate_quiz_from_text(title: str, text_content: str) -> Dict:
+    """
+    Async counterpart of `generate_quiz_from_text`, awaiting the LLM call
+    instead of blocking the event loop.
+    """
+    try:
+        quiz_data = await ainvoke_chain(
+            "quiz", get_quiz_chain(), {"article_title": title, "article_content": text_content}
         )
         return quiz_data
     except Exception as e:
         raise RuntimeError(f"Error generating quiz with LLM: {e}")
 
+async def astream_quiz_from_text(title: str, text_content: str) -> AsyncIterator[Dict]:
+    """
+    Streams the quiz as the LLM produces it, yielding progressively more
+    complete partial outputs (the last one is the full quiz).
+    """
+    inputs = {"article_title": title, "article_content": text_content}
+    partial_output: Dict = {}
+    router = get_router()
+    try:
+        # Parsing is interleaved with the stream, so the whole stream is one stage.
+        # A partly streamed quiz cannot be retried or hedged, but it has the deadline and concurrency limit.
+        async with router.slot():
+            with span("llm.stream"):
+                async for partial_output in router.within_deadline(get_quiz_chain().astream(inputs)):
+                    yield partial_output
+                # A truncated or malformed stream still parses, so the full quiz is checked against the schema
+                LLMFullQuizOutput.model_validate(partial_output)
+    except Exception as e:
+        raise RuntimeError(f"Error generating quiz with LLM: {e}")
+    # The parsed chunks carry no usage metadata, so the streamed tokens are estimated
+    record_tokens("quiz", estimate_tokens(QUIZ_PROMPT.format(format_instructions="", **inputs)),
+                  estimate_tokens(json.dumps(partial_output)))
+
 # Example usage (for testing)
 if __name__ == "__main__":
     print("Testing LLM quiz generation with updated schema (this might take a moment)...")
@@ -102,7 +237,6 @@ if __name__ == "__main__":
     try:
         generated_quiz = generate_quiz_from_text(sample_title, sample_content)
         print("\n--- Generated Quiz Sample (matching API structure) ---")
-        import json
         print(json.dumps(generated_quiz, indent=2))
     except RuntimeError as e:
         print(f"Test failed: {e}")
\ No newline at end of file
@@ -0,0 +1,335 @@
+"""
+Routing of LLM calls to chat model providers.
+
+Every prompt sent by the quiz chains goes through `LLMRouter.ainvoke`, which
+  - gives the call a deadline (LLM_TIMEOUT_SECONDS, covering retries),
+  - retries rate-limited (429) calls and outputs that are not valid JSON,
+    after an exponential backoff with full jitter,
+  - optionally hedges: if the primary model has not answered after
+    LLM_HEDGE_AFTER_SECONDS, the same prompt is also sent to a faster fallback
+    model and the first valid answer wins,
+  - admits calls to each provider through an AIMD concurrency limiter, whose
+    limit grows by one per round of successful calls and halves when the
+    provider rate-limits or times out, so we settle just under its quota.
+
+Providers are plain LangChain chat models, so local fakes that inject latency
+and errors can stand in for Gemini (see benchmarks/fake_llm.py).
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from condenser import estimate_tokens
+from metrics import registry, span, record_tokens
+
+# --- LLM Router Configuration ---
+# Primary model, and the faster model that hedged requests are sent to
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-pro")
+LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", "gemini-2.5-flash")
+# Seconds without an answer from the primary model before hedging (0 disables hedging)
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# Deadline of one prompt, including its retries
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+# Attempts per prompt for rate-limited calls and malformed outputs
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "20.0"))
+# Bounds of each provider's adaptive concurrency limit, and where it starts
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+# The limit is decreased at most once per this many seconds, so one burst of 429s counts once
+LLM_DECREASE_INTERVAL_SECONDS = 1.0
+
+llm_retries = registry.counter(
+    "quiz_llm_retries_total", "LLM calls retried, by reason.", ["reason"]
+)
+llm_hedges = registry.counter(
+    "quiz_llm_hedges_total", "Hedged LLM requests sent, by the provider whose answer was used.", ["winner"]
+)
+
+
+class RetryableLLMError(Exception):
+    """An LLM call that failed in a way worth retrying ("rate_limited" or "malformed_output")."""
+
+    def __init__(self, reason: str, error: BaseException):
+        super().__init__(f"{reason}: {error}")
+        self.reason = reason
+        self.error = error
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an exception (or one it was raised from) is a provider's 429 / quota error."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        # google.api_core errors carry `code`, HTTP client errors `status_code`
+        if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+            return True
+        if "RESOURCE_EXHAUSTED" in str(error) or "ResourceExhausted" in type(error).__name__:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class AIMDLimiter:
+    """
+    Concurrency limiter with an additive-increase / multiplicative-decrease limit.
+
+    Thread-safe and not bound to an event loop, so a process-wide instance works
+    from the app's loop and from scripts that call `asyncio.run` repeatedly.
+    """
+
+    def __init__(self, initial: int = LLM_INITIAL_CONCURRENCY, minimum: int = LLM_MIN_CONCURRENCY,
+                 maximum: int = LLM_MAX_CONCURRENCY, decrease_factor: float = 0.5,
+                 decrease_interval: float = LLM_DECREASE_INTERVAL_SECONDS):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            # A slot granted just before the cancellation is handed back (by `_grant` if it has not run yet)
+            if granted and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+
+    def on_success(self) -> None:
+        """Additive increase: about one more slot per `limit` successful calls."""
+        with self._lock:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_overload(self) -> None:
+        """Multiplicative decrease, after a rate limit or timeout."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_interval:
+                self._last_decrease = now
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+    def _wake(self) -> None:
+        # Called with the lock held
+        while self._waiters and self.in_flight < int(self.limit):
+            loop, future = self._waiters.popleft()
+            self.in_flight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"limit": int(self.limit), "in_flight": self.in_flight, "waiting": len(self._waiters)}
+
+
+class LLMProvider:
+    """A chat model, created on first use, behind its own concurrency limiter."""
+
+    def __init__(self, name: str, model_factory: Callable[[], object], limiter: Optional[AIMDLimiter] = None):
+        self.name = name
+        self._model_factory = model_factory
+        self.limiter = limiter or AIMDLimiter()
+
+    @property
+    def model(self):
+        return self._model_factory()
+
+
+def record_usage(prompt_name: str, prompt_value, message) -> None:
+    """Counts the tokens of one LLM call, as reported by the model or else estimated."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        record_tokens(prompt_name, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+    else:
+        record_tokens(prompt_name, estimate_tokens(prompt_value.to_string()), estimate_tokens(str(message.content)))
+
+
+class LLMRouter:
+    """Sends prompts to the primary provider (and, when hedging, the fallback) under a deadline, with retries."""
+
+    def __init__(self, primary: LLMProvider, fallback: Optional[LLMProvider] = None,
+                 timeout: float = LLM_TIMEOUT_SECONDS, max_attempts: int = LLM_MAX_ATTEMPTS,
+                 hedge_after: float = LLM_HEDGE_AFTER_SECONDS, retry_base_delay: float = LLM_RETRY_BASE_DELAY,
+                 retry_max_delay: float = LLM_RETRY_MAX_DELAY):
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.hedge_after = hedge_after
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+    @property
+    def providers(self) -> List[LLMProvider]:
+        return [self.primary] + ([self.fallback] if self.fallback is not None else [])
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (from 1)."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+
+    async def ainvoke(self, prompt_name: str, prompt_value, parser) -> Dict:
+        """
+        Sends a formatted prompt and parses the answer with `parser`, retrying
+        rate limits and malformed outputs until the deadline.
+        Raises TimeoutError when the deadline passes.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await self._attempt(prompt_name, prompt_value, parser, deadline)
+            except RetryableLLMError as e:
+                delay = self.backoff(attempt)
+                if attempt == self.max_attempts or loop.time() + delay >= deadline:
+                    raise e.error
+                llm_retries.inc(reason=e.reason)
+                print(f"LLM call for '{prompt_name}' failed ({e.reason}), retrying in {delay:.1f}s.")
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, prompt_name: str, prompt_value, parser, deadline: float) -> Dict:
+        """
+        One attempt, hedged to the fallback provider if the primary has not
+        answered `hedge_after` seconds after it was sent (time spent waiting for
+        a concurrency slot does not count, so hedges cut the provider's latency
+        tail rather than spilling our own queue onto the fallback).
+        """
+        loop = asyncio.get_running_loop()
+        admitted = asyncio.Event()
+        primary = asyncio.ensure_future(self._call(self.primary, prompt_name, prompt_value, parser, admitted))
+        calls = {primary: self.primary}
+        admissions = {primary: admitted}
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            if self.fallback is not None and self.hedge_after > 0:
+                admission = asyncio.ensure_future(admitted.wait())
+                await asyncio.wait({primary, admission}, timeout=max(0.0, deadline - loop.time()),
+                                   return_when=asyncio.FIRST_COMPLETED)
+                admission.cancel()
+                if admitted.is_set() and not primary.done():
+                    await asyncio.wait({primary}, timeout=min(self.hedge_after, max(0.0, deadline - loop.time())))
+                if not primary.done() and loop.time() < deadline:
+                    hedge_admitted = asyncio.Event()
+                    hedge = asyncio.ensure_future(self._call(self.fallback, prompt_name, prompt_value, parser, hedge_admitted))
+                    calls[hedge] = self.fallback
+                    admissions[hedge] = hedge_admitted
+                    pending.add(hedge)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Only providers that were actually called timed out; calls still queued for a slot did not
+                    for task in pending:
+                        if admissions[task].is_set():
+                            calls[task].limiter.on_overload()
+                    raise TimeoutError(f"LLM call did not complete within {self.timeout:g} seconds")
+                for task in done:
+                    if task.exception() is None:
+                        if len(calls) > 1:
+                            llm_hedges.inc(winner=calls[task].name)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, provider: LLMProvider, prompt_name: str, prompt_value, parser,
+                    admitted: Optional[asyncio.Event] = None) -> Dict:
+        await provider.limiter.acquire()
+        if admitted is not None:
+            admitted.set()
+        try:
+            with span("llm.call"):
+                message = await provider.model.ainvoke(prompt_value)
+            provider.limiter.on_success()
+        except Exception as e:
+            if is_rate_limited(e):
+                provider.limiter.on_overload()
+                raise RetryableLLMError("rate_limited", e)
+            raise
+        finally:
+            provider.limiter.release()
+        record_usage(prompt_name, prompt_value, message)
+
+        try:
+            with span("llm.parse"):
+                output = await parser.ainvoke(message)
+                # The JSON parser accepts truncated JSON, so the output is also checked against the schema
+                schema = getattr(parser, "pydantic_object", None)
+                if schema is not None:
+                    schema.model_validate(output)
+                return output
+        except Exception as e:
+            raise RetryableLLMError("malformed_output", e)
+
+    @asynccontextmanager
+    async def slot(self, provider: Optional[LLMProvider] = None) -> AsyncIterator[None]:
+        """Holds a concurrency slot of a provider (the primary by default), e.g. for a streamed call."""
+        limiter = (provider or self.primary).limiter
+        await limiter.acquire()
+        try:
+            yield
+            limiter.on_success()
+        except Exception as e:
+            if is_rate_limited(e) or isinstance(e, TimeoutError):
+                limiter.on_overload()
+            raise
+        finally:
+            limiter.release()
+
+    async def within_deadline(self, stream: AsyncIterator) -> AsyncIterator:
+        """Relays an async stream, raising TimeoutError if it has not finished by the deadline."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"LLM stream did not complete within {self.timeout:g} seconds")
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"LLM stream did not complete within {self.timeout:g} seconds")
+                yield item
+        finally:
+            close = getattr(iterator, "aclose", None)
+            if close is not None:
+                await close()
@@ -0,0 +1,264 @@
+"""
+Map-reduce quiz generation for long articles.
+
+Instead of sending a whole long article in one prompt, the article is split
+along its sections into chunks that fit a token budget. Candidate questions
+are generated for every chunk in parallel (map), alongside one small overview
+call for the title, summary, entities, sections and related topics. A local
+ranking step then picks the final questions (reduce) without another LLM call.
+"""
+import asyncio
+import os
+import re
+from typing import Dict, List
+
+from pydantic import BaseModel, Field
+
+from condenser import CHARS_PER_TOKEN, estimate_tokens
+from llm_quiz_generator import LLMQuizQuestion, get_chain, ainvoke_chain
+from metrics import record_fields
+
+# --- Long-Document Configuration ---
+# Articles estimated above this many tokens are generated chunk by chunk
+LONG_DOCUMENT_THRESHOLD_TOKENS = int(os.getenv("LONG_DOCUMENT_THRESHOLD_TOKENS", "12000"))
+# Maximum estimated tokens of article text sent in one chunk prompt
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "3000"))
+# Maximum estimated tokens of article text sent in the overview prompt
+OVERVIEW_TOKEN_BUDGET = int(os.getenv("OVERVIEW_TOKEN_BUDGET", "1500"))
+# Candidate questions requested per chunk
+QUESTIONS_PER_CHUNK = int(os.getenv("QUESTIONS_PER_CHUNK", "3"))
+# At most this many chunks, spread evenly over the article, are sent to the LLM
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", "5"))
+# Chunk prompts in flight at once for a single article
+CHUNK_MAX_CONCURRENCY = int(os.getenv("CHUNK_MAX_CONCURRENCY", "5"))
+
+QUIZ_QUESTION_COUNT = 5
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def is_long_document(text: str) -> bool:
+    return estimate_tokens(text) > LONG_DOCUMENT_THRESHOLD_TOKENS
+
+
+# Pydantic schemas for the chunk and overview outputs
+class LLMChunkQuestions(BaseModel):
+    questions: List[LLMQuizQuestion] = Field(description="Candidate multiple-choice quiz questions about this part of the article.")
+
+class LLMQuizOverview(BaseModel):
+    title: str = Field(description="The title of the Wikipedia article.")
+    summary: str = Field(description="A short summary of the Wikipedia article, max 3 sentences.")
+    key_entities: Dict[str, List[str]] = Field(description="A dictionary of key entities categorized, e.g., {'people': ['Alice'], 'organizations': ['OrgX'], 'locations': ['PlaceY']}. Include 'people', 'organizations', and 'locations'.")
+    sections: List[str] = Field(description="A list of 3-5 main sections or subheadings from the Wikipedia article.")
+    related_topics: List[str] = Field(description="A list of 3-5 suggested related Wikipedia topics for further reading.")
+
+# Prompt for the candidate questions of one chunk
+CHUNK_PROMPT = """
+    You are an expert quiz generator. You are given one part of a longer Wikipedia article.
+    Generate candidate quiz questions that can be answered from this part alone, as JSON
+    strictly following the specified schema.
+
+    Here are the formatting instructions:
+    {format_instructions}
+
+    Article Title: {article_title}
+    Article Part ({chunk_headings}):
+    {article_content}
+
+    ---
+    **Instructions for Candidate Questions:**
+    Generate exactly {question_count} multiple-choice questions. Each question must have 4 options (A, B, C, D),
+    a correct answer (which must be one of the options), an explanation, and a difficulty level
+    ('easy', 'medium', or 'hard'). Prefer questions about the most important facts of this part.
+
+    Ensure your output is valid JSON and strictly adheres to the schema.
+    """
+
+# Prompt for the title, summary, entities, sections and related topics
+OVERVIEW_PROMPT = """
+    You are an expert quiz generator. You are given the introduction and the section headings of a
+    long Wikipedia article. Produce an overview of the article as JSON strictly following the specified schema.
+
+    Here are the formatting instructions:
+    {format_instructions}
+
+    Article Title: {article_title}
+    Article Introduction:
+    {article_content}
+
+    Article Sections: {section_headings}
+
+    ---
+    **Instructions for the Article Overview:**
+    1.  **Summary:** Provide a concise summary of the article, maximum 3 sentences.
+    2.  **Key Entities:** Identify 3-5 key entities and categorize them into 'people', 'organizations', and 'locations' as a dictionary.
+    3.  **Sections:** List 3-5 main section titles from the article.
+    4.  **Related Topics:** Suggest 3-5 relevant Wikipedia topics for further reading.
+
+    Ensure your output is valid JSON and strictly adheres to the schema.
+    """
+
+
+def _split_oversized(text: str, token_budget: int) -> List[str]:
+    """Splits a text longer than the budget at sentence boundaries (or hard, for huge sentences)."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    pieces, current = [], ""
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(sections: List[Dict], token_budget: int = CHUNK_TOKEN_BUDGET) -> List[Dict]:
+    """
+    Packs consecutive article sections into chunks of at most `token_budget`
+    estimated tokens, returning [{"headings": [...], "text": ...}]. Sections
+    larger than the budget are split at sentence boundaries.
+    """
+    chunks = []
+    current = {"headings": [], "text": ""}
+
+    def flush():
+        nonlocal current
+        if current["text"]:
+            chunks.append(current)
+        current = {"headings": [], "text": ""}
+
+    for section in sections:
+        heading = section["heading"] or "Introduction"
+        for piece in _split_oversized(section["text"], token_budget):
+            text = f"{heading}: {piece}"
+            if current["text"] and estimate_tokens(current["text"]) + estimate_tokens(text) > token_budget:
+                flush()
+            if heading not in current["headings"]:
+                current["headings"].append(heading)
+            current["text"] = f"{current['text']}\n\n{text}" if current["text"] else text
+    flush()
+    return chunks
+
+
+def pick_chunks(chunks: List[Dict], max_chunks: int = MAX_CHUNKS) -> List[Dict]:
+    """
+    Keeps at most `max_chunks` chunks, evenly spaced from the first to the
+    last, so the prompt count (and cost) stays bounded however long the
+    article is while the questions still cover all of it.
+    """
+    if len(chunks) <= max_chunks:
+        return chunks
+    if max_chunks == 1:
+        return chunks[:1]
+    step = (len(chunks) - 1) / (max_chunks - 1)
+    return [chunks[round(i * step)] for i in range(max_chunks)]
+
+
+def _is_valid_question(question: Dict) -> bool:
+    options = question.get("options") or []
+    return (
+        bool(question.get("question"))
+        and len(options) == 4
+        and len(set(options)) == 4
+        and question.get("answer") in options
+    )
+
+
+def select_questions(candidates_per_chunk: List[List[Dict]], count: int = QUIZ_QUESTION_COUNT) -> List[Dict]:
+    """
+    Picks the final quiz questions from the candidates of every chunk. Invalid
+    and duplicate questions are dropped; the rest are taken round-robin across
+    chunks so the quiz covers the whole article, preferring in each chunk the
+    difficulty that is least represented so far.
+    """
+    seen = set()
+    pools = []
+    for candidates in candidates_per_chunk:
+        pool = []
+        for question in candidates:
+            key = " ".join(str(question.get("question", "")).lower().split())
+            if key in seen or not _is_valid_question(question):
+                continue
+            seen.add(key)
+            pool.append({**question, "difficulty": str(question.get("difficulty", "medium")).lower()})
+        if pool:
+            pools.append(pool)
+
+    selected = []
+    difficulty_counts = {"easy": 0, "medium": 0, "hard": 0}
+    while len(selected) < count and any(pools):
+        for pool in pools:
+            if not pool or len(selected) >= count:
+                continue
+            question = min(pool, key=lambda q: difficulty_counts.get(q["difficulty"], 0))
+            pool.remove(question)
+            selected.append(question)
+            difficulty_counts[question["difficulty"]] = difficulty_counts.get(question["difficulty"], 0) + 1
+    return selected
+
+
+def _overview_content(sections: List[Dict]) -> str:
+    """The lead section (or the first section), trimmed to the overview budget."""
+    lead = next((section["text"] for section in sections if not section["heading"]), sections[0]["text"])
+    return _split_oversized(lead, OVERVIEW_TOKEN_BUDGET)[0]
+
+
+async def agenerate_quiz_from_sections(title: str, sections: List[Dict]) -> Dict:
+    """
+    Generates a quiz for a long article chunk by chunk. Returns the same
+    structure as `agenerate_quiz_from_text`. Individual chunk failures are
+    tolerated as long as enough valid questions remain.
+    """
+    try:
+        chunks = pick_chunks(split_into_chunks(sections))
+        semaphore = asyncio.Semaphore(CHUNK_MAX_CONCURRENCY)
+        chunk_chain = get_chain("chunk_questions", CHUNK_PROMPT, LLMChunkQuestions)
+        overview_chain = get_chain("overview", OVERVIEW_PROMPT, LLMQuizOverview)
+
+        async def generate_chunk_questions(chunk: Dict) -> List[Dict]:
+            async with semaphore:
+                output = await ainvoke_chain("chunk_questions", chunk_chain, {
+                    "article_title": title,
+                    "chunk_headings": ", ".join(chunk["headings"]),
+                    "article_content": chunk["text"],
+                    "question_count": QUESTIONS_PER_CHUNK,
+                })
+            return output.get("questions", [])
+
+        overview_content = _overview_content(sections)
+        record_fields(
+            article_tokens=sum(estimate_tokens(section["text"]) for section in sections),
+            sent_tokens=estimate_tokens(overview_content) + sum(estimate_tokens(chunk["text"]) for chunk in chunks),
+            chunks=len(chunks),
+        )
+
+        overview_task = ainvoke_chain("overview", overview_chain, {
+            "article_title": title,
+            "article_content": overview_content,
+            "section_headings": ", ".join(section["heading"] for section in sections if section["heading"]),
+        })
+        overview, *chunk_results = await asyncio.gather(
+            overview_task,
+            *[generate_chunk_questions(chunk) for chunk in chunks],
+            return_exceptions=True,
+        )
+        if isinstance(overview, BaseException):
+            raise overview
+
+        candidates_per_chunk = [result for result in chunk_results if not isinstance(result, BaseException)]
+        quiz = select_questions(candidates_per_chunk)
+        if len(quiz) < QUIZ_QUESTION_COUNT:
+            raise RuntimeError(
+                f"only {len(quiz)} valid questions were generated from {len(chunks)} article chunks"
+            )
+        return {**overview, "quiz": quiz}
+    except Exception as e:
+        raise RuntimeError(f"Error generating quiz with LLM: {e}")
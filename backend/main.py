@@ -1,15 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import and_, or_, func
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
+import base64
 import json
+import sys
 from datetime import datetime
-from typing import List
+from typing import Optional, Tuple, Union
 
-from database import get_db, Quiz, create_db_tables
-from scraper import scrape_wikipedia
-from llm_quiz_generator import generate_quiz_from_text
-from models import QuizGenerateRequest, QuizHistoryItem, FullQuizResponse, LLMFullQuizOutput as APILLMFullQuizOutput 
+from database import get_db, Quiz, QuizQuestionRow, create_db_tables
+from quiz_service import generate_quiz_for_url, stream_quiz_for_url, load_quiz_response_json, generation_flight
+from cache import quiz_cache
+from http_cache import response_cache, cached_response, COMPRESS_MIN_BYTES, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+from quiz_stream import event_to_sse
+from jobs import job_queue, Job, QueueFullError
+from metrics import registry, RequestMetricsMiddleware, REQUEST_ID_HEADER
+from llm_quiz_generator import get_router
+from search_index import search_index, search_index_sync
+from batch import generate_quiz_batch, BATCH_MAX_URLS
+from models import (
+    QuizGenerateRequest, QuizBatchRequest, QuizBatchResponse, QuizHistoryItem, QuizHistoryPage,
+    QuizQuestionItem, QuizQuestionPage, QuizSearchResponse, QuizSearchResult, FullQuizResponse, JobStatusResponse,
+)
+
+# Largest page size accepted by /history
+HISTORY_MAX_LIMIT = 100
+# Largest page size accepted by /questions
+QUESTIONS_MAX_LIMIT = 200
+# Most results returned by /search
+SEARCH_MAX_LIMIT = 50
 
 
 # Define the lifespan context manager
@@ -17,8 +39,17 @@ from models import QuizGenerateRequest, QuizHistoryItem, FullQuizResponse, LLMFu
 async def lifespan(app: FastAPI):
     print("Application startup: Ensuring database tables are created.")
     create_db_tables()
+    # Quizzes missing from the search index are added in the background, not before serving
+    await search_index_sync.start()
+    await job_queue.start()
     yield  # The application starts and serves requests here
-    print("Application shutdown: Resources can be cleaned up here.")
+    print("Application shutdown: Stopping job workers and closing pooled HTTP client.")
+    await job_queue.stop()
+    await search_index_sync.stop()
+    if "scraper" in sys.modules:
+        # Only loaded once an article has been fetched
+        from scraper import close_async_client
+        await close_async_client()
 
 # Initialize FastAPI app with the lifespan
 app = FastAPI(
@@ -43,65 +74,98 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", REQUEST_ID_HEADER],
+)
+# Compresses the other large responses; the cached read endpoints send pre-compressed bodies
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+# Outermost, so request ids and timings cover the whole request
+app.add_middleware(RequestMetricsMiddleware)
+
+# Stats of the caches and queues, read whenever /metrics is scraped
+registry.register_callback(
+    "quiz_cache_requests_total", "Lookups in the in-process quiz cache.", "counter", ["result"],
+    lambda: {("hit",): quiz_cache.hits, ("miss",): quiz_cache.misses},
+)
+registry.register_callback(
+    "response_cache_requests_total", "Lookups in the serialized response cache of the read endpoints.", "counter", ["result"],
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses},
+)
+registry.register_callback(
+    "response_cache_bytes", "Memory held by the serialized response cache.", "gauge", [],
+    lambda: {(): response_cache.stats()["bytes"]},
+)
+registry.register_callback(
+    "generation_singleflight_total", "Generations run, and requests that joined one already in flight.", "counter", ["outcome"],
+    lambda: {("executed",): generation_flight.executions, ("coalesced",): generation_flight.coalesced},
+)
+registry.register_callback(
+    "generation_in_flight", "Generations currently running.", "gauge", [],
+    lambda: {(): generation_flight.in_flight()},
 )
+registry.register_callback(
+    "jobs", "Background jobs tracked, by status.", "gauge", ["status"],
+    lambda: {(job_status,): count for job_status, count in job_queue.stats().items()},
+)
+registry.register_callback(
+    "quiz_llm_concurrency_limit", "Adaptive (AIMD) concurrency limit of each LLM provider.", "gauge", ["provider"],
+    lambda: {(provider.name,): provider.limiter.stats()["limit"] for provider in get_router().providers},
+)
+registry.register_callback(
+    "quiz_llm_in_flight", "LLM calls in flight, by provider.", "gauge", ["provider"],
+    lambda: {(provider.name,): provider.limiter.stats()["in_flight"] for provider in get_router().providers},
+)
+
+
+# --- HELPERS ---
+
+def _job_to_response(job: Job) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        result=job.result
+    )
+
+
+def _encode_history_cursor(date_generated: datetime, quiz_id: int) -> str:
+    raw = f"{date_generated.isoformat()}|{quiz_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(raw_date), int(raw_id)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid history cursor")
 
 
 # --- API ENDPOINTS ---
 
-@app.post("/generate_quiz", response_model=FullQuizResponse, status_code=status.HTTP_201_CREATED)
-async def generate_quiz(request: QuizGenerateRequest, db: Session = Depends(get_db)):
+@app.post("/generate_quiz", response_model=Union[FullQuizResponse, JobStatusResponse], status_code=status.HTTP_201_CREATED)
+async def generate_quiz(request: QuizGenerateRequest, response: Response):
     """
     Generates a multiple-choice quiz from a given Wikipedia article URL.
     Scrapes the article, uses an LLM to create the quiz, and stores it in the database.
+    Every step is awaited or offloaded, so slow generations do not block other requests.
+
+    With `background` set, the generation is queued instead and a job is returned
+    immediately (202); poll `/jobs/{job_id}` for its progress and result.
     """
-    try:
-        # 1. Scrape Wikipedia article
-        scraped_data = scrape_wikipedia(str(request.url))
-        article_title = scraped_data["title"]
-        clean_text = scraped_data["clean_text"]
-        raw_html = scraped_data["raw_html"]
-
-        if not clean_text or len(clean_text) < 100:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Scraped content is too short or empty. Cannot generate quiz."
-            )
+    if request.background:
+        try:
+            job = job_queue.submit(str(request.url), force_refresh=request.force_refresh, priority=request.priority)
+        except QueueFullError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "30"})
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = f"/jobs/{job.id}"
+        return _job_to_response(job)
 
-        # 2. Generate quiz using LLM
-        # The LLM outputs data conforming to LLMFullQuizOutput schema
-        raw_llm_output_dict = generate_quiz_from_text(article_title, clean_text)
-
-        # Convert the dictionary output from LLM into our Pydantic model 
-        llm_quiz_data = APILLMFullQuizOutput(**raw_llm_output_dict)
-
-        # 3. Store in database
-        # Serialize the LLM output (Pydantic object) to JSON string for storage
-        db_quiz = Quiz(
-            url=str(request.url), # Convert HttpUrl to string
-            title=llm_quiz_data.title,
-            scraped_content=raw_html, # Store raw HTML or clean text for bonus
-            full_quiz_data=llm_quiz_data.model_dump_json(indent=2), # Convert Pydantic model to JSON string
-            date_generated=datetime.now()
-        )
-        db.add(db_quiz)
-        db.commit()
-        db.refresh(db_quiz) # Get the generated ID and other updated fields
-
-        # 4. Prepare response
-        # Deserialize the stored JSON back into the Pydantic model for response validation
-        # and combine it with database specific fields
-        response_data = APILLMFullQuizOutput.model_validate_json(db_quiz.full_quiz_data)
-        return FullQuizResponse(
-            id=db_quiz.id,
-            url=db_quiz.url,
-            title=db_quiz.title,
-            summary=response_data.summary,
-            key_entities=response_data.key_entities,
-            sections=response_data.sections,
-            quiz=response_data.quiz,
-            related_topics=response_data.related_topics,
-            date_generated=db_quiz.date_generated
-        )
+    try:
+        return await generate_quiz_for_url(str(request.url), force_refresh=request.force_refresh)
 
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -113,47 +177,210 @@ async def generate_quiz(request: QuizGenerateRequest, db: Session = Depends(get_
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {e}")
 
 
-@app.get("/history", response_model=List[QuizHistoryItem])
-def get_quiz_history(db: Session = Depends(get_db)):
+@app.post("/generate_quiz/stream")
+async def generate_quiz_stream(request: QuizGenerateRequest):
+    """
+    Generates a quiz like `/generate_quiz`, streaming the results as
+    Server-Sent Events while the LLM produces them: `progress` for each stage,
+    `meta` with the title and summary, one `question` per validated question,
+    and finally `quiz` with the complete stored quiz (same shape as the
+    `/generate_quiz` response). Failures end the stream with an `error` event
+    carrying `status_code` and `detail`.
+    """
+    async def event_stream():
+        async for event, data in stream_quiz_for_url(str(request.url), force_refresh=request.force_refresh):
+            if event == "error":
+                if isinstance(data, ValueError):
+                    error = {"status_code": status.HTTP_400_BAD_REQUEST, "detail": str(data)}
+                elif isinstance(data, RuntimeError):
+                    error = {"status_code": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": str(data)}
+                else:
+                    error = {"status_code": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": f"An unexpected error occurred: {data}"}
+                yield event_to_sse("error", error)
+            else:
+                yield event_to_sse(event, data)
+
+    # Proxies must not buffer the stream, or the events arrive all at once
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/generate_quiz/batch", response_model=QuizBatchResponse)
+async def generate_quiz_batch_endpoint(request: QuizBatchRequest):
     """
-    Retrieves a list of all previously generated quizzes (history).
+    Generates quizzes for many Wikipedia articles in one request, e.g. to pre-warm
+    a curated list. Articles are scraped concurrently, LLM calls are bounded and
+    rate limited, and quizzes are stored in bulk. Each URL gets its own result;
+    a failing article does not abort the batch.
     """
-    quizzes = db.query(Quiz).order_by(Quiz.date_generated.desc()).all()
-    # Map database objects to Pydantic response model
-    return [
-        QuizHistoryItem(
-            id=quiz.id,
-            url=quiz.url,
-            title=quiz.title,
-            date_generated=quiz.date_generated
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {BATCH_MAX_URLS} URLs; use the batch.py command for larger lists.",
         )
-        for quiz in quizzes
-    ]
+    return await generate_quiz_batch(request.urls, force_refresh=request.force_refresh)
+
+
+def _history_page(db: Session, limit: int, cursor: Optional[str], include_total: bool) -> QuizHistoryPage:
+    query = db.query(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated)
+    if cursor:
+        cursor_date, cursor_id = _decode_history_cursor(cursor)
+        query = query.filter(or_(
+            Quiz.date_generated < cursor_date,
+            and_(Quiz.date_generated == cursor_date, Quiz.id < cursor_id),
+        ))
+    rows = query.order_by(Quiz.date_generated.desc(), Quiz.id.desc()).limit(limit + 1).all()
+
+    # One extra row tells whether another page follows
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_history_cursor(rows[-1].date_generated, rows[-1].id) if has_more else None
+    total = db.query(func.count(Quiz.id)).scalar() if include_total else None
+
+    # Map database rows to Pydantic response model
+    return QuizHistoryPage(
+        items=[
+            QuizHistoryItem(
+                id=row.id,
+                url=row.url,
+                title=row.title,
+                date_generated=row.date_generated
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+        total=total
+    )
+
+
+@app.get("/history", response_model=QuizHistoryPage)
+def get_quiz_history(
+    request: Request,
+    limit: int = Query(20, ge=1, le=HISTORY_MAX_LIMIT, description="Maximum number of quizzes to return."),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page."),
+    include_total: bool = Query(False, description="Also count all quizzes (one extra query)."),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieves previously generated quizzes (history), newest first, one page at a time.
+    Uses keyset pagination over (date_generated, id) and selects only the listed
+    columns, so the cost of a page does not grow with the size of the table.
+
+    Pages are cached until a new quiz is stored and carry an ETag; clients
+    revalidate with If-None-Match and get an empty 304 while nothing changed.
+    """
+    # Every page is keyed by the newest quiz id, so storing a quiz invalidates them all. Pages after
+    # a cursor are included: date_generated comes from the writer's clock, so with several workers
+    # (or a clock adjustment) a new quiz can sort after an existing cursor.
+    version = db.query(func.max(Quiz.id)).scalar()
+    cache_key = f"history:{version}:{limit}:{cursor}:{include_total}"
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        cached = response_cache.put(cache_key, _history_page(db, limit, cursor, include_total).model_dump_json())
+    return cached_response(request, cached, REVALIDATE_CACHE_CONTROL)
 
 @app.get("/quiz/{quiz_id}", response_model=FullQuizResponse)
-def get_single_quiz(quiz_id: int, db: Session = Depends(get_db)):
+def get_single_quiz(quiz_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Retrieves the full details of a specific quiz by its ID.
+    The response was serialized when the quiz was stored and is returned as-is.
+    Quizzes never change, so responses are cached in memory and by clients
+    (Cache-Control immutable), and If-None-Match is answered with a 304.
+    """
+    cache_key = f"quiz:{quiz_id}"
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        response_json = load_quiz_response_json(db, quiz_id)
+        if response_json is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+        cached = response_cache.put(cache_key, response_json)
+    return cached_response(request, cached, IMMUTABLE_CACHE_CONTROL)
+
+@app.get("/questions", response_model=QuizQuestionPage)
+def list_questions(
+    difficulty: Optional[str] = Query(None, description="Only questions of this difficulty: 'easy', 'medium' or 'hard'."),
+    quiz_id: Optional[int] = Query(None, description="Only questions of this quiz."),
+    limit: int = Query(50, ge=1, le=QUESTIONS_MAX_LIMIT, description="Maximum number of questions to return."),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page."),
+    db: Session = Depends(get_db),
+):
+    """
+    Lists stored quiz questions across all quizzes, newest first, one page at a time.
+    Questions are stored as their own rows, so filtering does not parse any quiz JSON.
     """
-    db_quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not db_quiz:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
-
-    # Deserialize the stored JSON string back into the Pydantic model for response
-    quiz_data_from_db = APILLMFullQuizOutput.model_validate_json(db_quiz.full_quiz_data)
-
-    return FullQuizResponse(
-        id=db_quiz.id,
-        url=db_quiz.url,
-        title=db_quiz.title,
-        summary=quiz_data_from_db.summary,
-        key_entities=quiz_data_from_db.key_entities,
-        sections=quiz_data_from_db.sections,
-        quiz=quiz_data_from_db.quiz,
-        related_topics=quiz_data_from_db.related_topics,
-        date_generated=db_quiz.date_generated
+    query = db.query(QuizQuestionRow)
+    if difficulty:
+        query = query.filter(QuizQuestionRow.difficulty == difficulty.strip().lower())
+    if quiz_id is not None:
+        query = query.filter(QuizQuestionRow.quiz_id == quiz_id)
+    if cursor is not None:
+        query = query.filter(QuizQuestionRow.id < cursor)
+    rows = query.order_by(QuizQuestionRow.id.desc()).limit(limit + 1).all()
+
+    # One extra row tells whether another page follows
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return QuizQuestionPage(
+        items=[
+            QuizQuestionItem(
+                id=row.id,
+                quiz_id=row.quiz_id,
+                position=row.position,
+                question=row.question,
+                options=row.options,
+                answer=row.answer,
+                difficulty=row.difficulty,
+                explanation=row.explanation
+            )
+            for row in rows
+        ],
+        next_cursor=rows[-1].id if has_more else None
     )
 
+@app.get("/search", response_model=QuizSearchResponse)
+def search_quizzes(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to look for in quiz titles, summaries, key entities and questions."),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT, description="Maximum number of quizzes to return."),
+):
+    """
+    Finds stored quizzes by topic, entity or question text, best match first.
+    Served from a local full-text index (and, if configured, embedding vectors)
+    that is updated as quizzes are stored, so no quiz JSON is scanned. While the
+    index is still catching up after startup, `complete` is false.
+    """
+    try:
+        results = search_index.search(q, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return QuizSearchResponse(
+        query=q,
+        items=[QuizSearchResult(**result) for result in results],
+        semantic=search_index.semantic,
+        complete=search_index.synced,
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job_status(job_id: str):
+    """
+    Reports the status and progress of a background quiz generation job,
+    including the generated quiz once it has completed.
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_to_response(job)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Reports stage latency histograms, LLM token counts and cache statistics
+    in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Health check endpoint
 @app.get("/")
 async def root():
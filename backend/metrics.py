@@ -0,0 +1,273 @@
+"""
+In-process metrics, served at /metrics in the Prometheus text format.
+
+Each stage of a quiz generation (Wikipedia fetch, HTML parsing and cleaning,
+condensation, the LLM call, parsing its JSON, database reads and writes) is
+timed with `span(stage)` into the `quiz_stage_seconds` histogram. The spans
+of the current request are also collected, along with any values noted with
+`record_fields` (e.g. token counts), so the request middleware can log one
+structured line per request with its id and where the time went.
+"""
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Id of the request being served, and the (stage, seconds) spans recorded for it
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_spans_var: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("spans", default=None)
+# Extra values recorded for the current request, added to its log line
+_fields_var: contextvars.ContextVar[Optional[Dict[str, object]]] = contextvars.ContextVar("fields", default=None)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (the last one is +Inf), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    le_label = f'le="{le}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """All metrics of the process, plus callbacks that report other components' stats when scraped."""
+
+    def __init__(self):
+        self._metrics: List = []
+        # (name, documentation, type, label names, callback returning {label values: value})
+        self._callbacks: List[Tuple[str, str, str, Tuple[str, ...], Callable[[], Dict[LabelValues, float]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_callback(self, name: str, documentation: str, metric_type: str, labelnames: Sequence[str],
+                          callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Reports values read from another component (e.g. cache stats) each time metrics are rendered."""
+        self._callbacks.append((name, documentation, metric_type, tuple(labelnames), callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, metric_type, labelnames, callback in self._callbacks:
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"])
+            for key, value in callback().items():
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "quiz_stage_seconds", "Time spent in each stage of quiz generation.", ["stage"]
+)
+stage_errors = registry.counter(
+    "quiz_stage_errors_total", "Stages that ended with an exception.", ["stage"]
+)
+llm_tokens = registry.counter(
+    "quiz_llm_tokens_total", "Tokens sent to (input) and received from (output) the LLM, per prompt.",
+    ["prompt", "direction"]
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to serve HTTP requests, by route and status.",
+    ["method", "route", "status"]
+)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Times the enclosed block as one stage of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage)
+        spans = _spans_var.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def record_tokens(prompt: str, input_tokens: int, output_tokens: int) -> None:
+    llm_tokens.inc(input_tokens, prompt=prompt, direction="input")
+    llm_tokens.inc(output_tokens, prompt=prompt, direction="output")
+
+
+def record_fields(**fields) -> None:
+    """Adds values (e.g. token counts) to the log line of the current request, if any."""
+    recorded = _fields_var.get()
+    if recorded is not None:
+        recorded.update(fields)
+
+
+@contextmanager
+def request_scope(request_id: str) -> Iterator[List[Tuple[str, float]]]:
+    """Makes `request_id` current and collects the spans recorded until the block exits."""
+    spans: List[Tuple[str, float]] = []
+    request_id_token = request_id_var.set(request_id)
+    spans_token = _spans_var.set(spans)
+    fields_token = _fields_var.set({})
+    try:
+        yield spans
+    finally:
+        request_id_var.reset(request_id_token)
+        _spans_var.reset(spans_token)
+        _fields_var.reset(fields_token)
+
+
+def log_spans(request_id: str, spans: List[Tuple[str, float]], **fields) -> None:
+    """
+    Prints one structured (JSON) line with the stage timings of a request or
+    job, and the values recorded for it with `record_fields`.
+    """
+    print(json.dumps({
+        "request_id": request_id,
+        **(_fields_var.get() or {}),
+        **fields,
+        "stages": [{"stage": stage, "seconds": round(seconds, 4)} for stage, seconds in spans],
+    }))
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that gives every HTTP request an id (the incoming
+    X-Request-ID header, or a new one) echoed in the response, times the
+    request by route, and logs the stage spans of requests that recorded any.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.lower().encode())
+        request_id = incoming.decode("latin-1")[:128] if incoming else new_request_id()
+        response_status = {"code": 500}
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.lower().encode(), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        start = time.perf_counter()
+        with request_scope(request_id) as spans:
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                elapsed = time.perf_counter() - start
+                route_path = getattr(scope.get("route"), "path", "unmatched")
+                http_request_seconds.observe(elapsed, method=scope["method"], route=route_path, status=str(response_status["code"]))
+                if spans:
+                    log_spans(request_id, spans, method=scope["method"], route=route_path,
+                              status=response_status["code"], seconds=round(elapsed, 4))
@@ -0,0 +1,119 @@
+"""
+One-off data migrations for existing databases.
+
+Run from the backend directory:
+    python migrations.py
+
+Schema changes (new tables and nullable columns) are applied automatically at
+startup by `create_db_tables`; the steps here rewrite existing rows and can be
+re-run safely, since each only touches rows it has not migrated yet.
+"""
+import argparse
+
+from database import Quiz, create_db_tables, session_scope
+from article_store import get_or_create_article
+from quiz_service import quiz_to_response, question_rows
+from scraper import parse_wikipedia_html
+
+
+def compress_scraped_content(batch_size: int = 50) -> int:
+    """
+    Moves the raw HTML in `quizzes.scraped_content` into the compressed,
+    deduplicated `articles` table and clears the legacy column. The original
+    HTML is kept (compressed) alongside the clean text extracted from it.
+    Rows whose HTML yields no article text are left untouched.
+    Returns the number of quizzes migrated.
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        with session_scope() as db:
+            # Only ids are listed up front; each large column is loaded one row at a time
+            quiz_ids = [
+                quiz_id for (quiz_id,) in db.query(Quiz.id)
+                .filter(Quiz.id > last_id, Quiz.article_id.is_(None), Quiz.scraped_content.isnot(None))
+                .order_by(Quiz.id)
+                .limit(batch_size)
+            ]
+            if not quiz_ids:
+                return migrated
+
+            for quiz_id in quiz_ids:
+                db_quiz = db.get(Quiz, quiz_id)
+                raw_html = db_quiz.scraped_content
+                try:
+                    clean_text = parse_wikipedia_html(raw_html)["clean_text"]
+                except Exception as e:
+                    print(f"Quiz {quiz_id}: could not extract text ({e}); left unmigrated.")
+                    continue
+                if not clean_text:
+                    # Left in place rather than losing the HTML under a shared empty-text hash
+                    print(f"Quiz {quiz_id}: the stored HTML has no article text; left unmigrated.")
+                    continue
+
+                article = get_or_create_article(
+                    db,
+                    url=db_quiz.url,
+                    title=db_quiz.title,
+                    clean_text=clean_text,
+                    raw_html=raw_html,
+                    store_html=True,
+                )
+                db_quiz.article_id = article.id
+                db_quiz.scraped_content = None
+                migrated += 1
+
+            db.commit()
+            last_id = quiz_ids[-1]
+            print(f"Migrated {migrated} quizzes so far (up to id {last_id}).")
+
+
+def store_quiz_responses(batch_size: int = 50) -> int:
+    """
+    Serializes the API response of quizzes stored before responses were kept
+    pre-serialized, and adds their normalized question rows. Quizzes whose
+    stored JSON does not validate are left untouched (they are still served
+    by building the response on each read).
+    Returns the number of quizzes migrated.
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        with session_scope() as db:
+            quiz_ids = [
+                quiz_id for (quiz_id,) in db.query(Quiz.id)
+                .filter(Quiz.id > last_id, Quiz.response_json.is_(None))
+                .order_by(Quiz.id)
+                .limit(batch_size)
+            ]
+            if not quiz_ids:
+                return migrated
+
+            for quiz_id in quiz_ids:
+                db_quiz = db.get(Quiz, quiz_id)
+                try:
+                    response = quiz_to_response(db_quiz)
+                except Exception as e:
+                    print(f"Quiz {quiz_id}: stored quiz JSON is invalid ({e}); left unmigrated.")
+                    continue
+
+                if not db_quiz.questions:
+                    db_quiz.questions = question_rows(response.quiz)
+                db_quiz.response_json = response.model_dump_json()
+                migrated += 1
+
+            db.commit()
+            last_id = quiz_ids[-1]
+            print(f"Stored responses of {migrated} quizzes so far (up to id {last_id}).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate existing quiz rows to the current storage format.")
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    create_db_tables()
+    count = compress_scraped_content(batch_size=args.batch_size)
+    print(f"Compressed scraped content of {count} quizzes into the articles table.")
+    count = store_quiz_responses(batch_size=args.batch_size)
+    print(f"Stored the serialized responses and question rows of {count} quizzes.")
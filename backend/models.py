@@ -23,6 +23,31 @@ class LLMFullQuizOutput(BaseModel):
 # Pydantic schema for the API request body when generating a quiz
 class QuizGenerateRequest(BaseModel):
     url: HttpUrl = Field(..., description="The Wikipedia article URL to generate a quiz from.")
+    force_refresh: bool = Field(False, description="Bypass the quiz cache and always generate a new quiz.")
+    background: bool = Field(False, description="Enqueue the generation as a background job and return its id immediately.")
+    priority: int = Field(0, description="Priority of a background job; higher values run first.")
+
+# Pydantic schema for the API request body when generating quizzes for many articles
+class QuizBatchRequest(BaseModel):
+    # Plain strings, so one malformed URL fails only its own item instead of the whole request
+    urls: List[str] = Field(..., description="The Wikipedia article URLs to generate quizzes from.")
+    force_refresh: bool = Field(False, description="Bypass the quiz cache and always generate new quizzes.")
+
+# Pydantic schema for the outcome of one article in a batch
+class QuizBatchItemResult(BaseModel):
+    url: str
+    status: str = Field(..., description="One of 'generated', 'cached' or 'failed'.")
+    quiz_id: Optional[int] = Field(None, description="Id of the stored quiz, unless the item failed.")
+    title: Optional[str] = None
+    error: Optional[str] = Field(None, description="Why the item failed.")
+
+# Pydantic schema for the response of a batch generation
+class QuizBatchResponse(BaseModel):
+    results: List[QuizBatchItemResult] = Field(..., description="One result per requested URL, in request order.")
+    generated: int
+    cached: int
+    failed: int
+    elapsed_seconds: float
 
 # Pydantic schema for a simplified quiz history entry
 class QuizHistoryItem(BaseModel):
@@ -31,6 +56,12 @@ class QuizHistoryItem(BaseModel):
     title: str
     date_generated: datetime.datetime
 
+# Pydantic schema for one page of quiz history, newest first
+class QuizHistoryPage(BaseModel):
+    items: List[QuizHistoryItem]
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page; null on the last page.")
+    total: Optional[int] = Field(None, description="Total number of quizzes, only when requested with include_total.")
+
 # Pydantic schema for the full quiz response from the API, combining LLM output with DB metadata
 class FullQuizResponse(BaseModel):
     id: int
@@ -41,4 +72,42 @@ class FullQuizResponse(BaseModel):
     sections: List[str]
     quiz: List[QuizQuestion]
     related_topics: List[str]
-    date_generated: datetime.datetime
\ No newline at end of file
+    date_generated: datetime.datetime
+
+# Pydantic schema for a stored quiz question, as listed by /questions
+class QuizQuestionItem(QuizQuestion):
+    id: int
+    quiz_id: int = Field(..., description="Id of the quiz the question belongs to.")
+    position: int = Field(..., description="Position of the question within its quiz, starting at 0.")
+
+# Pydantic schema for one page of stored quiz questions, newest first
+class QuizQuestionPage(BaseModel):
+    items: List[QuizQuestionItem]
+    next_cursor: Optional[int] = Field(None, description="Cursor for the next page; null on the last page.")
+
+# Pydantic schema for one quiz found by /search
+class QuizSearchResult(BaseModel):
+    id: int
+    url: str
+    title: str
+    date_generated: datetime.datetime
+    score: float = Field(..., description="Relevance of the quiz to the query; higher is better.")
+    snippet: Optional[str] = Field(None, description="Matching text with the matched words in [brackets], for text matches.")
+
+# Pydantic schema for the results of /search, best first
+class QuizSearchResponse(BaseModel):
+    query: str
+    items: List[QuizSearchResult]
+    semantic: bool = Field(..., description="Whether quizzes were also ranked by embedding similarity.")
+    complete: bool = Field(..., description="False while the index is still catching up with stored quizzes, so some may be missing.")
+
+# Pydantic schema for the status of a background quiz generation job
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str = Field(..., description="One of 'queued', 'running', 'completed' or 'failed'.")
+    stage: Optional[str] = Field(None, description="Current stage while running: 'scraping', 'generating' or 'persisting'.")
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    error: Optional[str] = None
+    result: Optional[FullQuizResponse] = None
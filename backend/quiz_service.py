@@ -0,0 +1,317 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, load_only
+
+from database import Quiz, QuizQuestionRow, session_scope, run_in_db_executor
+from article_store import get_or_create_articles
+from llm_quiz_generator import agenerate_quiz_from_text, astream_quiz_from_text
+from long_document import agenerate_quiz_from_sections, is_long_document
+from condenser import condense_text, estimate_tokens
+from cache import quiz_cache, find_cached_quiz, normalize_article_url, article_url_for_title
+from singleflight import SingleFlight
+from quiz_stream import PartialQuizTracker
+from metrics import record_fields, span
+from search_index import index_quiz_responses
+from models import FullQuizResponse, QuizQuestion, LLMFullQuizOutput as APILLMFullQuizOutput
+
+# Concurrent generations of the same article share one scrape + LLM call + stored quiz
+generation_flight = SingleFlight()
+
+
+def quiz_to_response(db_quiz: Quiz) -> FullQuizResponse:
+    """Combines a stored quiz row with its deserialized quiz JSON into the API response model."""
+    quiz_data_from_db = APILLMFullQuizOutput.model_validate_json(db_quiz.full_quiz_data)
+    return FullQuizResponse(
+        id=db_quiz.id,
+        url=db_quiz.url,
+        title=db_quiz.title,
+        summary=quiz_data_from_db.summary,
+        key_entities=quiz_data_from_db.key_entities,
+        sections=quiz_data_from_db.sections,
+        quiz=quiz_data_from_db.quiz,
+        related_topics=quiz_data_from_db.related_topics,
+        date_generated=db_quiz.date_generated
+    )
+
+
+def build_quiz_response(db_quiz: Quiz, llm_quiz_data: APILLMFullQuizOutput) -> FullQuizResponse:
+    """Builds the API response of a newly stored quiz from its in-memory LLM output."""
+    return FullQuizResponse(
+        id=db_quiz.id,
+        url=db_quiz.url,
+        title=db_quiz.title,
+        summary=llm_quiz_data.summary,
+        key_entities=llm_quiz_data.key_entities,
+        sections=llm_quiz_data.sections,
+        quiz=llm_quiz_data.quiz,
+        related_topics=llm_quiz_data.related_topics,
+        date_generated=db_quiz.date_generated
+    )
+
+
+def question_rows(questions: List[QuizQuestion]) -> List[QuizQuestionRow]:
+    """Builds the normalized question rows of a quiz, in quiz order."""
+    return [
+        QuizQuestionRow(
+            position=position,
+            question=question.question,
+            options=question.options,
+            answer=question.answer,
+            difficulty=question.difficulty.strip().lower(),
+            explanation=question.explanation,
+        )
+        for position, question in enumerate(questions)
+    ]
+
+
+def load_quiz_response_json(db: Session, quiz_id: int) -> Optional[str]:
+    """Returns the serialized API response of a stored quiz, or None if there is no such quiz."""
+    row = db.query(Quiz.response_json).filter(Quiz.id == quiz_id).first()
+    if row is None:
+        return None
+    if row.response_json is not None:
+        return row.response_json
+    # Stored before responses were pre-serialized (see migrations.py)
+    return quiz_to_response(db.get(Quiz, quiz_id)).model_dump_json()
+
+
+def _load_cached_quiz(cache_key: str) -> Optional[FullQuizResponse]:
+    """
+    Database tier lookup, run on the database executor. Only the stored
+    response is read and parsed, not the quiz JSON.
+    """
+    with session_scope() as db:
+        db_quiz = find_cached_quiz(db, cache_key, load_only(Quiz.id, Quiz.response_json))
+        if db_quiz is None:
+            return None
+        if db_quiz.response_json is not None:
+            return FullQuizResponse.model_validate_json(db_quiz.response_json)
+        # Stored before responses were pre-serialized (see migrations.py)
+        return quiz_to_response(db_quiz)
+
+
+def save_quizzes(entries: List[Tuple[str, APILLMFullQuizOutput, Dict]]) -> List[FullQuizResponse]:
+    """
+    Stores generated quizzes, given as (url, llm_quiz_data, scraped_data), in
+    one transaction, adds them to the search index, and returns their API
+    responses in the same order. Run on the database executor.
+    """
+    with session_scope() as db:
+        # The scraped articles are stored compressed and deduplicated by content
+        articles = get_or_create_articles(db, [
+            {
+                "url": url,
+                "title": scraped_data["title"],
+                "clean_text": scraped_data["clean_text"],
+                "raw_html": scraped_data.get("raw_html"),
+                "revision_id": scraped_data.get("revision_id"),
+            }
+            for url, _, scraped_data in entries
+        ])
+
+        # Serialize the LLM output (Pydantic object) to JSON string for storage
+        db_quizzes = [
+            Quiz(
+                url=url, # Normalized article URL, also the cache key
+                title=llm_quiz_data.title,
+                article_id=article.id,
+                full_quiz_data=llm_quiz_data.model_dump_json(), # Convert Pydantic model to JSON string
+                date_generated=datetime.now(),
+                questions=question_rows(llm_quiz_data.quiz),
+            )
+            for (url, llm_quiz_data, _), article in zip(entries, articles)
+        ]
+        db.add_all(db_quizzes)
+        db.flush() # Assigns the generated IDs, so no row has to be re-read after the commit
+
+        # Built from the in-memory output, and serialized once for every later read of the quiz
+        responses = [build_quiz_response(db_quiz, llm_quiz_data) for db_quiz, (_, llm_quiz_data, _) in zip(db_quizzes, entries)]
+        for db_quiz, response in zip(db_quizzes, responses):
+            db_quiz.response_json = response.model_dump_json()
+        db.commit()
+    index_quiz_responses(responses)
+    return responses
+
+
+def _save_quiz(url: str, llm_quiz_data: APILLMFullQuizOutput, scraped_data: Dict) -> FullQuizResponse:
+    """Stores a generated quiz and returns its API response, run on the database executor."""
+    return save_quizzes([(url, llm_quiz_data, scraped_data)])[0]
+
+
+async def lookup_cached_quiz(cache_key: str) -> Optional[FullQuizResponse]:
+    """Checks the in-process LRU tier, then the database, for a fresh quiz of the article."""
+    cached_quiz = quiz_cache.get(cache_key)
+    if cached_quiz is not None:
+        return cached_quiz
+
+    with span("db.lookup"):
+        cached_quiz = await run_in_db_executor(_load_cached_quiz, cache_key)
+    if cached_quiz is not None:
+        quiz_cache.put(cache_key, cached_quiz, cached_quiz.date_generated)
+    return cached_quiz
+
+
+async def scrape_article(url: str) -> Dict:
+    """Scrapes a Wikipedia article, rejecting articles with too little text for a quiz."""
+    # Imported on first use: the HTTP clients and HTML parser are not needed to start the app
+    from scraper import scrape_wikipedia_async
+
+    scraped_data = await scrape_wikipedia_async(url)
+    clean_text = scraped_data["clean_text"]
+    if not clean_text or len(clean_text) < 100:
+        raise ValueError("Scraped content is too short or empty. Cannot generate quiz.")
+    return scraped_data
+
+
+async def generate_llm_quiz(scraped_data: Dict,
+                            on_event: Optional[Callable[[str, Dict], None]] = None) -> APILLMFullQuizOutput:
+    """
+    Generates the quiz for a scraped article with the LLM. If `on_event` is
+    given, the LLM output is streamed and reported to it as "meta" and
+    "question" events while it is generated.
+    """
+    article_title = scraped_data["title"]
+    clean_text = scraped_data["clean_text"]
+    sections = scraped_data.get("sections")
+    tracker = PartialQuizTracker() if on_event is not None else None
+
+    # The LLM outputs data conforming to LLMFullQuizOutput schema
+    if sections and is_long_document(clean_text):
+        # Long articles are generated per section chunk and the questions merged locally
+        raw_llm_output_dict: Dict = await agenerate_quiz_from_sections(article_title, sections)
+    else:
+        # Only the most informative sentences are sent, up to the condensation token budget
+        with span("condense"):
+            llm_text = condense_text(clean_text, sections)
+        record_fields(article_tokens=estimate_tokens(clean_text), sent_tokens=estimate_tokens(llm_text))
+        if tracker is None:
+            raw_llm_output_dict = await agenerate_quiz_from_text(article_title, llm_text)
+        else:
+            raw_llm_output_dict = {}
+            async for raw_llm_output_dict in astream_quiz_from_text(article_title, llm_text):
+                for event, data in tracker.feed(raw_llm_output_dict):
+                    on_event(event, data)
+    if tracker is not None:
+        for event, data in tracker.finish(raw_llm_output_dict):
+            on_event(event, data)
+
+    # Convert the dictionary output from LLM into our Pydantic model
+    try:
+        return APILLMFullQuizOutput(**raw_llm_output_dict)
+    except ValidationError as e:
+        # An invalid LLM output is a server-side failure, not a bad request (ValidationError is a ValueError)
+        raise RuntimeError(f"The LLM returned an invalid quiz: {e}")
+
+
+async def generate_quiz_for_url(url: str, force_refresh: bool = False,
+                                progress: Optional[Callable[[str], None]] = None) -> FullQuizResponse:
+    """
+    Runs the full generation pipeline for a Wikipedia article URL without blocking
+    the event loop: cache lookup, scraping, LLM generation and persistence.
+    If given, `progress` is called with the name of each stage as it starts
+    ("scraping", "generating", "persisting").
+    Raises ValueError for invalid input and RuntimeError for scraper or LLM failures.
+    """
+    report_progress = progress or (lambda stage: None)
+
+    # 0. Serve a previously generated quiz for the same article, if fresh
+    cache_key = normalize_article_url(url)
+    if not force_refresh:
+        cached_quiz = await lookup_cached_quiz(cache_key)
+        if cached_quiz is not None:
+            return cached_quiz
+
+    # Requests for an article that is already being generated wait on that generation
+    return await generation_flight.do(
+        cache_key, lambda: _generate_and_store(url, cache_key, force_refresh, report_progress)
+    )
+
+
+async def stream_quiz_for_url(url: str, force_refresh: bool = False) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Runs the generation pipeline like `generate_quiz_for_url`, yielding
+    (event, data) pairs as results become available:
+      - ("progress", {"stage": ...}) as each stage starts,
+      - ("meta", {"title", "summary"}) as soon as the LLM has produced them,
+      - ("question", {"index", "question"}) for each question once it validates,
+      - ("quiz", FullQuizResponse) with the stored quiz, always last on success,
+      - ("error", exception) if the generation failed.
+    Cached quizzes, and requests joining a generation already in flight for the
+    same article, only receive the final "quiz" event. The quiz is stored once,
+    even if the client disconnects before the end.
+    """
+    cache_key = normalize_article_url(url)
+    if not force_refresh:
+        cached_quiz = await lookup_cached_quiz(cache_key)
+        if cached_quiz is not None:
+            yield "quiz", cached_quiz
+            return
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data) -> None:
+        events.put_nowait((event, data))
+
+    async def run() -> None:
+        try:
+            response = await generation_flight.do(
+                cache_key,
+                lambda: _generate_and_store(
+                    url, cache_key, force_refresh,
+                    lambda stage: emit("progress", {"stage": stage}),
+                    on_event=emit,
+                ),
+            )
+            emit("quiz", response)
+        except Exception as e:
+            emit("error", e)
+        finally:
+            events.put_nowait(None)
+
+    runner = asyncio.create_task(run())
+    try:
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        # The shared generation itself is shielded and still completes and stores the quiz
+        runner.cancel()
+
+
+async def _generate_and_store(url: str, cache_key: str, force_refresh: bool,
+                              report_progress: Callable[[str], None],
+                              on_event: Optional[Callable[[str, Dict], None]] = None) -> FullQuizResponse:
+    """
+    Scrapes, generates and stores a new quiz; run once per in-flight article.
+    If `on_event` is given, the LLM output is streamed and reported to it as
+    "meta" and "question" events while it is generated.
+    """
+    # 1. Scrape Wikipedia article
+    report_progress("scraping")
+    scraped_data = await scrape_article(url)
+
+    # Redirects (e.g. /wiki/AI) resolve to a canonical title that may already have a quiz
+    canonical_key = article_url_for_title(cache_key, scraped_data["title"])
+    if canonical_key != cache_key and not force_refresh:
+        cached_quiz = await lookup_cached_quiz(canonical_key)
+        if cached_quiz is not None:
+            quiz_cache.put(cache_key, cached_quiz, cached_quiz.date_generated)
+            return cached_quiz
+
+    # 2. Generate quiz using LLM
+    report_progress("generating")
+    llm_quiz_data = await generate_llm_quiz(scraped_data, on_event)
+
+    # 3. Store in database
+    report_progress("persisting")
+    with span("db.write"):
+        response = await run_in_db_executor(_save_quiz, cache_key, llm_quiz_data, scraped_data)
+    quiz_cache.put(cache_key, response, response.date_generated)
+    if canonical_key != cache_key:
+        quiz_cache.put(canonical_key, response, response.date_generated)
+    return response
@@ -0,0 +1,69 @@
+"""
+Incremental quiz events for the streaming generation endpoint.
+
+While the LLM streams its JSON, the output parser yields ever more complete
+partial dicts. A field is only known to be complete once a later field has
+started (or the stream has ended), so the tracker emits the title and summary
+as soon as the model moves past them, and each quiz question as soon as the
+next one starts and it validates against `QuizQuestion`.
+"""
+import json
+from typing import Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from models import QuizQuestion
+
+# (event name, JSON-serializable data)
+QuizEvent = Tuple[str, Dict]
+
+
+class PartialQuizTracker:
+    """Turns the partial outputs of one streamed generation into 'meta' and 'question' events."""
+
+    def __init__(self):
+        self.meta_sent = False
+        self.items_consumed = 0
+        self.questions_sent = 0
+
+    def feed(self, partial: Dict, final: bool = False) -> List[QuizEvent]:
+        """Returns the events that became available with this partial output."""
+        if not isinstance(partial, dict) or not partial:
+            return []
+        events = []
+        last_key = list(partial)[-1]
+
+        if not self.meta_sent and "title" in partial and "summary" in partial:
+            if final or last_key not in ("title", "summary"):
+                self.meta_sent = True
+                events.append(("meta", {"title": partial["title"], "summary": partial["summary"]}))
+
+        items = partial.get("quiz")
+        if isinstance(items, list):
+            # The last item may still be streaming unless the model has moved on
+            complete = len(items) if final or last_key != "quiz" else len(items) - 1
+            for item in items[self.items_consumed:complete]:
+                try:
+                    question = QuizQuestion.model_validate(item)
+                except ValidationError as e:
+                    print(f"Skipping streamed quiz question that failed validation: {e.errors()[0]['msg']}")
+                    continue
+                events.append(("question", {"index": self.questions_sent, "question": question.model_dump()}))
+                self.questions_sent += 1
+            self.items_consumed = max(self.items_consumed, complete)
+        return events
+
+    def finish(self, output: Dict) -> List[QuizEvent]:
+        """Returns the remaining events once the complete output is known."""
+        return self.feed(output, final=True)
+
+
+def format_sse(event: str, data: str) -> str:
+    """Formats one Server-Sent Events message; `data` must be a single-line JSON string."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def event_to_sse(event: str, data) -> str:
+    """Formats an event whose data is a dict or a Pydantic model."""
+    payload = data.model_dump_json() if hasattr(data, "model_dump_json") else json.dumps(data)
+    return format_sse(event, payload)
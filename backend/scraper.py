@@ -1,29 +1,529 @@
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
 import requests
-from bs4 import BeautifulSoup, Comment
-from urllib.parse import urlparse
-from typing import Dict
+import httpx
+from bs4 import BeautifulSoup, Tag
+from bs4.filter import ElementFilter
+from urllib.parse import urlparse, parse_qs, unquote
+from typing import Dict, List, Optional, Tuple
 import re
 
+from compression import compress_text, decompress_text
+from metrics import span
+
+# Sets a User-Agent header to mimic a browser and avoid 403 errors
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+REQUEST_TIMEOUT_SECONDS = 10
+# Upper bound on pooled keep-alive connections used by the async fetch path
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+
+# "api" fetches article content through the MediaWiki action=parse API and falls
+# back to scraping the rendered page; "html" always scrapes the rendered page
+WIKI_FETCH_BACKEND = os.getenv("WIKI_FETCH_BACKEND", "api")
+# Overrides the MediaWiki API endpoint (defaults to /w/api.php on the article's wiki)
+WIKI_API_URL = os.getenv("WIKI_API_URL")
+# Wikimedia asks API clients to identify themselves with a descriptive User-Agent
+API_HEADERS = {
+    'User-Agent': os.getenv("WIKI_API_USER_AGENT", "Quizipedia/1.0 (https://quizipedia-nine.vercel.app)"),
+    'Accept-Encoding': 'gzip',
+}
+# Number of articles whose revision id and parsed result are remembered for conditional fetches
+API_REVISION_CACHE_MAX = int(os.getenv("API_REVISION_CACHE_MAX", "1024"))
+# Memory for those results, kept compressed and without the article HTML
+API_REVISION_CACHE_MAX_BYTES = int(os.getenv("API_REVISION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Parser backend for article HTML; set to "lxml" (if installed) for faster parsing
+HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "html.parser")
+
+# --- Cleaning Rules ---
+# Removes script, style tags, tables and description lists
+_UNWANTED_TAGS = frozenset(['script', 'style', 'table', 'dl'])
+# Removes various boilerplate and non-article elements by class
+_UNWANTED_CLASSES = frozenset([
+    'infobox', 'sidebar', 'navbox', 'vertical-navbox', 'hatnote',
+    'ambox', 'metadata', 'thumb', 'reference-text', 'rellink',
+    'box-Multiple_issues', 'citation-needed', 'portal', 'printfooter',
+    'mw-jump-link', 'mw-indicators'
+])
+# Removes phonetic spellings and pronunciation guides (<span> classes)
+_PRONUNCIATION_CLASSES = frozenset(['IPA', 'nowrap', 'unicode', 'latinx', 'respell'])
+# Removes common sections like "See also", "References", etc.
+_SECTIONS_TO_REMOVE = frozenset([
+    "See also", "References", "External links", "Further reading",
+    "Notes", "Bibliography", "Citations", "Footnotes", "Publications",
+    "Sources", "Awards and honours"
+])
+_BOILERPLATE_PHRASES = (
+    "From Wikipedia, the free encyclopedia",
+    "Jump to navigation Jump to search",
+    "This article is about the British mathematician. For other uses, see Alan Turing (disambiguation).",
+)
+_PHONETIC_PATTERNS = (
+    re.compile(r'\(\s*/.*?/\s*\)'),
+    re.compile(r'\[\s*/.*?/\s*\]'),
+    re.compile(r'[\(\[\{][ˈˌ].*?[\)\]\}]'),
+)
+_NO_CLASSES = frozenset()
+
+_async_client: Optional[httpx.AsyncClient] = None
+_session: Optional[requests.Session] = None
+
+
+def _validate_wikipedia_url(url: str) -> None:
+    """Checks if the URL is from Wikipedia."""
+    parsed_url = urlparse(url)
+    if not (parsed_url.scheme in ['http', 'https'] and 'wikipedia.org' in parsed_url.netloc):
+        raise ValueError("Only Wikipedia URLs are supported.")
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the shared, connection-pooled async HTTP client, creating it on first use."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Closes the shared async HTTP client (called on application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def get_session() -> requests.Session:
+    """Returns the shared keep-alive session used by the synchronous fetch path."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_MAX_CONNECTIONS, pool_maxsize=HTTP_MAX_CONNECTIONS)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+# --- MediaWiki API Backend ---
+
+class _RevisionCache:
+    """
+    LRU of (endpoint, title) -> last fetched revision id, ETag and compressed
+    parsed result, bounded by entry count and by the size of the results.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[str, str], entry: Dict) -> None:
+        size = len(entry["data"])
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous["data"])
+            if size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted["data"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+_revision_cache = _RevisionCache(API_REVISION_CACHE_MAX, API_REVISION_CACHE_MAX_BYTES)
+
+
+def _api_target(url: str) -> Tuple[str, str]:
+    """Returns the MediaWiki API endpoint and the page title for an article URL."""
+    parsed_url = urlparse(url)
+    if parsed_url.path.startswith('/wiki/'):
+        title = unquote(parsed_url.path[len('/wiki/'):])
+    else:
+        title = parse_qs(parsed_url.query).get('title', [''])[0]
+    title = title.replace('_', ' ').strip()
+    if not title:
+        raise ValueError("Could not determine the article title from the URL.")
+    endpoint = WIKI_API_URL or f"{parsed_url.scheme}://{parsed_url.netloc}/w/api.php"
+    return endpoint, title
+
+
+def _parse_params(title: str) -> Dict:
+    return {
+        'action': 'parse', 'page': title, 'prop': 'text|revid|displaytitle', 'redirects': 1,
+        'disableeditsection': 1, 'disabletoc': 1, 'format': 'json', 'formatversion': 2,
+    }
+
+
+def _revision_params(title: str) -> Dict:
+    return {
+        'action': 'query', 'titles': title, 'prop': 'revisions', 'rvprop': 'ids', 'redirects': 1,
+        'format': 'json', 'formatversion': 2,
+    }
+
+
+def _latest_revision_id(payload: Dict) -> Optional[int]:
+    try:
+        return payload['query']['pages'][0]['revisions'][0]['revid']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _result_from_parse_payload(payload: Dict) -> Dict:
+    """Cleans the article HTML returned by action=parse into the scraper result format."""
+    if 'error' in payload:
+        raise RuntimeError(f"MediaWiki API error: {payload['error'].get('info', payload['error'])}")
+    parsed = payload['parse']
+
+    with span("scrape.parse"):
+        soup = BeautifulSoup(parsed['text'], HTML_PARSER)
+        content_div = soup.find('div', class_='mw-parser-output') or soup
+        title = BeautifulSoup(parsed.get('displaytitle') or parsed['title'], HTML_PARSER).get_text(separator=' ', strip=True)
+
+    return _article_result(title or parsed['title'], content_div, parsed['text'], parsed.get('revid'))
+
+
+def _remember(key: Tuple[str, str], result: Dict, etag: Optional[str]) -> Dict:
+    """
+    Caches the result for revalidation. The article HTML is left out: an
+    unchanged revision has the same clean text, so its article row (and any
+    stored HTML) already exists.
+    """
+    compact = {name: value for name, value in result.items() if name != "raw_html"}
+    codec, data = compress_text(json.dumps(compact, ensure_ascii=False))
+    _revision_cache.put(key, {"revision_id": result["revision_id"], "etag": etag, "codec": codec, "data": data})
+    return result
+
+
+def _cached_result(cached: Dict) -> Dict:
+    """Rebuilds the scraper result of a revision cache entry."""
+    return {**json.loads(decompress_text(cached["codec"], cached["data"])), "raw_html": None}
+
+
+def fetch_article_via_api(url: str) -> Dict:
+    """
+    Fetches only the article content through the MediaWiki action=parse API.
+    A previously fetched article is revalidated first (If-None-Match when the
+    server sent an ETag, otherwise a revision id lookup) and is not downloaded
+    again if it has not changed.
+    """
+    key = _api_target(url)
+    endpoint, title = key
+    session = get_session()
+    headers = dict(API_HEADERS)
+
+    cached = _revision_cache.get(key)
+    if cached is not None:
+        if cached["etag"]:
+            headers['If-None-Match'] = cached["etag"]
+        else:
+            with span("scrape.fetch"):
+                response = session.get(endpoint, params=_revision_params(title), headers=API_HEADERS, timeout=REQUEST_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            if _latest_revision_id(response.json()) == cached["revision_id"]:
+                return _cached_result(cached)
+
+    with span("scrape.fetch"):
+        response = session.get(endpoint, params=_parse_params(title), headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+    if response.status_code == 304 and cached is not None:
+        return _cached_result(cached)
+    response.raise_for_status()
+    return _remember(key, _result_from_parse_payload(response.json()), response.headers.get('ETag'))
+
+
+async def fetch_article_via_api_async(url: str) -> Dict:
+    """Async counterpart of `fetch_article_via_api` using the pooled async client."""
+    key = _api_target(url)
+    endpoint, title = key
+    client = get_async_client()
+    headers = dict(API_HEADERS)
+
+    cached = _revision_cache.get(key)
+    if cached is not None:
+        if cached["etag"]:
+            headers['If-None-Match'] = cached["etag"]
+        else:
+            with span("scrape.fetch"):
+                response = await client.get(endpoint, params=_revision_params(title), headers=API_HEADERS)
+            response.raise_for_status()
+            if _latest_revision_id(response.json()) == cached["revision_id"]:
+                return _cached_result(cached)
+
+    with span("scrape.fetch"):
+        response = await client.get(endpoint, params=_parse_params(title), headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return _cached_result(cached)
+    response.raise_for_status()
+    result = await asyncio.to_thread(_result_from_parse_payload, response.json())
+    return _remember(key, result, response.headers.get('ETag'))
+
+
+# --- Scraping Entry Points ---
+
+
 def scrape_wikipedia(url: str) -> Dict:
     """
     Fetches, parses, and cleans a Wikipedia article to extract
     the main text and title for quiz generation.
+    Uses the MediaWiki API unless WIKI_FETCH_BACKEND is "html" or the API call fails.
+    """
+    try:
+        _validate_wikipedia_url(url)
+
+        if WIKI_FETCH_BACKEND == "api":
+            try:
+                return fetch_article_via_api(url)
+            except Exception as e:
+                print(f"MediaWiki API fetch failed for {url}, falling back to HTML scraping: {e}")
+
+        with span("scrape.fetch"):
+            response = get_session().get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status() # Raise an error for bad HTTP responses
+
+        return parse_wikipedia_html(response.text)
+
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"Network or request error: {e}")
+    except ValueError as e:
+        raise ValueError(f"URL validation error: {e}")
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred during scraping: {e}")
+
+
+async def scrape_wikipedia_async(url: str) -> Dict:
+    """
+    Async counterpart of `scrape_wikipedia`: fetches the article with the pooled
+    async client and runs the CPU-bound HTML cleaning in a worker thread so the
+    event loop stays free to serve other requests.
     """
     try:
-        # Checks if the URL is from Wikipedia
-        parsed_url = urlparse(url)
-        if not (parsed_url.scheme in ['http', 'https'] and 'wikipedia.org' in parsed_url.netloc):
-            raise ValueError("Only Wikipedia URLs are supported.")
-
-        # Sets a User-Agent header to mimic a browser and avoid 403 errors
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        _validate_wikipedia_url(url)
+
+        if WIKI_FETCH_BACKEND == "api":
+            try:
+                return await fetch_article_via_api_async(url)
+            except Exception as e:
+                print(f"MediaWiki API fetch failed for {url}, falling back to HTML scraping: {e}")
+
+        with span("scrape.fetch"):
+            response = await get_async_client().get(url)
         response.raise_for_status() # Raise an error for bad HTTP responses
 
-        # Parses the HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return await asyncio.to_thread(parse_wikipedia_html, response.text)
+
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Network or request error: {e}")
+    except ValueError as e:
+        raise ValueError(f"URL validation error: {e}")
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred during scraping: {e}")
+
+
+class _ArticleFilter(ElementFilter):
+    """
+    Parse-time filter that only builds the article title heading and the
+    candidate content divs (with everything nested inside them), so the
+    skin, navigation and sidebars are never turned into a tree.
+    """
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if name == 'h1':
+            return attrs.get('id') == 'firstHeading'
+        if name != 'div':
+            return False
+        if attrs.get('id') == 'mw-content-text':
+            return True
+        classes = attrs.get('class') or ''
+        if isinstance(classes, str):
+            classes = classes.split()
+        return 'mw-content-ltr' in classes or 'mw-parser-output' in classes
+
+    def allow_string_creation(self, string: str) -> bool:
+        # Only reached for text outside every kept element
+        return False
+
+
+def _class_set(tag: Tag) -> frozenset:
+    classes = tag.get('class')
+    if not classes:
+        return _NO_CLASSES
+    if isinstance(classes, str):
+        classes = classes.split()
+    return frozenset(classes)
+
+
+def _is_decomposed(element: Tag) -> bool:
+    # Same as `element.decomposed`, which on a live tag falls back to a subtree search
+    return element.__dict__.get('_decomposed', False)
+
+
+def _remove_section(h2_tag: Tag) -> None:
+    """Removes the heading and all its following content until the next heading."""
+    current_element = h2_tag
+    while current_element:
+        next_element = current_element.next_sibling
+        current_element.decompose()
+        current_element = next_element
+        if next_element and next_element.name == 'h2':
+            break
+
+
+def _strip_boilerplate(content_div: Tag) -> None:
+    """
+    Strips boilerplate from an article content div in place. All removal rules
+    are checked in a single traversal; matches are then removed in the same
+    order the rules have always been applied, so section headings are compared
+    before reference markers and pronunciation guides inside them are stripped.
+    """
+    boilerplate = []  # scripts, styles, tables, description lists, unwanted classes
+    h2_tags = []
+    inline_noise = []  # reference markers, pronunciation guides, <small>
+
+    # Pre-order walk in document order; subtrees of boilerplate are skipped
+    # since they are removed as a whole
+    stack = list(reversed(content_div.contents))
+    while stack:
+        element = stack.pop()
+        if not isinstance(element, Tag):
+            continue
+        name = element.name
+        classes = _class_set(element)
+        if name in _UNWANTED_TAGS or not classes.isdisjoint(_UNWANTED_CLASSES):
+            boilerplate.append(element)
+            continue
+        if name == 'h2':
+            h2_tags.append(element)
+        elif (name == 'small'
+              or (name == 'sup' and 'reference' in classes)
+              or (name == 'span' and not classes.isdisjoint(_PRONUNCIATION_CLASSES))):
+            inline_noise.append(element)
+        stack.extend(reversed(element.contents))
+
+    for element in boilerplate:
+        element.decompose()
+
+    # Removes common sections like "See also", "References", etc.
+    for h2_tag in h2_tags:
+        if _is_decomposed(h2_tag):
+            continue
+        span_headline = h2_tag.find('span', class_='mw-headline')
+        if span_headline and span_headline.get_text(strip=True) in _SECTIONS_TO_REMOVE:
+            _remove_section(h2_tag)
+
+    for element in inline_noise:
+        if not _is_decomposed(element):
+            element.decompose()
+
+
+def _finalize_text(text: str) -> str:
+    """Collapses whitespace and removes boilerplate phrases and phonetic transcriptions."""
+    # Collapses all whitespace runs to single spaces
+    clean_text = ' '.join(text.split())
+
+    # Removes common Wikipedia introductory boilerplate phrases
+    for phrase in _BOILERPLATE_PHRASES:
+        clean_text = clean_text.replace(phrase, "").strip()
+
+    # Uses regex to remove any remaining phonetic transcription patterns
+    for pattern in _PHONETIC_PATTERNS:
+        clean_text = pattern.sub('', clean_text)
+
+    # Whitespace is already collapsed above, so only the ends need trimming
+    return clean_text.strip()
+
+
+def clean_content_div(content_div: Tag) -> str:
+    """Strips boilerplate from an article content div in place and returns its cleaned text."""
+    _strip_boilerplate(content_div)
+    return _finalize_text(content_div.get_text(separator=' ', strip=True))
+
+
+def _section_heading(element) -> Optional[Tag]:
+    """Returns the <h2> that starts a section at this top-level element, if any."""
+    if not isinstance(element, Tag):
+        return None
+    if element.name == 'h2':
+        return element
+    # Current Wikipedia markup wraps headings as <div class="mw-heading mw-heading2"><h2>
+    if element.name == 'div' and 'mw-heading2' in _class_set(element):
+        return element.find('h2')
+    return None
+
+
+def extract_sections(content_div: Tag) -> List[Dict]:
+    """
+    Splits a cleaned content div into its top-level sections, returning
+    [{"heading": ..., "text": ...}] in document order. The lead section
+    before the first heading has an empty heading.
+    """
+    container = content_div
+    if 'mw-parser-output' not in _class_set(content_div):
+        container = content_div.find('div', class_='mw-parser-output') or content_div
+
+    sections = [{"heading": "", "parts": []}]
+    for child in container.children:
+        heading = _section_heading(child)
+        if heading is not None:
+            sections.append({"heading": _finalize_text(heading.get_text(separator=' ', strip=True)), "parts": []})
+        elif isinstance(child, Tag):
+            sections[-1]["parts"].append(child.get_text(separator=' ', strip=True))
+        else:
+            sections[-1]["parts"].append(str(child))
+
+    result = []
+    for section in sections:
+        text = _finalize_text(' '.join(section["parts"]))
+        if text:
+            result.append({"heading": section["heading"], "text": text})
+    return result
+
+
+def _article_result(title: str, content_div: Tag, raw_html: str, revision_id: Optional[int]) -> Dict:
+    """Cleans the content div and builds the scraper result shared by all fetch backends."""
+    with span("scrape.clean"):
+        clean_text = clean_content_div(content_div)
+        sections = extract_sections(content_div)
+    return {
+        "title": title,
+        "clean_text": clean_text,
+        "sections": sections,
+        "raw_html": raw_html,
+        "revision_id": revision_id
+    }
+
+
+def parse_wikipedia_html(html: str) -> Dict:
+    """
+    Parses and cleans the HTML of a Wikipedia article page, returning
+    the title, the cleaned text, its sections and the raw HTML.
+    """
+    with span("scrape.parse"):
+        # Parses only the title heading and the content area
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=_ArticleFilter())
 
         # Extracts the article title from the main heading
         title_tag = soup.find('h1', id='firstHeading')
@@ -37,96 +537,10 @@ def scrape_wikipedia(url: str) -> Dict:
         if not content_div:
             content_div = soup.find('div', class_='mw-parser-output')
 
-        if not content_div:
-            raise RuntimeError("Could not find main content div on Wikipedia page.")
-
-        # modifiable copy of the content div for cleaning
-        cleaned_content_soup = BeautifulSoup(str(content_div), 'html.parser')
-
-        # Removes script, style tags, and HTML comments
-        for element in cleaned_content_soup(['script', 'style', Comment]):
-            element.decompose()
-
-        # Removes various boilerplate and non-article elements by class
-        unwanted_classes = [
-            'infobox', 'sidebar', 'navbox', 'vertical-navbox', 'hatnote',
-            'ambox', 'metadata', 'thumb', 'reference-text', 'rellink',
-            'box-Multiple_issues', 'citation-needed', 'portal', 'printfooter',
-            'mw-jump-link', 'mw-indicators'
-        ]
-        unwanted_tags = ['table', 'dl'] # Also removes description lists and general tables
-
-        for cls in unwanted_classes:
-            for element in cleaned_content_soup.find_all(class_=cls):
-                element.decompose()
-
-        for tag in unwanted_tags:
-            for element in cleaned_content_soup.find_all(tag):
-                element.decompose()
-
-        # Removes common sections like "See also", "References", etc.
-        sections_to_remove = [
-            "See also", "References", "External links", "Further reading",
-            "Notes", "Bibliography", "Citations", "Footnotes", "Publications",
-            "Sources", "Awards and honours"
-        ]
-        for h2_tag in cleaned_content_soup.find_all('h2'):
-            span_headline = h2_tag.find('span', class_='mw-headline')
-            if span_headline and span_headline.get_text(strip=True) in sections_to_remove:
-                # Removes the heading and all its following content until the next heading
-                current_element = h2_tag
-                while current_element:
-                    next_element = current_element.next_sibling
-                    current_element.decompose()
-                    current_element = next_element
-                    if next_element and next_element.name == 'h2':
-                        break
-
-        # Removes superscript reference numbers like [1], [2]
-        for sup in cleaned_content_soup.find_all('sup', class_='reference'):
-            sup.decompose()
-
-        # Removes phonetic spellings and pronunciation guides
-        for span_ipa in cleaned_content_soup.find_all('span', class_='IPA'):
-            span_ipa.decompose()
-        for small_tag in cleaned_content_soup.find_all('small'):
-            small_tag.decompose()
-        for span_pron in cleaned_content_soup.find_all('span', class_=['nowrap', 'unicode', 'latinx', 'respell']):
-            span_pron.decompose()
-
-        # Extracts text and perform final string cleanup
-        clean_text = cleaned_content_soup.get_text(separator=' ', strip=True)
-
-        # Removes multiple spaces
-        clean_text = ' '.join(clean_text.split())
-
-        # Removes common Wikipedia introductory boilerplate phrases
-        clean_text = clean_text.replace("From Wikipedia, the free encyclopedia", "").strip()
-        clean_text = clean_text.replace("Jump to navigation Jump to search", "").strip()
-        clean_text = clean_text.replace("This article is about the British mathematician. For other uses, see Alan Turing (disambiguation).", "").strip()
-
-        # Uses regex to remove any remaining phonetic transcription patterns
-        clean_text = re.sub(r'\(\s*/.*?/\s*\)', '', clean_text)
-        clean_text = re.sub(r'\[\s*/.*?/\s*\]', '', clean_text)
-        clean_text = re.sub(r'[\(\[\{][ˈˌ].*?[\)\]\}]', '', clean_text)
-
-        # Standardizes newlines and spacing
-        clean_text = re.sub(r'\n\s*\n', '\n\n', clean_text)
-        clean_text = re.sub(r'([.!?])\s*\n', r'\1 ', clean_text)
-        clean_text = re.sub(r'\s*\n\s*', '\n', clean_text).strip()
-
-        return {
-            "title": title,
-            "clean_text": clean_text,
-            "raw_html": response.text
-        }
+    if not content_div:
+        raise RuntimeError("Could not find main content div on Wikipedia page.")
 
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"Network or request error: {e}")
-    except ValueError as e:
-        raise ValueError(f"URL validation error: {e}")
-    except Exception as e:
-        raise RuntimeError(f"An unexpected error occurred during scraping: {e}")
+    return _article_result(title, content_div, html, None)
 
 # Example usage (for testing)
 if __name__ == "__main__":
@@ -0,0 +1,484 @@
+"""
+Local search index over generated quizzes, served by GET /search.
+
+Every stored quiz is indexed in a SQLite FTS5 table kept in its own file, so
+search works the same whatever the main database is. The title, summary, key
+entities and question text are indexed (stemmed, case and accent
+insensitive) and results are ranked with BM25, a match in the title or the
+entities counting more than one in the questions. Quizzes are added as they
+are stored (`save_quizzes`). Quizzes missing from the index (after the
+index file was removed, or stored by another process or host sharing the
+database) are added by a background sync, started with the app and repeated
+every SEARCH_SYNC_INTERVAL_SECONDS; searches are served from the partial
+index meanwhile.
+
+With SEARCH_EMBEDDING_MODEL set and `sentence-transformers` installed, each
+quiz also gets an embedding vector, stored in the index file and held in
+memory in a random-hyperplane LSH index, so a search also finds quizzes on
+related topics that share no words with the query. The text and vector
+rankings are merged with reciprocal rank fusion.
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import database
+from database import Quiz, session_scope, run_in_db_executor
+
+# --- Search Index Configuration ---
+# Index file; by default next to a SQLite database, or in the backend directory for server databases
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH")
+DEFAULT_SEARCH_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_index.db")
+# sentence-transformers model for semantic search, e.g. "all-MiniLM-L6-v2" (unset disables it).
+# sentence-transformers (and numpy, which it requires) are optional and only imported when set.
+SEARCH_EMBEDDING_MODEL = os.getenv("SEARCH_EMBEDDING_MODEL", "")
+# LSH tables and hyperplanes (signature bits) per table
+SEARCH_LSH_TABLES = int(os.getenv("SEARCH_LSH_TABLES", "8"))
+SEARCH_LSH_BITS = int(os.getenv("SEARCH_LSH_BITS", "12"))
+# Below this many vectors, every vector is compared (faster than LSH at that size, and exact)
+SEARCH_LSH_MIN_ITEMS = 2000
+# Seconds between syncs with the database after the one at startup (0 syncs only at startup).
+# Each host keeps its own index, so quizzes stored by other instances appear after the next sync.
+SEARCH_SYNC_INTERVAL_SECONDS = float(os.getenv("SEARCH_SYNC_INTERVAL_SECONDS", "300"))
+# Rank constant of reciprocal rank fusion
+RRF_K = 60
+# BM25 weights of the indexed columns: title, summary, entities, questions
+_COLUMN_WEIGHTS = (10.0, 2.0, 5.0, 1.0)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_fts USING fts5("
+    "title, summary, entities, questions, url UNINDEXED, date_generated UNINDEXED, "
+    "tokenize = 'porter unicode61 remove_diacritics 2')",
+    "CREATE TABLE IF NOT EXISTS quiz_vectors (quiz_id INTEGER PRIMARY KEY, vector BLOB NOT NULL)",
+)
+
+
+def search_document(response) -> Dict:
+    """The indexed fields of a quiz, from its API response (`FullQuizResponse`)."""
+    return {
+        "id": response.id,
+        "url": str(response.url),
+        "title": response.title,
+        "summary": response.summary,
+        "entities": " ; ".join(entity for entities in response.key_entities.values() for entity in entities),
+        "questions": "\n".join(question.question for question in response.quiz),
+        "date_generated": response.date_generated.isoformat(),
+    }
+
+
+def _document_from_row(quiz_id: int, url: str, title: str, date_generated, full_quiz_data: str) -> Dict:
+    quiz = json.loads(full_quiz_data)
+    return {
+        "id": quiz_id,
+        "url": url,
+        "title": title,
+        "summary": quiz.get("summary", ""),
+        "entities": " ; ".join(entity for entities in quiz.get("key_entities", {}).values() for entity in entities),
+        "questions": "\n".join(question.get("question", "") for question in quiz.get("quiz", [])),
+        "date_generated": date_generated.isoformat() if date_generated else "",
+    }
+
+
+def _embedding_text(document: Dict) -> str:
+    return f"{document['title']}. {document['summary']} {document['entities']}\n{document['questions']}"
+
+
+def fts_query(text: str, any_term: bool = False) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query: every word quoted (so operators and
+    punctuation in the input are harmless), the last one also matching as a
+    prefix, all required unless `any_term`.
+    """
+    terms = [term.replace('"', "") for term in _TERM.findall(text.lower())]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return (" OR " if any_term else " ").join(quoted)
+
+
+class LSHIndex:
+    """
+    Approximate nearest-neighbour index of unit vectors by random-hyperplane
+    LSH: each table buckets vectors by the signs of their projections on
+    `bits` random hyperplanes, so similar vectors share buckets. Candidates from
+    the query's buckets are ranked by exact cosine similarity.
+    """
+
+    def __init__(self, tables: int = SEARCH_LSH_TABLES, bits: int = SEARCH_LSH_BITS, seed: int = 0):
+        import numpy
+
+        self.np = numpy
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        self._planes = None
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(tables)]
+        self._vectors: Dict[int, object] = {}
+        self._matrix = None # Stacked vectors for exact search, rebuilt after changes
+        self._ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def unit(self, vector):
+        vector = self.np.asarray(vector, dtype=self.np.float32)
+        return vector / (self.np.linalg.norm(vector) or 1.0)
+
+    def to_bytes(self, vector) -> bytes:
+        return self.np.asarray(vector, dtype=self.np.float32).tobytes()
+
+    def from_bytes(self, data: bytes):
+        return self.np.frombuffer(data, dtype=self.np.float32)
+
+    def _signatures(self, vector) -> List[int]:
+        np = self.np
+        if self._planes is None:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.tables, self.bits, vector.shape[0])).astype(np.float32)
+        bits = (self._planes @ vector) > 0
+        weights = 1 << np.arange(self.bits)
+        return [int(value) for value in bits.astype(np.int64) @ weights]
+
+    def add(self, item_id: int, vector) -> None:
+        if item_id in self._vectors:
+            self.remove(item_id)
+        vector = self.unit(vector)
+        self._vectors[item_id] = vector
+        for table, signature in zip(self._buckets, self._signatures(vector)):
+            table.setdefault(signature, []).append(item_id)
+        self._matrix = None
+
+    def remove(self, item_id: int) -> None:
+        vector = self._vectors.pop(item_id, None)
+        if vector is None:
+            return
+        for table, signature in zip(self._buckets, self._signatures(vector)):
+            table[signature].remove(item_id)
+        self._matrix = None
+
+    def query(self, vector, limit: int) -> List[tuple]:
+        """Returns up to `limit` (id, cosine similarity) pairs, most similar first."""
+        np = self.np
+        if not self._vectors:
+            return []
+        vector = self.unit(vector)
+        if len(self._vectors) < SEARCH_LSH_MIN_ITEMS:
+            if self._matrix is None:
+                self._ids = list(self._vectors)
+                self._matrix = np.stack([self._vectors[item_id] for item_id in self._ids])
+            ids, matrix = self._ids, self._matrix
+        else:
+            candidates = set()
+            for table, signature in zip(self._buckets, self._signatures(vector)):
+                candidates.update(table.get(signature, ()))
+            if not candidates:
+                return []
+            ids = list(candidates)
+            matrix = np.stack([self._vectors[item_id] for item_id in ids])
+        similarities = matrix @ vector
+        order = np.argsort(-similarities)[:limit]
+        return [(ids[index], float(similarities[index])) for index in order]
+
+
+def _default_embedder() -> Optional[Callable[[List[str]], Sequence]]:
+    if not SEARCH_EMBEDDING_MODEL:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("SEARCH_EMBEDDING_MODEL is set but sentence-transformers is not installed; search is full-text only.")
+        return None
+    model = SentenceTransformer(SEARCH_EMBEDDING_MODEL)
+    return lambda texts: model.encode(texts, normalize_embeddings=True)
+
+
+class SearchIndex:
+    """
+    The FTS5 index (and optional vector index) of the quizzes in the current
+    database. Thread-safe; reopened for another file when the database engine
+    changes (e.g. a temporary database in benchmarks).
+    """
+
+    def __init__(self, path: Optional[str] = SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._engine = None
+        self._embedder = None
+        self._embedder_loaded = False
+        self._vectors: Optional[LSHIndex] = None
+        # Whether every quiz stored before the last sync started has been indexed
+        self.synced = False
+
+    def _index_path(self, engine) -> str:
+        if self.path:
+            return self.path
+        if engine.url.get_backend_name() == "sqlite":
+            if engine.url.database in (None, "", ":memory:"):
+                return ":memory:"
+            return os.path.splitext(engine.url.database)[0] + "_search.db"
+        return DEFAULT_SEARCH_INDEX_PATH
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held
+        engine = database.get_engine()
+        if self._connection is not None and engine is self._engine:
+            return self._connection
+        self.close()
+        path = self._index_path(engine)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+        self._connection, self._engine = connection, engine
+        self._vectors = None
+        self.synced = False
+        return connection
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = self._engine = None
+            self._vectors = None
+
+    # --- Embeddings ---
+
+    def set_embedder(self, embedder: Optional[Callable[[List[str]], Sequence]]) -> None:
+        """Replaces the function that embeds a list of texts (None disables semantic search)."""
+        with self._lock:
+            self._embedder = embedder
+            self._embedder_loaded = True
+            self._vectors = None
+
+    def _get_embedder(self):
+        with self._lock:
+            if not self._embedder_loaded:
+                self._embedder = _default_embedder()
+                self._embedder_loaded = True
+            return self._embedder
+
+    def _vector_index(self, connection: sqlite3.Connection) -> LSHIndex:
+        """The in-memory LSH index, loaded from the stored vectors on first use."""
+        if self._vectors is None:
+            self._vectors = LSHIndex()
+            for quiz_id, blob in connection.execute("SELECT quiz_id, vector FROM quiz_vectors"):
+                self._vectors.add(quiz_id, self._vectors.from_bytes(blob))
+        return self._vectors
+
+    def refresh_vectors(self) -> None:
+        """Reloads the in-memory vector index if other processes stored vectors since it was loaded."""
+        with self._lock:
+            if self._vectors is None:
+                return
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM quiz_vectors").fetchone()
+            if count != len(self._vectors):
+                self._vectors = None
+
+    @property
+    def semantic(self) -> bool:
+        """Whether searches also rank quizzes by embedding similarity."""
+        return self._get_embedder() is not None
+
+    # --- Indexing ---
+
+    def add(self, documents: Iterable[Dict]) -> None:
+        """Indexes (or re-indexes) quizzes given as `search_document` dicts."""
+        documents = list(documents)
+        if not documents:
+            return
+        embedder = self._get_embedder()
+        # Embedded outside the lock: the model is slow compared to the index writes
+        vectors = embedder([_embedding_text(document) for document in documents]) if embedder else None
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany("DELETE FROM quiz_fts WHERE rowid = ?", [(document["id"],) for document in documents])
+                connection.executemany(
+                    "INSERT INTO quiz_fts (rowid, title, summary, entities, questions, url, date_generated) "
+                    "VALUES (:id, :title, :summary, :entities, :questions, :url, :date_generated)",
+                    documents,
+                )
+                if vectors is not None:
+                    vector_index = self._vector_index(connection)
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO quiz_vectors (quiz_id, vector) VALUES (?, ?)",
+                        [(document["id"], vector_index.to_bytes(vector)) for document, vector in zip(documents, vectors)],
+                    )
+            if vectors is not None:
+                for document, vector in zip(documents, vectors):
+                    vector_index.add(document["id"], vector)
+
+    def indexed_ids(self) -> set:
+        with self._lock:
+            return {quiz_id for (quiz_id,) in self._connect().execute("SELECT rowid FROM quiz_fts")}
+
+    # --- Search ---
+
+    def _text_search(self, connection: sqlite3.Connection, text: str, limit: int) -> List[Dict]:
+        weights = ", ".join(str(weight) for weight in _COLUMN_WEIGHTS)
+        sql = (
+            f"SELECT rowid, title, url, date_generated, bm25(quiz_fts, {weights}) AS rank, "
+            "snippet(quiz_fts, -1, '[', ']', '…', 12) "
+            "FROM quiz_fts WHERE quiz_fts MATCH ? ORDER BY rank LIMIT ?"
+        )
+        rows = []
+        # All words must match; if no quiz has them all, any word may
+        for any_term in (False, True):
+            query = fts_query(text, any_term)
+            if query is None:
+                return []
+            rows = connection.execute(sql, (query, limit)).fetchall()
+            if rows:
+                break
+        return [
+            {"id": quiz_id, "title": title, "url": url, "date_generated": date_generated,
+             "score": round(-rank, 4), "snippet": snippet}
+            for quiz_id, title, url, date_generated, rank, snippet in rows
+        ]
+
+    def search(self, text: str, limit: int = 20) -> List[Dict]:
+        """
+        Returns the best matching quizzes, best first, as dicts with id, title,
+        url, date_generated, score (higher is better) and, for text matches, a
+        snippet with the matched words in [brackets].
+        """
+        if not text.strip():
+            raise ValueError("The search query is empty.")
+        embedder = self._get_embedder()
+        query_vector = embedder([text])[0] if embedder else None
+        with self._lock:
+            connection = self._connect()
+            text_results = self._text_search(connection, text, limit)
+            if query_vector is None:
+                return text_results
+            vectors = self._vector_index(connection)
+
+            # Reciprocal rank fusion of the text and vector rankings
+            neighbours = vectors.query(query_vector, limit)
+            fused: Dict[int, Dict] = {}
+            for rank, result in enumerate(text_results):
+                fused[result["id"]] = {**result, "score": 1.0 / (RRF_K + rank + 1)}
+            missing = [quiz_id for quiz_id, _ in neighbours if quiz_id not in fused]
+            rows = {}
+            if missing:
+                placeholders = ", ".join("?" * len(missing))
+                rows = {
+                    quiz_id: (title, url, date_generated)
+                    for quiz_id, title, url, date_generated in connection.execute(
+                        f"SELECT rowid, title, url, date_generated FROM quiz_fts WHERE rowid IN ({placeholders})", missing
+                    )
+                }
+            for rank, (quiz_id, _) in enumerate(neighbours):
+                if quiz_id not in fused:
+                    if quiz_id not in rows:
+                        continue
+                    title, url, date_generated = rows[quiz_id]
+                    fused[quiz_id] = {"id": quiz_id, "title": title, "url": url, "date_generated": date_generated,
+                                      "score": 0.0, "snippet": None}
+                fused[quiz_id]["score"] += 1.0 / (RRF_K + rank + 1)
+        results = sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:limit]
+        for result in results:
+            result["score"] = round(result["score"], 6)
+        return results
+
+
+# Process-wide index, kept in step with the current database
+search_index = SearchIndex()
+
+
+def index_quiz_responses(responses: Iterable) -> None:
+    """
+    Adds newly stored quizzes to the search index. A failure is logged and not
+    raised: the quiz is stored, and is indexed at the next startup instead.
+    """
+    try:
+        search_index.add(search_document(response) for response in responses)
+    except Exception as e:
+        print(f"Could not add quizzes to the search index: {e}")
+
+
+def sync_search_index(batch_size: int = 200, stop: Optional[threading.Event] = None) -> int:
+    """
+    Indexes every stored quiz missing from the search index, in batches, and
+    returns how many were added. Stops between batches once `stop` is set.
+    """
+    indexed = search_index.indexed_ids()
+    with session_scope() as db:
+        missing = sorted(set(quiz_id for (quiz_id,) in db.query(Quiz.id)) - indexed)
+    for start in range(0, len(missing), batch_size):
+        if stop is not None and stop.is_set():
+            return start
+        with session_scope() as db:
+            rows = (
+                db.query(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated, Quiz.full_quiz_data)
+                .filter(Quiz.id.in_(missing[start:start + batch_size]))
+                .all()
+            )
+        documents = []
+        for row in rows:
+            try:
+                documents.append(_document_from_row(*row))
+            except (ValueError, AttributeError) as e:
+                print(f"Quiz {row.id}: stored quiz JSON is invalid ({e}); not indexed.")
+        search_index.add(documents)
+    search_index.refresh_vectors()
+    search_index.synced = True
+    return len(missing)
+
+
+class SearchIndexSync:
+    """
+    Keeps the search index caught up with the database in the background: a
+    sync right after startup (so a large backlog never delays serving), then
+    one every `interval` seconds for quizzes stored by other instances.
+    """
+
+    def __init__(self, interval: float = SEARCH_SYNC_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Starts the sync task on the running event loop."""
+        self._stop.clear()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the sync task, after the batch being indexed (if any) is written."""
+        if self._task is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                added = await run_in_db_executor(sync_search_index, stop=self._stop)
+                if added:
+                    print(f"Added {added} quizzes to the search index.")
+            except Exception as e:
+                print(f"Could not sync the search index: {e}")
+            if self.interval <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+search_index_sync = SearchIndexSync()
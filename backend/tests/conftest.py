@@ -0,0 +1,167 @@
+"""
+Shared fixtures: an in-process stand-in for Wikipedia, a temporary database,
+and the deterministic fake chat model from `benchmarks/fake_llm.py`, so the
+tests run offline and without a Gemini key.
+"""
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend modules are imported as top-level modules, as when running the app from `backend/`
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import httpx
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+import database
+import llm_quiz_generator
+import scraper
+from fake_llm import FakeQuizChatModel
+from fixtures import build_article_html
+from llm_router import LLMProvider, LLMRouter
+
+ARTICLE_URL = "https://en.wikipedia.org/wiki/Alan_Turing"
+
+
+class WikiStandIn:
+    """
+    Serves rendered pages at /wiki/<title> and action=parse / action=query
+    revision lookups at /w/api.php, and counts the requests it answers.
+    """
+
+    def __init__(self, send_etag: bool = True):
+        self.send_etag = send_etag
+        self.pages = {}
+        self.api_status = 200
+        self.missing_in_api = set()
+        self.calls = {"parse": 0, "query": 0, "html": 0, "not_modified": 0}
+
+    def publish(self, title: str, revision_id: int, seed: int = 0) -> None:
+        self.pages[title] = (revision_id, build_article_html(title, sections=6, seed=seed))
+
+    def handle(self, url: str, headers) -> tuple:
+        """Returns (status, headers, body) for a GET request."""
+        parsed = urlparse(url)
+        if parsed.path.startswith("/wiki/"):
+            self.calls["html"] += 1
+            title = parsed.path[len("/wiki/"):].replace("_", " ")
+            if title not in self.pages:
+                return 404, {}, b"Not Found"
+            return 200, {"Content-Type": "text/html; charset=UTF-8"}, self.pages[title][1].encode("utf-8")
+
+        params = {name: values[0] for name, values in parse_qs(parsed.query).items()}
+        action, title = params["action"], params.get("page") or params.get("titles")
+        self.calls[action] += 1
+        if self.api_status != 200:
+            return self.api_status, {}, b"Internal Server Error"
+        if title not in self.pages or title in self.missing_in_api:
+            return 200, {}, json.dumps({"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}).encode()
+        revision_id, html = self.pages[title]
+        if action == "query":
+            payload = {"query": {"pages": [{"title": title, "revisions": [{"revid": revision_id}]}]}}
+            return 200, {}, json.dumps(payload).encode()
+
+        etag = f'"{revision_id}"'
+        if self.send_etag and headers.get("If-None-Match") == etag:
+            self.calls["not_modified"] += 1
+            return 304, {"ETag": etag}, b""
+        content = str(BeautifulSoup(html, "html.parser").find("div", class_="mw-parser-output"))
+        payload = {"parse": {"title": title, "displaytitle": f"<span>{title}</span>", "revid": revision_id, "text": content}}
+        return 200, {"ETag": etag} if self.send_etag else {}, json.dumps(payload).encode()
+
+
+class _StandInAdapter(requests.adapters.BaseAdapter):
+    """Answers the synchronous scraper's requests from the stand-in."""
+
+    def __init__(self, wiki: WikiStandIn):
+        super().__init__()
+        self.wiki = wiki
+
+    def send(self, request, **kwargs):
+        status, headers, body = self.wiki.handle(request.url, request.headers)
+        response = requests.Response()
+        response.status_code = status
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response.headers.update(headers)
+        response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def wiki(monkeypatch):
+    """Routes both fetch paths to a fresh stand-in with the API backend enabled."""
+    stand_in = WikiStandIn()
+    stand_in.publish("Alan Turing", revision_id=100)
+
+    session = requests.Session()
+    session.mount("https://", _StandInAdapter(stand_in))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status, headers, body = stand_in.handle(str(request.url), request.headers)
+        return httpx.Response(status, headers=headers, content=body)
+
+    monkeypatch.setattr(scraper, "WIKI_FETCH_BACKEND", "api")
+    monkeypatch.setattr(scraper, "WIKI_API_URL", None)
+    monkeypatch.setattr(scraper, "_session", session)
+    monkeypatch.setattr(scraper, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    scraper._revision_cache.clear()
+    yield stand_in
+    scraper._revision_cache.clear()
+
+
+@pytest.fixture
+def temp_database(tmp_path):
+    """Binds all sessions to a new SQLite database (and search index) for the test."""
+    from search_index import search_index
+
+    previous = database._engine
+    engine = database.build_engine(f"sqlite:///{tmp_path / 'quizzes.db'}")
+    database.set_engine(engine)
+    database.create_db_tables()
+    yield engine
+    search_index.close()
+    engine.dispose()
+    if previous is not None:
+        database.set_engine(previous)
+    else:
+        database._engine = None
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Installs a fast fake chat model, retrying malformed outputs without waiting."""
+    monkeypatch.setattr(llm_quiz_generator, "_llm", None)
+    monkeypatch.setattr(llm_quiz_generator, "_router", None)
+    model = FakeQuizChatModel(base_latency=0.0, input_token_latency=0.0, output_token_latency=0.0)
+    llm_quiz_generator.set_llm(model)
+    llm_quiz_generator.set_router(LLMRouter(LLMProvider("fake", llm_quiz_generator.get_llm), retry_base_delay=0.001))
+    yield model
+    llm_quiz_generator._chains.clear()
+
+
+@pytest.fixture
+def app_client(wiki, temp_database, fake_llm):
+    """A TestClient of the API with Wikipedia, the database and the LLM all local."""
+    from fastapi.testclient import TestClient
+
+    from cache import quiz_cache
+    from http_cache import response_cache
+    from main import app
+
+    quiz_cache.clear()
+    response_cache.clear()
+    with TestClient(app) as client:
+        yield client
+    quiz_cache.clear()
+    response_cache.clear()
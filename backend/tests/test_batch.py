@@ -0,0 +1,69 @@
+"""
+Tests of batch generation: per-item failures and sharing generations with
+single requests.
+"""
+import asyncio
+
+import batch
+import database
+from conftest import ARTICLE_URL
+from quiz_service import generate_quiz_for_url
+
+
+def test_invalid_urls_fail_individually(app_client):
+    urls = [ARTICLE_URL, "not a url", "https://example.com/wiki/Alan_Turing", ARTICLE_URL.replace("Alan", "alan")]
+    response = app_client.post("/generate_quiz/batch", json={"urls": urls})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["url"] for item in body["results"]] == urls
+    assert [item["status"] for item in body["results"]] == ["generated", "failed", "failed", "generated"]
+    assert body["results"][1]["error"].startswith("Invalid URL")
+    assert body["results"][0]["quiz_id"] == body["results"][3]["quiz_id"]
+    assert (body["generated"], body["cached"], body["failed"]) == (1, 0, 2)
+
+
+def test_batch_shares_generation_with_single_request(wiki, temp_database, fake_llm):
+    fake_llm.base_latency = 0.2
+
+    async def generate_both():
+        return await asyncio.gather(generate_quiz_for_url(ARTICLE_URL), batch.generate_quiz_batch([ARTICLE_URL]))
+
+    single, batch_result = asyncio.run(generate_both())
+
+    assert fake_llm.calls == 1
+    assert batch_result.results[0].quiz_id == single.id
+    with database.session_scope() as db:
+        assert db.query(database.Quiz).count() == 1
+
+
+def test_bulk_writer_does_not_wait_forever_for_open_items(wiki, temp_database, fake_llm):
+    from quiz_service import generate_llm_quiz
+    from scraper import scrape_wikipedia
+
+    scraped = scrape_wikipedia(ARTICLE_URL)
+
+    async def add_one():
+        llm_quiz_data = await generate_llm_quiz(scraped)
+        # Another item of the batch stays open, as when it waits on a generation shared with another batch
+        writer = batch._BulkWriter(items=2, batch_size=25, max_wait=0.05)
+        return await asyncio.wait_for(writer.add(ARTICLE_URL, ARTICLE_URL, llm_quiz_data, scraped), 2)
+
+    assert asyncio.run(add_one()).title == "Alan Turing"
+
+
+def test_batches_run_from_separate_event_loops(wiki, temp_database, fake_llm, monkeypatch):
+    # One LLM slot and a short rate-limit interval, so the batch items contend for both
+    monkeypatch.setattr(batch, "llm_slots", batch.AIMDLimiter(initial=1, minimum=1, maximum=1))
+    monkeypatch.setattr(batch, "llm_rate_limiter", batch.RateLimiter(per_minute=6000))
+    fake_llm.base_latency = 0.01
+    titles = ["Ada Lovelace", "Grace Hopper", "John von Neumann", "Kurt Godel"]
+    for revision_id, title in enumerate(titles, start=200):
+        wiki.publish(title, revision_id=revision_id)
+    urls = [f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}" for title in titles]
+
+    # As from the CLI, or a script calling asyncio.run once per batch
+    for batch_urls in (urls[:2], urls[2:]):
+        result = asyncio.run(batch.generate_quiz_batch(batch_urls))
+        assert [item.status for item in result.results] == ["generated", "generated"]
+    assert batch.llm_slots.stats()["in_flight"] == 0
@@ -0,0 +1,59 @@
+"""
+End-to-end tests of quiz generation through the API, with Wikipedia, the
+database and the LLM replaced by the local fixtures in `conftest.py`.
+"""
+import json
+
+from conftest import ARTICLE_URL
+
+
+def sse_events(body: str) -> list:
+    """Parses a Server-Sent Events body into [(event, data)]."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        events.append((fields.get("event"), json.loads(fields["data"])))
+    return events
+
+
+def test_generate_quiz_stores_the_quiz(app_client):
+    response = app_client.post("/generate_quiz", json={"url": ARTICLE_URL})
+
+    assert response.status_code == 201
+    quiz = response.json()
+    assert quiz["title"] == "Alan Turing" and len(quiz["quiz"]) == 5
+    assert app_client.get(f"/quiz/{quiz['id']}").json()["quiz"] == quiz["quiz"]
+
+
+def test_streamed_quiz_ends_with_the_stored_quiz(app_client):
+    response = app_client.post("/generate_quiz/stream", json={"url": ARTICLE_URL})
+
+    events = sse_events(response.text)
+    assert [data for event, data in events if event == "question"]
+    assert events[-1][0] == "quiz" and events[-1][1]["title"] == "Alan Turing"
+
+
+def test_malformed_llm_output_is_a_server_error(app_client, fake_llm):
+    fake_llm.malformed_rate = 1.0
+
+    response = app_client.post("/generate_quiz", json={"url": ARTICLE_URL})
+    assert response.status_code == 500
+
+    response = app_client.post("/generate_quiz/stream", json={"url": ARTICLE_URL, "force_refresh": True})
+    event, data = sse_events(response.text)[-1]
+    assert event == "error" and data["status_code"] == 500
+
+
+def test_database_cache_hit_reads_the_stored_response(app_client, fake_llm, monkeypatch):
+    import quiz_service
+    from cache import quiz_cache
+
+    first = app_client.post("/generate_quiz", json={"url": ARTICLE_URL}).json()
+    quiz_cache.clear()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the quiz JSON was parsed again")
+
+    monkeypatch.setattr(quiz_service, "quiz_to_response", fail)
+    second = app_client.post("/generate_quiz", json={"url": ARTICLE_URL})
+    assert second.json() == first and fake_llm.calls == 1
@@ -0,0 +1,27 @@
+"""
+Tests of the cached /history pages.
+"""
+from datetime import datetime, timedelta
+
+import database
+
+
+def store_quiz(title: str, date_generated: datetime) -> None:
+    with database.session_scope() as db:
+        db.add(database.Quiz(url=f"https://en.wikipedia.org/wiki/{title}", title=title,
+                             date_generated=date_generated, full_quiz_data="{}"))
+        db.commit()
+
+
+def test_pages_after_a_cursor_are_refreshed_by_new_quizzes(app_client):
+    now = datetime.now()
+    store_quiz("Newest", now)
+    store_quiz("Oldest", now - timedelta(days=2))
+    cursor = app_client.get("/history", params={"limit": 1}).json()["next_cursor"]
+    second_page = app_client.get("/history", params={"limit": 5, "cursor": cursor}).json()
+    assert [quiz["title"] for quiz in second_page["items"]] == ["Oldest"]
+
+    # A quiz dated between the two, e.g. from another worker's clock, belongs on the cached second page
+    store_quiz("Middle", now - timedelta(days=1))
+    second_page = app_client.get("/history", params={"limit": 5, "cursor": cursor}).json()
+    assert [quiz["title"] for quiz in second_page["items"]] == ["Middle", "Oldest"]
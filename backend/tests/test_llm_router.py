@@ -0,0 +1,143 @@
+"""
+Tests of the LLM router: retries of rate-limited and malformed answers, the
+deadline, hedging to the fallback provider, and the AIMD concurrency limiter.
+"""
+import asyncio
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompt_values import StringPromptValue
+from pydantic import BaseModel
+
+from fake_llm import FakeRateLimitError
+from llm_router import AIMDLimiter, LLMProvider, LLMRouter, llm_hedges
+
+PROMPT = StringPromptValue(text="Generate a quiz.")
+ANSWER = {"title": "Alan Turing", "summary": "An English mathematician."}
+
+
+class Answer(BaseModel):
+    title: str
+    summary: str
+
+
+class ScriptedModel:
+    """Chat model stand-in that answers after `delay` seconds, or raises, following a script of outcomes."""
+
+    def __init__(self, *script, delay: float = 0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, prompt_value):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        outcome = self.script.pop(0) if self.script else json.dumps(ANSWER)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return AIMessage(content=outcome)
+
+
+def provider(name: str, model: ScriptedModel, **limits) -> LLMProvider:
+    return LLMProvider(name, lambda: model, AIMDLimiter(**limits) if limits else None)
+
+
+def route(router: LLMRouter) -> dict:
+    return asyncio.run(router.ainvoke("quiz", PROMPT, JsonOutputParser(pydantic_object=Answer)))
+
+
+@pytest.mark.parametrize("failure", [FakeRateLimitError("429 RESOURCE_EXHAUSTED"), '{"title": "Alan'],
+                         ids=["rate_limited", "malformed"])
+def test_failed_attempt_is_retried(failure):
+    model = ScriptedModel(failure)
+    router = LLMRouter(provider("primary", model), retry_base_delay=0.001)
+
+    assert route(router) == ANSWER
+    assert model.calls == 2
+
+
+def test_retries_stop_at_max_attempts():
+    model = ScriptedModel(*[FakeRateLimitError("429") for _ in range(3)])
+    router = LLMRouter(provider("primary", model), max_attempts=3, retry_base_delay=0.001)
+
+    with pytest.raises(FakeRateLimitError):
+        route(router)
+    assert model.calls == 3
+
+
+def test_deadline_raises_timeout_error():
+    model = ScriptedModel(delay=5)
+    router = LLMRouter(provider("primary", model, initial=4), timeout=0.05)
+
+    with pytest.raises(TimeoutError):
+        route(router)
+    # A call that timed out counts as overload
+    assert router.primary.limiter.stats()["limit"] == 2
+
+
+def test_hedged_fallback_wins_against_slow_primary():
+    primary, fallback = ScriptedModel(delay=5), ScriptedModel()
+    router = LLMRouter(provider("primary", primary), provider("fallback", fallback), timeout=2, hedge_after=0.01)
+    hedges_before = llm_hedges.value(winner="fallback")
+
+    assert route(router) == ANSWER
+    assert primary.calls == 1 and fallback.calls == 1
+    assert llm_hedges.value(winner="fallback") == hedges_before + 1
+
+
+def test_timeout_only_penalizes_admitted_calls():
+    primary, fallback = ScriptedModel(delay=5), ScriptedModel()
+    router = LLMRouter(provider("primary", primary, initial=4), provider("fallback", fallback, initial=2, maximum=2),
+                       timeout=0.1, hedge_after=0.01)
+
+    async def with_fallback_saturated():
+        # The hedge never gets a fallback slot, so the fallback was not slow
+        await router.fallback.limiter.acquire()
+        await router.fallback.limiter.acquire()
+        await router.ainvoke("quiz", PROMPT, JsonOutputParser(pydantic_object=Answer))
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(with_fallback_saturated())
+    assert router.primary.limiter.stats()["limit"] == 2
+    assert router.fallback.limiter.stats()["limit"] == 2 and fallback.calls == 0
+
+
+def test_limit_decreases_on_overload_and_increases_on_success():
+    model = ScriptedModel(FakeRateLimitError("429"))
+    router = LLMRouter(provider("primary", model, initial=4, maximum=8), retry_base_delay=0.001)
+
+    route(router)
+    # Halved by the 429 (4 -> 2), then raised by 1 / limit for the retry that succeeded
+    assert router.primary.limiter.limit == pytest.approx(2.5)
+    for _ in range(3):
+        route(router)
+    assert router.primary.limiter.stats()["limit"] == 3
+
+
+def test_cancelled_waiter_releases_its_slot():
+    limiter = AIMDLimiter(initial=1, minimum=1, maximum=1)
+
+    async def cancel_waiters():
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()["waiting"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.stats() == {"limit": 1, "in_flight": 1, "waiting": 0}
+
+        # A waiter cancelled after its slot was granted, before it resumed, hands the slot back
+        granted = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        granted.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        await asyncio.sleep(0)
+        assert limiter.stats() == {"limit": 1, "in_flight": 0, "waiting": 0}
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+    asyncio.run(cancel_waiters())
@@ -0,0 +1,58 @@
+"""
+Tests that a generation records its stage spans in /metrics and in the
+per-request log line, along with its token counts, with the fake chat model
+standing in for Gemini.
+"""
+import json
+import re
+
+from conftest import ARTICLE_URL
+
+# Stages of a short-article generation served from a fresh scrape
+GENERATION_STAGES = ("scrape.fetch", "scrape.parse", "scrape.clean", "condense", "llm.call", "llm.parse", "db.write")
+
+_STAGE_COUNT = re.compile(r'^quiz_stage_seconds_count\{stage="([^"]+)"\} (\d+)$', re.MULTILINE)
+
+
+def stage_counts(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {stage: int(count) for stage, count in _STAGE_COUNT.findall(response.text)}
+
+
+def test_generation_spans_are_reported(app_client, capsys):
+    before = stage_counts(app_client)
+    response = app_client.post("/generate_quiz", json={"url": ARTICLE_URL}, headers={"X-Request-ID": "test-request-1"})
+    assert response.status_code == 201
+    assert response.headers["X-Request-ID"] == "test-request-1"
+
+    after = stage_counts(app_client)
+    for stage in GENERATION_STAGES:
+        assert after.get(stage, 0) > before.get(stage, 0), stage
+
+    log_lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    request_log = next(line for line in log_lines if line["request_id"] == "test-request-1")
+    assert request_log["route"] == "/generate_quiz" and request_log["status"] == 201
+    assert 0 < request_log["sent_tokens"] <= request_log["article_tokens"]
+    logged_stages = [span["stage"] for span in request_log["stages"]]
+    assert set(GENERATION_STAGES) <= set(logged_stages)
+    assert logged_stages.index("scrape.fetch") < logged_stages.index("llm.call") < logged_stages.index("db.write")
+
+
+def test_request_id_is_generated_when_missing(app_client):
+    first = app_client.get("/history").headers["X-Request-ID"]
+    second = app_client.get("/history").headers["X-Request-ID"]
+    assert first and second and first != second
+
+
+def test_long_document_counts_are_logged(app_client, capsys, monkeypatch):
+    import long_document
+    monkeypatch.setattr(long_document, "LONG_DOCUMENT_THRESHOLD_TOKENS", 100)
+    response = app_client.post("/generate_quiz", json={"url": ARTICLE_URL}, headers={"X-Request-ID": "test-request-2"})
+    assert response.status_code == 201
+
+    log_lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    request_log = next(line for line in log_lines if line["request_id"] == "test-request-2")
+    # The overview prompt repeats the article's lead, so only the article count is bounded
+    assert request_log["article_tokens"] > 100 and request_log["sent_tokens"] > 0
+    assert 0 < request_log["chunks"] <= long_document.MAX_CHUNKS
@@ -0,0 +1,30 @@
+"""
+Tests of the one-off data migrations on legacy quiz rows.
+"""
+import database
+from fixtures import build_article_html
+from migrations import compress_scraped_content
+
+EMPTY_PAGE = '<html><body><h1 id="firstHeading">Empty</h1><div class="mw-parser-output"><table><tr><td>x</td></tr></table></div></body></html>'
+
+
+def legacy_quiz(title: str, html: str) -> database.Quiz:
+    return database.Quiz(url=f"https://en.wikipedia.org/wiki/{title}", title=title, full_quiz_data="{}", scraped_content=html)
+
+
+def test_compress_scraped_content_keeps_html_without_text(temp_database):
+    with database.session_scope() as db:
+        db.add_all([legacy_quiz("Good", build_article_html("Good", sections=2)), legacy_quiz("Empty", EMPTY_PAGE)])
+        db.commit()
+
+    assert compress_scraped_content() == 1
+
+    with database.session_scope() as db:
+        good, empty = db.query(database.Quiz).order_by(database.Quiz.id).all()
+        assert good.scraped_content is None and good.article.raw_html.startswith("<!DOCTYPE html>")
+        # The page without article text is not linked to an empty article, and keeps its HTML
+        assert empty.article_id is None and empty.scraped_content == EMPTY_PAGE
+        assert db.query(database.Article).count() == 1
+
+    # Re-running skips the unmigratable row again without touching it
+    assert compress_scraped_content() == 0
@@ -0,0 +1,83 @@
+"""
+Golden-file tests of the article HTML cleaning.
+
+The expected texts in `data/expected/` were produced by the original
+two-pass cleaner (before parsing was reduced to one filtered pass), so these
+tests check that the cleaned text sent to the LLM is unchanged. Each file
+holds the article title on its first line and the clean text after it.
+To update them after an intended change in the output, run
+`UPDATE_GOLDEN=1 python -m pytest tests/test_scraper.py` and review the diff.
+"""
+import os
+
+import pytest
+
+import scraper
+from fixtures import fixture_pages
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+PAGES_DIR = os.path.join(DATA_DIR, "pages")
+EXPECTED_DIR = os.path.join(DATA_DIR, "expected")
+
+# Synthetic benchmark pages with every boilerplate element the cleaner removes
+FIXTURE_SIZES = ("small", "medium")
+# Rewrite the expected texts from the current implementation instead of comparing
+UPDATE_GOLDEN = os.getenv("UPDATE_GOLDEN", "").lower() in ("1", "true", "yes")
+
+
+def _read(path: str) -> str:
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def golden_pages() -> dict:
+    """Returns {name: html} for the edge-case pages and the benchmark fixture pages."""
+    pages = {
+        name[:-len(".html")]: _read(os.path.join(PAGES_DIR, name))
+        for name in sorted(os.listdir(PAGES_DIR)) if name.endswith(".html")
+    }
+    fixtures = fixture_pages()
+    pages.update({f"fixture_{size}": fixtures[size] for size in FIXTURE_SIZES})
+    return pages
+
+
+def _expected(name: str) -> str:
+    return _read(os.path.join(EXPECTED_DIR, f"{name}.txt"))
+
+
+def _golden_text(result: dict) -> str:
+    return f"{result['title']}\n{result['clean_text']}\n"
+
+
+PAGES = golden_pages()
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_clean_text_matches_golden_file(name):
+    text = _golden_text(scraper.parse_wikipedia_html(PAGES[name]))
+    if UPDATE_GOLDEN:
+        with open(os.path.join(EXPECTED_DIR, f"{name}.txt"), "w", encoding="utf-8") as file:
+            file.write(text)
+    assert text == _expected(name)
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_lxml_parser_gives_the_same_text(name, monkeypatch):
+    pytest.importorskip("lxml")
+    monkeypatch.setattr(scraper, "HTML_PARSER", "lxml")
+    assert _golden_text(scraper.parse_wikipedia_html(PAGES[name])) == _expected(name)
+
+
+def test_sections_cover_the_clean_text():
+    result = scraper.parse_wikipedia_html(PAGES["removed_sections"])
+    headings = [section["heading"] for section in result["sections"]]
+    # Removed sections ("Notes", "See also", "References") get no entry
+    assert len(headings) == 3 and headings[1].startswith("Early life") and headings[2] == "Legacy"
+    for section in result["sections"]:
+        assert section["text"] in result["clean_text"]
+
+
+def test_page_without_content_div_is_rejected():
+    with pytest.raises(RuntimeError, match="main content div"):
+        scraper.parse_wikipedia_html("<html><body><h1 id='firstHeading'>Title</h1><p>Text</p></body></html>")
+
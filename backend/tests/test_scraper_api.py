@@ -0,0 +1,94 @@
+"""
+Tests of the MediaWiki API fetch path against an in-process stand-in for
+Wikipedia: conditional revalidation (ETag/304 and revision ids), the
+fallback to scraping the rendered page, and that both paths clean an article
+to the same text.
+"""
+import asyncio
+
+import pytest
+
+import scraper
+from conftest import ARTICLE_URL
+
+
+def scrape_async(url: str) -> dict:
+    return asyncio.run(scraper.scrape_wikipedia_async(url))
+
+
+@pytest.mark.parametrize("scrape", [scraper.scrape_wikipedia, scrape_async], ids=["sync", "async"])
+def test_unchanged_article_is_revalidated_with_etag(wiki, scrape):
+    first = scrape(ARTICLE_URL)
+    second = scrape(ARTICLE_URL)
+
+    assert wiki.calls["parse"] == 2 and wiki.calls["not_modified"] == 1
+    assert second["revision_id"] == first["revision_id"] == 100
+    assert second["clean_text"] == first["clean_text"]
+    assert second["sections"] == first["sections"]
+    # The cached result does not keep the article HTML
+    assert first["raw_html"] and second["raw_html"] is None
+
+
+@pytest.mark.parametrize("scrape", [scraper.scrape_wikipedia, scrape_async], ids=["sync", "async"])
+def test_matching_revision_id_reuses_cached_result(wiki, scrape):
+    wiki.send_etag = False
+    first = scrape(ARTICLE_URL)
+    second = scrape(ARTICLE_URL)
+
+    assert wiki.calls == {"parse": 1, "query": 1, "html": 0, "not_modified": 0}
+    assert second["clean_text"] == first["clean_text"]
+
+
+@pytest.mark.parametrize("scrape", [scraper.scrape_wikipedia, scrape_async], ids=["sync", "async"])
+def test_new_revision_is_downloaded_again(wiki, scrape):
+    wiki.send_etag = False
+    first = scrape(ARTICLE_URL)
+    wiki.publish("Alan Turing", revision_id=101, seed=1)
+    second = scrape(ARTICLE_URL)
+
+    assert wiki.calls["parse"] == 2 and wiki.calls["query"] == 1
+    assert second["revision_id"] == 101
+    assert second["clean_text"] != first["clean_text"]
+
+
+@pytest.mark.parametrize("scrape", [scraper.scrape_wikipedia, scrape_async], ids=["sync", "async"])
+def test_api_error_falls_back_to_html_scraping(wiki, scrape):
+    wiki.api_status = 500
+    result = scrape(ARTICLE_URL)
+
+    assert wiki.calls["parse"] == 1 and wiki.calls["html"] == 1
+    assert result["title"] == "Alan Turing" and result["revision_id"] is None
+
+
+@pytest.mark.parametrize("scrape", [scraper.scrape_wikipedia, scrape_async], ids=["sync", "async"])
+def test_page_missing_from_api_falls_back_to_html_scraping(wiki, scrape):
+    wiki.missing_in_api.add("Alan Turing")
+    assert scrape(ARTICLE_URL)["title"] == "Alan Turing"
+    assert wiki.calls["html"] == 1
+
+    with pytest.raises(RuntimeError):
+        scrape("https://en.wikipedia.org/wiki/No_Such_Article")
+
+
+@pytest.mark.parametrize("scrape", [scraper.scrape_wikipedia, scrape_async], ids=["sync", "async"])
+def test_api_and_html_paths_give_the_same_article(wiki, scrape, monkeypatch):
+    from_api = scrape(ARTICLE_URL)
+    monkeypatch.setattr(scraper, "WIKI_FETCH_BACKEND", "html")
+    from_html = scrape(ARTICLE_URL)
+
+    assert wiki.calls["parse"] == 1 and wiki.calls["html"] == 1
+    assert from_api["title"] == from_html["title"]
+    assert from_api["clean_text"] == from_html["clean_text"]
+    assert from_api["sections"] == from_html["sections"]
+
+
+def test_revision_cache_is_bounded_by_size():
+    cache = scraper._RevisionCache(max_entries=10, max_bytes=100)
+    for index in range(5):
+        cache.put(("api", f"page {index}"), {"revision_id": index, "etag": None, "codec": "zlib", "data": b"x" * 40})
+
+    assert cache.current_bytes == 80
+    assert cache.get(("api", "page 2")) is None and cache.get(("api", "page 4")) is not None
+    # An entry larger than the whole budget is not kept
+    cache.put(("api", "huge"), {"revision_id": 0, "etag": None, "codec": "zlib", "data": b"x" * 101})
+    assert cache.get(("api", "huge")) is None and cache.current_bytes == 80
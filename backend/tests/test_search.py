@@ -0,0 +1,126 @@
+"""
+Tests of /search and of keeping its index in step with the database.
+"""
+import os
+import threading
+import time
+import zlib
+
+import pytest
+
+import search_index as search_module
+from models import LLMFullQuizOutput
+from quiz_service import save_quizzes
+from search_index import SearchIndex, search_index, sync_search_index
+
+TOPICS = [
+    ("Alan Turing", ["Alan Turing", "Bletchley Park"], "Who broke the Enigma cipher at Bletchley Park?"),
+    ("Marie Curie", ["Marie Curie", "Sorbonne"], "Which element did Curie discover first?"),
+    ("Photosynthesis", ["Chloroplast"], "What pigment absorbs light in plants?"),
+    ("Enigma machine", ["Wehrmacht"], "How many rotors did the Enigma have?"),
+]
+
+
+def quiz_entry(title: str, entities: list, question: str) -> tuple:
+    quiz = LLMFullQuizOutput.model_validate({
+        "title": title, "summary": f"{title} summary.", "key_entities": {"people": entities}, "sections": ["Life"],
+        "quiz": [{"question": question, "options": ["a", "b", "c", "d"], "answer": "a", "difficulty": "easy", "explanation": "e"}],
+        "related_topics": [],
+    })
+    return f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}", quiz, {"title": title, "clean_text": f"{title} article text."}
+
+
+def hashed_embedder(texts):
+    """Bag-of-words vectors, enough for word-overlap similarity."""
+    numpy = pytest.importorskip("numpy")
+    vectors = []
+    for text in texts:
+        vector = numpy.zeros(64, dtype=numpy.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.strip(".?,;").encode()) % 64] += 1
+        vectors.append(vector)
+    return vectors
+
+
+def titles(response) -> list:
+    return [item["title"] for item in response.json()["items"]]
+
+
+def test_search_ranks_matching_quizzes(app_client):
+    save_quizzes([quiz_entry(*topic) for topic in TOPICS])
+
+    response = app_client.get("/search", params={"q": "enigma"})
+    assert response.status_code == 200
+    assert set(titles(response)) == {"Enigma machine", "Alan Turing"}
+    assert titles(app_client.get("/search", params={"q": "rotor"})) == ["Enigma machine"]
+    # Operators and quotes in the query are searched as plain words
+    assert app_client.get("/search", params={"q": 'AND "('}).json()["items"] == []
+    assert app_client.get("/search", params={"q": " "}).status_code == 400
+
+
+def test_startup_does_not_wait_for_the_index(wiki, temp_database, fake_llm, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    save_quizzes([quiz_entry(*topic) for topic in TOPICS])
+    # Lose the index, and hold up the sync that rebuilds it until the app is serving
+    search_index.close()
+    os.remove(search_index._index_path(temp_database))
+    release = threading.Event()
+    original_sync = search_module.sync_search_index
+
+    def blocked_sync(*args, **kwargs):
+        release.wait(5)
+        return original_sync(*args, **kwargs)
+
+    monkeypatch.setattr(search_module, "sync_search_index", blocked_sync)
+    with TestClient(app) as client:
+        partial = client.get("/search", params={"q": "curie"}).json()
+        assert partial["complete"] is False and partial["items"] == []
+
+        release.set()
+        for _ in range(100):
+            response = client.get("/search", params={"q": "curie"}).json()
+            if response["complete"]:
+                break
+            time.sleep(0.02)
+        assert response["complete"] and [item["title"] for item in response["items"]] == ["Marie Curie"]
+
+
+def test_sync_stops_between_batches(temp_database):
+    save_quizzes([quiz_entry(*topic) for topic in TOPICS])
+    search_index.close()
+    os.remove(search_index._index_path(temp_database))
+
+    stop = threading.Event()
+    stop.set()
+    assert sync_search_index(batch_size=2, stop=stop) == 0
+    assert search_index.indexed_ids() == set() and not search_index.synced
+    assert sync_search_index(batch_size=2) == len(TOPICS)
+    assert len(search_index.indexed_ids()) == len(TOPICS) and search_index.synced
+
+
+def test_vectors_stored_by_another_process_are_picked_up(temp_database):
+    pytest.importorskip("numpy")
+    search_index.set_embedder(hashed_embedder)
+    try:
+        save_quizzes([quiz_entry(*topic) for topic in TOPICS])
+        assert search_index.semantic
+
+        # Another worker sharing the index file stores a quiz this process never saw
+        other = SearchIndex(path=search_index._index_path(temp_database))
+        other.set_embedder(hashed_embedder)
+        other.add([{
+            "id": 1000, "url": "https://en.wikipedia.org/wiki/Max_Planck", "title": "Max Planck",
+            "summary": "Planck constant quantum theory.", "entities": "Max Planck", "questions": "What is a quantum?",
+            "date_generated": "2026-01-01T00:00:00",
+        }])
+        other.close()
+
+        sync_search_index()
+        results = search_index.search("planck constant quantum theory", 5)
+        assert results[0]["id"] == 1000
+        assert len(search_index._vectors) == len(TOPICS) + 1
+    finally:
+        search_index.set_embedder(None)
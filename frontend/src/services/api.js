@@ -20,8 +20,72 @@ export const generateQuiz = async (url) => {
   }
 };
 
-export const getQuizHistory = async () => {
-  const response = await fetch(`${API_BASE_URL}/history`);
+// Parses a Server-Sent Events body, calling onEvent(event, data) per message
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of message.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+};
+
+// Streams a quiz generation: calls onMeta({ title, summary }), onQuestion(question)
+// and onProgress(stage) as results arrive, and resolves with the complete stored quiz
+export const generateQuizStream = async (url, { onMeta, onQuestion, onProgress } = {}) => {
+  const response = await fetch(`${API_BASE_URL}/generate_quiz/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({ url }),
+  });
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.detail || "Failed to generate quiz");
+  }
+
+  let quiz = null;
+  let streamError = null;
+  await readEventStream(response, (event, data) => {
+    if (event === "progress") onProgress?.(data.stage);
+    else if (event === "meta") onMeta?.(data);
+    else if (event === "question") onQuestion?.(data.question);
+    else if (event === "quiz") quiz = data;
+    else if (event === "error") streamError = data.detail;
+  });
+
+  if (streamError || !quiz) {
+    throw new Error(streamError || "Quiz stream ended unexpectedly");
+  }
+  return quiz;
+};
+
+// Returns one page of history: { items, next_cursor, total }
+export const getQuizHistory = async ({ cursor = null, limit = 20, includeTotal = false } = {}) => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+  if (includeTotal) {
+    params.set("include_total", "true");
+  }
+  const response = await fetch(`${API_BASE_URL}/history?${params}`);
 
   if (!response.ok) {
     throw new Error("Failed to fetch quiz history");
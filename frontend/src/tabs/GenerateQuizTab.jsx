@@ -1,6 +1,6 @@
 // frontend/src/tabs/GenerateQuizTab.jsx
 import React, { useState, useEffect } from "react";
-import { generateQuiz, getArticleTitlePreview } from "../services/api";
+import { generateQuizStream, getArticleTitlePreview } from "../services/api";
 import LoadingSpinner from "../components/LoadingSpinner";
 import QuizDisplay from "../components/QuizDisplay";
 
@@ -8,6 +8,7 @@ function GenerateQuizTab() {
   const [url, setUrl] = useState("");
   const [quizData, setQuizData] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const [error, setError] = useState(null);
   const [previewTitle, setPreviewTitle] = useState("");
   const [debouncedUrl, setDebouncedUrl] = useState("");
@@ -56,13 +57,27 @@ function GenerateQuizTab() {
     }
 
     setLoading(true);
+    setStreaming(true);
     try {
-      const data = await generateQuiz(url);
+      // Show the title, summary and questions as soon as they are streamed
+      const data = await generateQuizStream(url, {
+        onMeta: (meta) => {
+          setQuizData({ ...meta, quiz: [] });
+          setLoading(false);
+        },
+        onQuestion: (question) =>
+          setQuizData((current) => ({
+            ...current,
+            quiz: [...(current?.quiz || []), question],
+          })),
+      });
       setQuizData(data);
     } catch (err) {
+      setQuizData(null);
       setError(err.message || "An unexpected error occurred.");
     } finally {
       setLoading(false);
+      setStreaming(false);
     }
   };
 
@@ -89,7 +104,7 @@ text-white font-semibold rounded-md shadow-sm
 focus:outline-none focus:ring-2 focus:ring-sky-400 focus:ring-offset-2 
 dark:focus:ring-offset-gray-900 transition-colors duration-200 cursor-pointer"
             disabled={
-              loading || !url.startsWith("https://en.wikipedia.org/wiki/")
+              streaming || !url.startsWith("https://en.wikipedia.org/wiki/")
             }
           >
             Generate Quiz
@@ -8,6 +8,9 @@ import HistoryTable from "../components/HistoryTable";
 
 function HistoryTab() {
   const [history, setHistory] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -19,11 +22,11 @@ function HistoryTab() {
       setLoading(true);
       setError(null);
       try {
-        const data = await getQuizHistory();
-        const sortedData = data.sort(
-          (a, b) => new Date(b.date_generated) - new Date(a.date_generated)
-        );
-        setHistory(sortedData);
+        // Pages arrive newest first from the server
+        const page = await getQuizHistory({ includeTotal: true });
+        setHistory(page.items);
+        setNextCursor(page.next_cursor);
+        setTotal(page.total);
       } catch (err) {
         setError(err.message || "Failed to fetch quiz history.");
       } finally {
@@ -34,6 +37,20 @@ function HistoryTab() {
     fetchHistory();
   }, []);
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    setError(null);
+    try {
+      const page = await getQuizHistory({ cursor: nextCursor });
+      setHistory((previous) => [...previous, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError(err.message || "Failed to fetch more quizzes.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDetailsClick = async (quizId) => {
     setError(null);
     setSelectedQuizDetails(null); // Clear previous details
@@ -83,6 +100,24 @@ function HistoryTab() {
       {/* HistoryTable component here */}
       <HistoryTable history={history} handleDetailsClick={handleDetailsClick} />
 
+      {nextCursor && (
+        <div className="mt-6 flex flex-col items-center gap-2">
+          {total !== null && (
+            <p className="text-sm text-gray-500 dark:text-gray-400">
+              Showing {history.length} of {total} quizzes
+            </p>
+          )}
+          <button
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+            className="px-6 py-2 bg-gradient-to-r from-sky-400 to-violet-500 hover:from-sky-500 hover:to-violet-600 text-white font-semibold rounded-md shadow-sm
+            focus:outline-none focus:ring-2 focus:ring-sky-400 focus:ring-offset-2 dark:focus:ring-offset-gray-800 transition-colors duration-200 cursor-pointer"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+
       {/* Quiz Details Modal */}
       <Modal
         isOpen={isModalOpen}